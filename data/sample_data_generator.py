@@ -7,13 +7,12 @@ with seasonal trends, weekly patterns, outliers, and data quality issues.
 Usage:
     python data/sample_data_generator.py
     python data/sample_data_generator.py --rows 50000
+    python data/sample_data_generator.py --rows 50000 --seed 42
 """
 
 import os
-import random
 import argparse
 import logging
-from datetime import datetime, timedelta
 from pathlib import Path
 
 import numpy as np
@@ -69,135 +68,162 @@ PRODUCTS = {
 SALES_CHANNELS = ["Direct", "Partner", "Online", "Reseller"]
 PAYMENT_METHODS = ["Credit Card", "Wire Transfer", "Purchase Order", "Net 30", "Net 60"]
 CUSTOMER_SEGMENTS = ["Enterprise", "Mid-Market", "SMB", "Startup", "Government"]
+COMPANY_PREFIXES = ["Acme", "Global", "Tech", "Prime", "Atlas", "Nexus", "Vertex", "Apex", "Core", "Nova"]
+COMPANY_SUFFIXES = ["Corp", "Inc", "Ltd", "Group", "Solutions", "Systems", "Technologies", "Industries", "Partners", "Dynamics"]
+# Every prefix x suffix combination, built once and sampled by index
+COMPANY_NAMES = np.char.add(
+    np.char.add(np.array(COMPANY_PREFIXES)[:, None], " "), np.array(COMPANY_SUFFIXES)[None, :]
+).ravel()
 
 
-def generate_customers(n: int = 500) -> pd.DataFrame:
+def generate_customers(n: int = 500, seed: int | np.random.Generator | None = None) -> pd.DataFrame:
     """Generate a customer master dataset."""
     logger.info(f"Generating {n} customers...")
-
-    customers = []
-    for i in range(1, n + 1):
-        region = random.choice(REGIONS)
-        country = random.choice(COUNTRIES[region])
-        segment = random.choice(CUSTOMER_SEGMENTS)
-        created = datetime(2020, 1, 1) + timedelta(days=random.randint(0, 1800))
-
-        customers.append({
-            "customer_id": f"CUST-{i:05d}",
-            "company_name": f"{random.choice(['Acme', 'Global', 'Tech', 'Prime', 'Atlas', 'Nexus', 'Vertex', 'Apex', 'Core', 'Nova'])} {random.choice(['Corp', 'Inc', 'Ltd', 'Group', 'Solutions', 'Systems', 'Technologies', 'Industries', 'Partners', 'Dynamics'])}",
-            "segment": segment,
-            "region": region,
-            "country": country,
-            "created_date": created.strftime("%Y-%m-%d"),
-            "is_active": random.random() > 0.1,
-        })
-
-    df = pd.DataFrame(customers)
+    rng = np.random.default_rng(seed)
+
+    # Countries live in a padded region x country table so a single
+    # fancy-index picks a valid country for every customer's region.
+    country_counts = np.array([len(COUNTRIES[r]) for r in REGIONS])
+    max_countries = country_counts.max()
+    countries_arr = np.array(
+        [COUNTRIES[r] + [""] * (max_countries - len(COUNTRIES[r])) for r in REGIONS]
+    )
+
+    region_idx = rng.integers(0, len(REGIONS), n)
+    country_idx = (rng.random(n) * country_counts[region_idx]).astype(int)
+    company_names = COMPANY_NAMES[rng.integers(0, len(COMPANY_NAMES), n)]
+    created = np.datetime64("2020-01-01") + rng.integers(0, 1801, n).astype("timedelta64[D]")
+
+    # Dates stay as Arrow date32 so DuckDB and Parquet see a native DATE
+    # column instead of formatted strings.
+    df = pd.DataFrame({
+        "customer_id": np.char.add("CUST-", np.char.zfill(np.arange(1, n + 1).astype(str), 5)),
+        "company_name": company_names,
+        "segment": np.array(CUSTOMER_SEGMENTS)[rng.integers(0, len(CUSTOMER_SEGMENTS), n)],
+        "region": np.array(REGIONS)[region_idx],
+        "country": countries_arr[region_idx, country_idx],
+        "created_date": pd.array(created, dtype="date32[pyarrow]"),
+        "is_active": rng.random(n) > 0.1,
+    })
     # Introduce ~2% nulls in company_name
-    null_mask = np.random.random(len(df)) < 0.02
+    null_mask = rng.random(len(df)) < 0.02
     df.loc[null_mask, "company_name"] = None
+    for col in ["region", "country", "segment"]:
+        df[col] = df[col].astype("category")
     return df
 
 
-def generate_products_catalog() -> pd.DataFrame:
+def generate_products_catalog(seed: int | np.random.Generator | None = None) -> pd.DataFrame:
     """Generate a flat product catalog from nested dictionaries."""
     logger.info("Generating product catalog...")
+    rng = np.random.default_rng(seed)
+
+    catalog = [
+        (category, subcat, product_name)
+        for category, subcats in SUBCATEGORIES.items()
+        for subcat in subcats
+        for product_name in PRODUCTS.get(subcat, [f"{subcat} Standard"])
+    ]
+    categories, subcategories, product_names = zip(*catalog)
+    n = len(catalog)
+
+    base_price = np.round(rng.uniform(20, 15000, n), 2)
+    df = pd.DataFrame({
+        "product_id": np.char.add("PROD-", np.char.zfill(np.arange(1, n + 1).astype(str), 4)),
+        "product_name": product_names,
+        "category": categories,
+        "subcategory": subcategories,
+        "base_price": base_price,
+        "cost": np.round(base_price * rng.uniform(0.3, 0.75, n), 2),
+        "is_active": rng.random(n) > 0.05,
+    })
+    for col in ["category", "subcategory"]:
+        df[col] = df[col].astype("category")
+    return df
+
 
-    rows = []
-    pid = 1
-    for category, subcats in SUBCATEGORIES.items():
-        for subcat in subcats:
-            product_list = PRODUCTS.get(subcat, [f"{subcat} Standard"])
-            for product_name in product_list:
-                base_price = round(random.uniform(20, 15000), 2)
-                rows.append({
-                    "product_id": f"PROD-{pid:04d}",
-                    "product_name": product_name,
-                    "category": category,
-                    "subcategory": subcat,
-                    "base_price": base_price,
-                    "cost": round(base_price * random.uniform(0.3, 0.75), 2),
-                    "is_active": random.random() > 0.05,
-                })
-                pid += 1
-    return pd.DataFrame(rows)
-
-
-def generate_sales(n: int = 10000, customers: pd.DataFrame = None, products: pd.DataFrame = None) -> pd.DataFrame:
+def generate_sales(
+    n: int = 10000,
+    customers: pd.DataFrame = None,
+    products: pd.DataFrame = None,
+    seed: int | np.random.Generator | None = None,
+) -> pd.DataFrame:
     """Generate sales transactions with realistic patterns."""
     logger.info(f"Generating {n} sales records...")
-
-    customer_ids = customers["customer_id"].tolist()
-    product_rows = products.to_dict("records")
-
-    sales = []
-    start_date = datetime(2023, 1, 1)
-    end_date = datetime(2025, 12, 31)
-    date_range_days = (end_date - start_date).days
-
-    for i in range(1, n + 1):
-        # Date with seasonal weighting (more sales in Q4)
-        day_offset = random.randint(0, date_range_days)
-        sale_date = start_date + timedelta(days=day_offset)
-        month = sale_date.month
-
-        # Seasonal multiplier: Q4 boost, Q1 dip
-        if month in (10, 11, 12):
-            seasonal = random.uniform(1.2, 1.8)
-        elif month in (1, 2):
-            seasonal = random.uniform(0.6, 0.9)
-        elif month in (6, 7):
-            seasonal = random.uniform(0.8, 1.0)
-        else:
-            seasonal = random.uniform(0.9, 1.2)
-
-        # Weekend dip
-        if sale_date.weekday() >= 5:
-            seasonal *= 0.4
-
-        product = random.choice(product_rows)
-        quantity = max(1, int(random.expovariate(0.3) * seasonal))
-        unit_price = product["base_price"] * random.uniform(0.85, 1.15)  # price variation
-        discount_pct = random.choice([0, 0, 0, 0, 5, 10, 15, 20, 25])
-        revenue = round(quantity * unit_price * (1 - discount_pct / 100), 2)
-
-        # Outlier injection (~1%)
-        if random.random() < 0.01:
-            revenue = round(revenue * random.uniform(5, 20), 2)
-            quantity = quantity * random.randint(5, 15)
-
-        sales.append({
-            "transaction_id": f"TXN-{i:06d}",
-            "transaction_date": sale_date.strftime("%Y-%m-%d"),
-            "customer_id": random.choice(customer_ids),
-            "product_id": product["product_id"],
-            "product_name": product["product_name"],
-            "category": product["category"],
-            "subcategory": product["subcategory"],
-            "region": random.choice(REGIONS),
-            "quantity": quantity,
-            "unit_price": round(unit_price, 2),
-            "discount_pct": discount_pct,
-            "revenue": revenue,
-            "cost": round(product["cost"] * quantity, 2),
-            "profit": round(revenue - product["cost"] * quantity, 2),
-            "sales_channel": random.choice(SALES_CHANNELS),
-            "payment_method": random.choice(PAYMENT_METHODS),
-            "customer_segment": random.choice(CUSTOMER_SEGMENTS),
-        })
-
-    df = pd.DataFrame(sales)
+    rng = np.random.default_rng(seed)
+
+    start_date = np.datetime64("2023-01-01")
+    end_date = np.datetime64("2025-12-31")
+    date_range_days = int((end_date - start_date).astype(int))
+
+    # Date with seasonal weighting (more sales in Q4)
+    sale_dates = start_date + rng.integers(0, date_range_days + 1, n).astype("timedelta64[D]")
+    months = sale_dates.astype("datetime64[M]").astype(int) % 12 + 1
+
+    # Seasonal multiplier: Q4 boost, Q1 dip
+    seasonal = np.select(
+        [np.isin(months, (10, 11, 12)), np.isin(months, (1, 2)), np.isin(months, (6, 7))],
+        [rng.uniform(1.2, 1.8, n), rng.uniform(0.6, 0.9, n), rng.uniform(0.8, 1.0, n)],
+        default=rng.uniform(0.9, 1.2, n),
+    )
+
+    # Weekend dip (day 0 of the epoch was a Thursday, so shift by 3 for Monday=0)
+    weekday = (sale_dates.astype(int) + 3) % 7
+    seasonal = np.where(weekday >= 5, seasonal * 0.4, seasonal)
+
+    # Product columns as contiguous arrays, fancy-indexed by one draw of product indices
+    base_prices = products["base_price"].to_numpy(float)
+    costs = products["cost"].to_numpy(float)
+    prod_idx = rng.integers(0, len(products), n)
+
+    quantity = np.maximum(1, (rng.exponential(scale=1 / 0.3, size=n) * seasonal).astype(np.int64))
+    unit_price = base_prices[prod_idx] * rng.uniform(0.85, 1.15, n)  # price variation
+    discount_pct = rng.choice(np.array([0, 0, 0, 0, 5, 10, 15, 20, 25], dtype=float), n)
+    revenue = np.round(quantity * unit_price * (1 - discount_pct / 100), 2)
+
+    # Outlier injection (~1%)
+    outliers = rng.random(n) < 0.01
+    n_outliers = int(outliers.sum())
+    revenue[outliers] = np.round(revenue[outliers] * rng.uniform(5, 20, n_outliers), 2)
+    quantity[outliers] *= rng.integers(5, 16, n_outliers)
+
+    cost = np.round(costs[prod_idx] * quantity, 2)
+    profit = np.round(revenue - cost, 2)
+
+    df = pd.DataFrame({
+        "transaction_id": np.char.add("TXN-", np.char.zfill(np.arange(1, n + 1).astype(str), 6)),
+        "transaction_date": pd.array(sale_dates, dtype="date32[pyarrow]"),
+        "customer_id": rng.choice(customers["customer_id"].to_numpy(), n),
+        "product_id": products["product_id"].to_numpy()[prod_idx],
+        "product_name": products["product_name"].to_numpy()[prod_idx],
+        "category": products["category"].to_numpy()[prod_idx],
+        "subcategory": products["subcategory"].to_numpy()[prod_idx],
+        "region": rng.choice(REGIONS, n),
+        "quantity": quantity,
+        "unit_price": np.round(unit_price, 2),
+        "discount_pct": discount_pct,
+        "revenue": revenue,
+        "cost": cost,
+        "profit": profit,
+        "sales_channel": rng.choice(SALES_CHANNELS, n),
+        "payment_method": rng.choice(PAYMENT_METHODS, n),
+        "customer_segment": rng.choice(CUSTOMER_SEGMENTS, n),
+    })
 
     # Introduce ~3% nulls scattered across some columns
     for col in ["discount_pct", "payment_method", "customer_segment"]:
-        null_mask = np.random.random(len(df)) < 0.03
+        null_mask = rng.random(len(df)) < 0.03
         df.loc[null_mask, col] = None
 
     # Introduce ~0.5% duplicate transactions
     n_dupes = int(len(df) * 0.005)
     if n_dupes > 0:
-        dupes = df.sample(n=n_dupes)
-        df = pd.concat([df, dupes], ignore_index=True)
+        dupe_idx = rng.integers(0, len(df), n_dupes)
+        df = pd.concat([df, df.iloc[dupe_idx]], ignore_index=True)
+
+    # Low-cardinality dimensions as categoricals (small int codes + dictionary)
+    for col in ["region", "category", "subcategory", "sales_channel", "payment_method", "customer_segment"]:
+        df[col] = df[col].astype("category")
 
     logger.info(f"Generated {len(df)} sales records (including {n_dupes} intentional duplicates)")
     return df
@@ -208,8 +234,13 @@ def load_into_duckdb(
     customers: pd.DataFrame,
     products: pd.DataFrame,
     db_path: str,
+    sales_parquet: str | None = None,
 ) -> None:
-    """Load all dataframes into DuckDB and create analytics views."""
+    """Load all dataframes into DuckDB and materialize the analytics rollups.
+
+    When ``sales_parquet`` points at an exported Parquet file, the sales table
+    is built with DuckDB's ``read_parquet`` instead of scanning the DataFrame.
+    """
     logger.info(f"Loading data into DuckDB at {db_path}...")
 
     # Remove existing db to start fresh
@@ -219,13 +250,17 @@ def load_into_duckdb(
     con = duckdb.connect(db_path)
 
     # Create tables
-    con.execute("CREATE TABLE sales AS SELECT * FROM sales")
-    con.execute("CREATE TABLE customers AS SELECT * FROM customers")
-    con.execute("CREATE TABLE products AS SELECT * FROM products")
-
-    # Create analytics views
+    if sales_parquet:
+        con.execute("CREATE TABLE sales AS SELECT * FROM read_parquet(?)", [sales_parquet])
+    else:
+        _bulk_load(con, "sales", sales)
+    _bulk_load(con, "customers", customers)
+    _bulk_load(con, "products", products)
+
+    # Analytics rollups are materialized as tables: the file is rebuilt from scratch on
+    # every run, so they never go stale, and readers skip the scan over sales
     con.execute("""
-        CREATE VIEW monthly_revenue AS
+        CREATE TABLE monthly_revenue AS
         SELECT
             DATE_TRUNC('month', CAST(transaction_date AS DATE)) AS month,
             category,
@@ -241,7 +276,7 @@ def load_into_duckdb(
     """)
 
     con.execute("""
-        CREATE VIEW top_products AS
+        CREATE TABLE top_products AS
         SELECT
             product_name,
             category,
@@ -257,7 +292,7 @@ def load_into_duckdb(
     """)
 
     con.execute("""
-        CREATE VIEW customer_summary AS
+        CREATE TABLE customer_summary AS
         SELECT
             s.customer_id,
             c.company_name,
@@ -276,7 +311,7 @@ def load_into_duckdb(
     """)
 
     con.execute("""
-        CREATE VIEW daily_kpis AS
+        CREATE TABLE daily_kpis AS
         SELECT
             CAST(transaction_date AS DATE) AS date,
             COUNT(*) AS transactions,
@@ -290,11 +325,13 @@ def load_into_duckdb(
     """)
 
     # Verify
-    tables = con.execute("SHOW TABLES").fetchall()
+    # Row counts come from the catalog, so no table is scanned
+    tables = con.execute(
+        "SELECT table_name, estimated_size FROM duckdb_tables() WHERE NOT internal ORDER BY table_name"
+    ).fetchall()
     logger.info(f"Tables created: {[t[0] for t in tables]}")
-    for t in tables:
-        count = con.execute(f"SELECT COUNT(*) FROM {t[0]}").fetchone()[0]
-        logger.info(f"  {t[0]}: {count} rows")
+    for name, count in tables:
+        logger.info(f"  {name}: {count} rows")
 
     views = con.execute("SELECT view_name FROM duckdb_views() WHERE NOT internal").fetchall()
     logger.info(f"Views created: {[v[0] for v in views]}")
@@ -303,36 +340,57 @@ def load_into_duckdb(
     logger.info("Database setup complete.")
 
 
-def export_csv(sales: pd.DataFrame, output_path: str) -> None:
-    """Export sales data to CSV for reference."""
-    sales.to_csv(output_path, index=False)
-    logger.info(f"Exported {len(sales)} rows to {output_path}")
+def _bulk_load(con: duckdb.DuckDBPyConnection, table_name: str, df: pd.DataFrame) -> None:
+    """Register the DataFrame explicitly and materialize it as a table in one scan.
+
+    Categorical columns are stored as VARCHAR rather than DuckDB's ENUM, so the
+    same field has the same type in every table.
+    """
+    view_name = f"{table_name}_df"
+    columns = [
+        f'CAST("{c}" AS VARCHAR) AS "{c}"' if isinstance(t, pd.CategoricalDtype) else f'"{c}"'
+        for c, t in df.dtypes.items()
+    ]
+    con.register(view_name, df)
+    con.execute(f"CREATE TABLE {table_name} AS SELECT {', '.join(columns)} FROM {view_name}")
+    con.unregister(view_name)
+
+
+def export_sales(sales: pd.DataFrame, csv_path: str, parquet_path: str) -> None:
+    """Export sales data to CSV for reference and to Parquet for fast loading."""
+    sales.to_csv(csv_path, index=False)
+    sales.to_parquet(parquet_path, compression="snappy", index=False)
+    logger.info(f"Exported {len(sales)} rows to {csv_path} and {parquet_path}")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate sample data for BI Copilot")
     parser.add_argument("--rows", type=int, default=10000, help="Number of sales records")
     parser.add_argument("--customers", type=int, default=500, help="Number of customers")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
     args = parser.parse_args()
 
     data_dir = Path(__file__).parent
     db_path = str(data_dir / "database.duckdb")
     csv_path = str(data_dir / "sales_data.csv")
+    parquet_path = str(data_dir / "sales_data.parquet")
 
-    # Generate datasets
-    customers = generate_customers(args.customers)
-    products = generate_products_catalog()
-    sales = generate_sales(args.rows, customers, products)
+    # Generate datasets from one Generator, so each step draws a different part of the stream
+    rng = np.random.default_rng(args.seed)
+    customers = generate_customers(args.customers, seed=rng)
+    products = generate_products_catalog(seed=rng)
+    sales = generate_sales(args.rows, customers, products, seed=rng)
 
-    # Export CSV
-    export_csv(sales, csv_path)
+    # Export CSV + Parquet
+    export_sales(sales, csv_path, parquet_path)
 
     # Load into DuckDB
-    load_into_duckdb(sales, customers, products, db_path)
+    load_into_duckdb(sales, customers, products, db_path, sales_parquet=parquet_path)
 
     logger.info("Sample data generation complete!")
     logger.info(f"  Database: {db_path}")
     logger.info(f"  CSV:      {csv_path}")
+    logger.info(f"  Parquet:  {parquet_path}")
     logger.info(f"  Sales:    {len(sales)} rows")
     logger.info(f"  Customers:{len(customers)} rows")
     logger.info(f"  Products: {len(products)} rows")
@@ -6,6 +6,7 @@ Uses pydantic-settings for validation and type safety.
 """
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from pydantic_settings import BaseSettings
 from pydantic import Field
@@ -26,6 +27,10 @@ class Settings(BaseSettings):
 
     # --- Database ---
     database_type: str = Field(default="duckdb", description="Database backend: duckdb or snowflake")
+    database_read_only: bool = Field(
+        default=True,
+        description="Open the DuckDB file read-only so several processes can share it",
+    )
 
     # --- Snowflake (future) ---
     snowflake_account: str = Field(default="", description="Snowflake account identifier")
@@ -38,6 +43,8 @@ class Settings(BaseSettings):
     # --- Claude AI ---
     anthropic_api_key: str = Field(default="", description="Anthropic API key")
     claude_model: str = Field(default="claude-sonnet-4-5-20250929", description="Claude model to use")
+    ai_requests_per_minute: int = Field(default=50, description="Client-side cap on Claude requests per minute (0 disables)")
+    ai_max_concurrent_requests: int = Field(default=8, description="Maximum Claude requests in flight at once")
 
     # --- MCP Server ---
     mcp_server_host: str = Field(default="localhost", description="MCP server host")
@@ -64,5 +71,15 @@ class Settings(BaseSettings):
         return str(db_path)
 
 
-# Singleton instance
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the shared Settings instance, reading the environment on first use."""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # Keep `from mcp_server.config import settings` working without
+    # parsing the environment at import time.
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
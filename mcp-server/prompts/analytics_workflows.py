@@ -5,6 +5,8 @@ Pre-configured analysis workflow prompts that guide users through
 common BI tasks step by step.
 """
 
+from collections import defaultdict
+
 WORKFLOW_PROMPTS = {
     "sales_analysis": {
         "name": "sales_analysis",
@@ -103,25 +105,17 @@ def get_prompt(workflow_name: str, arguments: dict | None = None) -> dict:
         return {"error": f"Unknown workflow: {workflow_name}. Available: {list(WORKFLOW_PROMPTS.keys())}"}
 
     workflow = WORKFLOW_PROMPTS[workflow_name]
-    template = workflow["template"]
-
     args = arguments or {}
 
-    # Apply argument substitutions
-    time_filter = f" for {args['time_period']}" if args.get("time_period") else ""
-    template = template.replace("{time_filter}", time_filter)
-
-    region_filter = f"Focus on region: {args['region']}" if args.get("region") else ""
-    template = template.replace("{region_filter}", region_filter)
-
-    segment_filter = f"Focus on segment: {args['segment']}" if args.get("segment") else ""
-    template = template.replace("{segment_filter}", segment_filter)
-
-    objective = args.get("objective", "General data exploration")
-    template = template.replace("{objective}", objective)
-
-    table_list = f" ({args['tables']})" if args.get("tables") else ""
-    template = template.replace("{table_list}", table_list)
+    # Fill every placeholder in a single pass; unused ones are simply ignored
+    subs = {
+        "time_filter": f" for {args['time_period']}" if args.get("time_period") else "",
+        "region_filter": f"Focus on region: {args['region']}" if args.get("region") else "",
+        "segment_filter": f"Focus on segment: {args['segment']}" if args.get("segment") else "",
+        "objective": args.get("objective", "General data exploration"),
+        "table_list": f" ({args['tables']})" if args.get("tables") else "",
+    }
+    template = workflow["template"].format_map(defaultdict(str, subs))
 
     return {
         "name": workflow_name,
@@ -8,19 +8,33 @@ including schema information, row counts, and sample data.
 import logging
 from typing import Any
 
+from mcp_server.utils.cache import TTLCache, connector_key
 from mcp_server.utils.db_connector import DatabaseConnector
 
 logger = logging.getLogger(__name__)
 
+_TABLE_DESCRIPTIONS = {
+    "sales": "Transaction-level sales data with revenue, product, customer, and region details",
+    "customers": "Customer master data with company name, segment, region, and status",
+    "products": "Product catalog with pricing, categories, and subcategories",
+    "monthly_revenue": "Aggregated monthly revenue by category and region",
+    "top_products": "Product performance ranking by total revenue",
+    "customer_summary": "Customer lifetime value and order history summary",
+    "daily_kpis": "Daily key performance indicators (revenue, transactions, unique customers)",
+}
+
+_row_count_cache = TTLCache(maxsize=64)
+
 
 async def list_datasets(db: DatabaseConnector) -> list[dict[str, Any]]:
     """List all available datasets (tables and views)."""
     tables = db.get_tables()
     views = db.get_views()
+    schemas = db.get_all_schemas()
 
     datasets = []
     for table in tables:
-        schema = db.get_schema(table["name"])
+        schema = schemas.get(table["name"], [])
         datasets.append({
             "uri": f"bi-copilot://datasets/{table['name']}",
             "name": table["name"],
@@ -31,12 +45,11 @@ async def list_datasets(db: DatabaseConnector) -> list[dict[str, Any]]:
         })
 
     for view_name in views:
-        schema = db.get_schema(view_name)
         datasets.append({
             "uri": f"bi-copilot://datasets/{view_name}",
             "name": view_name,
             "type": "view",
-            "columns": schema,
+            "columns": schemas.get(view_name, []),
             "description": _get_table_description(view_name),
         })
 
@@ -50,8 +63,7 @@ async def get_dataset(name: str, db: DatabaseConnector) -> dict[str, Any]:
         return {"error": f"Dataset '{name}' not found"}
 
     sample = db.get_sample(name, limit=5)
-    count_result = db.execute_query(f"SELECT COUNT(*) FROM {name}")
-    row_count = count_result["rows"][0][0] if count_result.get("rows") else 0
+    row_count = _get_row_count(name, db)
 
     return {
         "uri": f"bi-copilot://datasets/{name}",
@@ -68,16 +80,22 @@ async def get_dataset(name: str, db: DatabaseConnector) -> dict[str, Any]:
 
 def _get_table_description(name: str) -> str:
     """Return a human-readable description for known tables/views."""
-    descriptions = {
-        "sales": "Transaction-level sales data with revenue, product, customer, and region details",
-        "customers": "Customer master data with company name, segment, region, and status",
-        "products": "Product catalog with pricing, categories, and subcategories",
-        "monthly_revenue": "Aggregated monthly revenue by category and region",
-        "top_products": "Product performance ranking by total revenue",
-        "customer_summary": "Customer lifetime value and order history summary",
-        "daily_kpis": "Daily key performance indicators (revenue, transactions, unique customers)",
-    }
-    return descriptions.get(name, f"Dataset: {name}")
+    return _TABLE_DESCRIPTIONS.get(name, f"Dataset: {name}")
+
+
+def _get_row_count(name: str, db: DatabaseConnector) -> int:
+    """Return COUNT(*) for a dataset, reusing a recent result within the cache TTL."""
+    key = connector_key(db, name)
+    row_count = _row_count_cache.get(key)
+    if row_count is not None:
+        return row_count
+
+    count_result = db.execute_query(f"SELECT COUNT(*) FROM {name}")
+    if not count_result.get("rows"):
+        return 0
+    row_count = count_result["rows"][0][0]
+    _row_count_cache.set(key, row_count)
+    return row_count
 
 
 RESOURCE_DEFINITIONS = [
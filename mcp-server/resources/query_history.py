@@ -5,20 +5,43 @@ Tracks and exposes query execution history as an MCP resource.
 Stores query text, timestamps, results, and performance metrics.
 """
 
+import bisect
 import logging
 import time
 from collections import deque
+from datetime import datetime
+from itertools import islice
 from typing import Any
 
+import msgspec
+
 logger = logging.getLogger(__name__)
 
 
+class QueryRecord(msgspec.Struct):
+    """A single recorded query execution."""
+
+    id: int
+    timestamp_ms: int
+    query: str
+    query_type: str
+    generated_sql: str | None
+    result_count: int
+    execution_time_ms: float
+    success: bool
+    error: str | None
+
+
 class QueryHistory:
     """In-memory query history tracker."""
 
     def __init__(self, max_entries: int = 100):
-        self._history: deque[dict] = deque(maxlen=max_entries)
+        self._history: deque[QueryRecord] = deque(maxlen=max_entries)
         self._max_entries = max_entries
+        # Running aggregates so get_stats never rescans the deque
+        self._sum_time = 0.0
+        self._count_ok = 0
+        self._sorted_times: list[float] = []
 
     def record(
         self,
@@ -31,47 +54,71 @@ class QueryHistory:
         generated_sql: str | None = None,
     ) -> None:
         """Record a query execution."""
-        entry = {
-            "id": len(self._history) + 1,
-            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-            "query": query,
-            "query_type": query_type,
-            "generated_sql": generated_sql,
-            "result_count": result_count,
-            "execution_time_ms": execution_time_ms,
-            "success": success,
-            "error": error,
-        }
+        entry = QueryRecord(
+            id=len(self._history) + 1,
+            timestamp_ms=time.time_ns() // 1_000_000,
+            query=query,
+            query_type=query_type,
+            generated_sql=generated_sql,
+            result_count=result_count,
+            execution_time_ms=execution_time_ms,
+            success=success,
+            error=error,
+        )
+        if self._history and len(self._history) == self._max_entries:
+            self._forget(self._history[0])
         self._history.append(entry)
-        logger.info(f"Query #{entry['id']} recorded: {query_type}, {execution_time_ms}ms")
+        # With max_entries=0 the deque keeps nothing, so there is nothing to aggregate
+        if success and self._max_entries:
+            self._sum_time += execution_time_ms
+            self._count_ok += 1
+            bisect.insort(self._sorted_times, execution_time_ms)
+        logger.info(f"Query #{entry.id} recorded: {query_type}, {execution_time_ms}ms")
 
     def get_history(self, limit: int = 20) -> list[dict]:
-        """Get recent query history."""
-        entries = list(self._history)
-        entries.reverse()
-        return entries[:limit]
+        """Get recent query history.
+
+        Timestamps are stored as epoch milliseconds and only formatted here,
+        for the entries actually returned.
+        """
+        return [
+            {
+                **msgspec.structs.asdict(e),
+                "timestamp": datetime.fromtimestamp(e.timestamp_ms / 1000).isoformat(sep=" ", timespec="seconds"),
+            }
+            for e in islice(reversed(self._history), limit)
+        ]
 
     def get_stats(self) -> dict[str, Any]:
         """Get query performance statistics."""
         if not self._history:
             return {"total_queries": 0}
 
-        entries = list(self._history)
-        times = [e["execution_time_ms"] for e in entries if e["success"]]
-        errors = [e for e in entries if not e["success"]]
-
+        total = len(self._history)
+        times = self._sorted_times
         return {
-            "total_queries": len(entries),
-            "successful": len(entries) - len(errors),
-            "failed": len(errors),
-            "avg_execution_ms": round(sum(times) / len(times), 2) if times else 0,
-            "max_execution_ms": round(max(times), 2) if times else 0,
-            "min_execution_ms": round(min(times), 2) if times else 0,
+            "total_queries": total,
+            "successful": self._count_ok,
+            "failed": total - self._count_ok,
+            "avg_execution_ms": round(self._sum_time / self._count_ok, 2) if self._count_ok else 0,
+            "max_execution_ms": round(times[-1], 2) if times else 0,
+            "min_execution_ms": round(times[0], 2) if times else 0,
         }
 
     def clear(self) -> None:
         """Clear all history."""
         self._history.clear()
+        self._sum_time = 0.0
+        self._count_ok = 0
+        self._sorted_times.clear()
+
+    def _forget(self, entry: QueryRecord) -> None:
+        """Remove an entry that is about to be evicted from the running aggregates."""
+        if not entry.success:
+            return
+        self._sum_time -= entry.execution_time_ms
+        self._count_ok -= 1
+        del self._sorted_times[bisect.bisect_left(self._sorted_times, entry.execution_time_ms)]
 
 
 # Singleton instance
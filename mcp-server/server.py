@@ -13,12 +13,15 @@ Usage:
 """
 
 import asyncio
-import json
 import logging
 import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+import msgspec
+import numpy as np
+import pandas as pd
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import (
@@ -37,8 +40,8 @@ project_root = str(Path(__file__).parent.parent)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from mcp_server.config import settings
-from mcp_server.utils.db_connector import create_connector
+from mcp_server.config import get_settings
+from mcp_server.utils.db_connector import ConnectorPool, create_connector, create_pool
 from mcp_server.utils.ai_client import AIClient
 from mcp_server.tools.query_database import query_database, TOOL_DEFINITION as QUERY_TOOL
 from mcp_server.tools.analyze_data import analyze_data, TOOL_DEFINITION as ANALYZE_TOOL
@@ -48,6 +51,8 @@ from mcp_server.resources.datasets import list_datasets, get_dataset
 from mcp_server.resources.query_history import query_history
 from mcp_server.prompts.analytics_workflows import get_prompt, list_prompts
 
+settings = get_settings()
+
 # --- Logging ---
 logging.basicConfig(
     level=getattr(logging, settings.log_level.upper(), logging.INFO),
@@ -60,49 +65,128 @@ logger = logging.getLogger("bi-copilot-mcp")
 db_path = settings.resolve_database_path()
 db = create_connector()
 
+# Remote backends get a pool so concurrent tool calls don't share one session.
+# DuckDB is in-process and keeps the single shared connector.
+db_pool: ConnectorPool | None = None
+
 ai = None
 if settings.anthropic_api_key:
-    ai = AIClient(api_key=settings.anthropic_api_key, model=settings.claude_model)
+    ai = AIClient(
+        api_key=settings.anthropic_api_key,
+        model=settings.claude_model,
+        requests_per_minute=settings.ai_requests_per_minute,
+        max_concurrent_requests=settings.ai_max_concurrent_requests,
+    )
     logger.info("AI client initialized")
 else:
     logger.warning("ANTHROPIC_API_KEY not set. AI features disabled.")
 
+
+
+def _enc_hook(obj):
+    """Convert numpy/pandas values that msgspec cannot encode natively."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    return str(obj)
+
+
+_ENCODER = msgspec.json.Encoder(enc_hook=_enc_hook)
+
+
+def _to_json(obj) -> str:
+    """Serialize a tool/resource payload to a compact JSON string."""
+    return _ENCODER.encode(obj).decode()
+
+
+@asynccontextmanager
+async def _acquire_db():
+    """Yield a connector for one request: pooled for remote backends, shared for DuckDB."""
+    if db_pool is None:
+        yield db
+    else:
+        async with db_pool.acquire() as conn:
+            yield conn
+
+
 # --- MCP Server ---
 server = Server("bi-copilot")
 
 # Tool definitions
 TOOLS = [QUERY_TOOL, ANALYZE_TOOL, INSIGHTS_TOOL, ANOMALIES_TOOL]
 
+# Tools, resources and prompts are static, so the MCP objects are built once
+_TOOL_OBJS = [
+    Tool(
+        name=t["name"],
+        description=t["description"],
+        inputSchema=t["inputSchema"],
+    )
+    for t in TOOLS
+]
+
+_RESOURCE_OBJS = [
+    Resource(
+        uri="bi-copilot://datasets",
+        name="Available Datasets",
+        description="List all tables and views available for analysis",
+        mimeType="application/json",
+    ),
+    Resource(
+        uri="bi-copilot://query-history",
+        name="Query History",
+        description="Recent query execution history with performance metrics",
+        mimeType="application/json",
+    ),
+]
+
+_PROMPT_OBJS = [
+    Prompt(
+        name=p["name"],
+        description=p["description"],
+        arguments=[
+            PromptArgument(
+                name=a["name"],
+                description=a["description"],
+                required=a.get("required", False),
+            )
+            for a in p.get("arguments", [])
+        ],
+    )
+    for p in list_prompts()
+]
+
+
+# Tool name -> handler(db, arguments)
+_TOOL_DISPATCH = {
+    "query_database": lambda conn, args: query_database(db=conn, ai=ai, **args),
+    "analyze_data": lambda conn, args: analyze_data(db=conn, **args),
+    "generate_insights": lambda conn, args: generate_insights(db=conn, ai=ai, **args),
+    "detect_anomalies": lambda conn, args: detect_anomalies(db=conn, ai=ai, **args),
+}
+
 
 @server.list_tools()
 async def handle_list_tools() -> list[Tool]:
     """Return all available MCP tools."""
-    return [
-        Tool(
-            name=t["name"],
-            description=t["description"],
-            inputSchema=t["inputSchema"],
-        )
-        for t in TOOLS
-    ]
+    return _TOOL_OBJS
 
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
     """Route tool calls to the appropriate handler."""
-    logger.info(f"Tool called: {name} with args: {json.dumps(arguments, default=str)}")
+    logger.info(f"Tool called: {name} with args: {_to_json(arguments)}")
+
+    handler = _TOOL_DISPATCH.get(name)
+    if handler is None:
+        return [TextContent(type="text", text=_to_json({"error": f"Unknown tool: {name}"}))]
 
     try:
-        if name == "query_database":
-            result = await query_database(db=db, ai=ai, **arguments)
-        elif name == "analyze_data":
-            result = await analyze_data(db=db, **arguments)
-        elif name == "generate_insights":
-            result = await generate_insights(db=db, ai=ai, **arguments)
-        elif name == "detect_anomalies":
-            result = await detect_anomalies(db=db, ai=ai, **arguments)
-        else:
-            result = {"error": f"Unknown tool: {name}"}
+        async with _acquire_db() as conn:
+            result = await handler(conn, arguments)
 
         # Record in query history
         if name == "query_database":
@@ -116,7 +200,10 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
                 generated_sql=result.get("generated_sql"),
             )
 
-        return [TextContent(type="text", text=json.dumps(result, default=str, indent=2))]
+        payload = _to_json(result)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{name} result:\n{msgspec.json.format(payload, indent=2)}")
+        return [TextContent(type="text", text=payload)]
 
     except Exception as e:
         logger.error(f"Tool execution failed: {e}", exc_info=True)
@@ -126,26 +213,13 @@ async def handle_call_tool(name: str, arguments: dict) -> list[TextContent]:
             "tool": name,
             "suggestion": "Check logs for details. Ensure the database is initialized.",
         }
-        return [TextContent(type="text", text=json.dumps(error_response, indent=2))]
+        return [TextContent(type="text", text=_to_json(error_response))]
 
 
 @server.list_resources()
 async def handle_list_resources() -> list[Resource]:
     """Return all available MCP resources."""
-    return [
-        Resource(
-            uri="bi-copilot://datasets",
-            name="Available Datasets",
-            description="List all tables and views available for analysis",
-            mimeType="application/json",
-        ),
-        Resource(
-            uri="bi-copilot://query-history",
-            name="Query History",
-            description="Recent query execution history with performance metrics",
-            mimeType="application/json",
-        ),
-    ]
+    return _RESOURCE_OBJS
 
 
 @server.read_resource()
@@ -155,20 +229,22 @@ async def handle_read_resource(uri: str) -> ReadResourceResult:
     logger.info(f"Resource read: {uri_str}")
 
     if uri_str == "bi-copilot://datasets":
-        datasets = await list_datasets(db)
-        content = json.dumps(datasets, default=str, indent=2)
+        async with _acquire_db() as conn:
+            datasets = await list_datasets(conn)
+        content = _to_json(datasets)
     elif uri_str.startswith("bi-copilot://datasets/"):
         name = uri_str.split("/")[-1]
-        dataset = await get_dataset(name, db)
-        content = json.dumps(dataset, default=str, indent=2)
+        async with _acquire_db() as conn:
+            dataset = await get_dataset(name, conn)
+        content = _to_json(dataset)
     elif uri_str == "bi-copilot://query-history":
         history = {
             "history": query_history.get_history(),
             "stats": query_history.get_stats(),
         }
-        content = json.dumps(history, default=str, indent=2)
+        content = _to_json(history)
     else:
-        content = json.dumps({"error": f"Unknown resource: {uri_str}"})
+        content = _to_json({"error": f"Unknown resource: {uri_str}"})
 
     return ReadResourceResult(
         contents=[TextContent(type="text", text=content)]
@@ -178,22 +254,7 @@ async def handle_read_resource(uri: str) -> ReadResourceResult:
 @server.list_prompts()
 async def handle_list_prompts() -> list[Prompt]:
     """Return all available workflow prompts."""
-    prompts = list_prompts()
-    return [
-        Prompt(
-            name=p["name"],
-            description=p["description"],
-            arguments=[
-                PromptArgument(
-                    name=a["name"],
-                    description=a["description"],
-                    required=a.get("required", False),
-                )
-                for a in p.get("arguments", [])
-            ],
-        )
-        for p in prompts
-    ]
+    return _PROMPT_OBJS
 
 
 @server.get_prompt()
@@ -226,7 +287,11 @@ async def handle_get_prompt(name: str, arguments: dict | None = None) -> GetProm
 
 async def main():
     """Start the MCP server with stdio transport."""
+    global db_pool
     logger.info("Starting BI Copilot MCP Server...")
+    if db.get_backend_name() != "DuckDB":
+        db_pool = await create_pool(create_connector, min_size=4, max_size=16)
+        logger.info("Connection pool ready (4-16 connectors)")
     logger.info(f"Database: {db.get_backend_name()} ({db_path})")
     logger.info(f"AI enabled: {ai is not None}")
     logger.info(f"Transport: stdio")
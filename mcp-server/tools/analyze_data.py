@@ -5,22 +5,34 @@ Performs statistical analysis on a table or query result,
 generating summary statistics, distributions, and trend information.
 """
 
-import json
+import asyncio
+import copy
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import numpy as np
 import pandas as pd
 
+from mcp_server.utils.cache import TTLCache, table_fingerprint
 from mcp_server.utils.db_connector import DatabaseConnector
 
 logger = logging.getLogger(__name__)
 
+_result_cache = TTLCache(maxsize=64)
+
+# Runs the independent aggregate queries of a single analysis concurrently
+_SECTION_POOL = ThreadPoolExecutor(max_workers=6, thread_name_prefix="analyze-section")
+
+# Duplicate detection hashes every cell; above this size it is skipped
+_DUPLICATE_CHECK_MAX_CELLS = 10_000_000
+
 
 async def analyze_data(
     table_name: str,
     columns: list[str] | None = None,
     group_by: str | None = None,
+    sample_frac: float | None = None,
     db: DatabaseConnector = None,
 ) -> dict[str, Any]:
     """
@@ -30,118 +42,312 @@ async def analyze_data(
         table_name: Name of the table or view to analyze.
         columns: Specific columns to analyze (default: all numeric columns).
         group_by: Optional column to group analysis by.
+        sample_frac: Analyze a Bernoulli sample of this fraction of rows
+            (0 < sample_frac <= 1) instead of the whole table.
         db: DatabaseConnector instance.
 
     Returns:
         Dictionary with summary statistics, distributions, and data quality metrics.
     """
+    return await asyncio.to_thread(_analyze_data_sync, table_name, columns, group_by, sample_frac, db)
+
+
+def _analyze_data_sync(
+    table_name: str,
+    columns: list[str] | None,
+    group_by: str | None,
+    sample_frac: float | None,
+    db: DatabaseConnector,
+) -> dict[str, Any]:
+    """Blocking body of analyze_data, run in a worker thread."""
     if db is None:
         return {"error": "Database connector not initialized"}
+    if sample_frac is not None and not 0 < sample_frac <= 1:
+        return {"error": "sample_frac must be greater than 0 and at most 1"}
 
+    fingerprint = table_fingerprint(db, table_name)
+    cache_key = (fingerprint, tuple(columns or ()), group_by, sample_frac)
+    cached = _result_cache.get(cache_key) if fingerprint else None
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    # Column types only; every statistic below is computed in the database
     try:
-        df = db.execute_query_df(f"SELECT * FROM {table_name}")
+        schema_df = db.execute_query_df(f"SELECT * FROM {table_name} LIMIT 0")
     except Exception as e:
         return {"error": f"Failed to load table '{table_name}': {e}"}
 
-    if df.empty:
-        return {"error": f"Table '{table_name}' is empty"}
+    all_cols = schema_df.columns.tolist()
 
     # Select columns to analyze
     if columns:
-        missing = [c for c in columns if c not in df.columns]
+        missing = [c for c in columns if c not in all_cols]
         if missing:
             return {"error": f"Columns not found: {missing}"}
-        df_analyze = df[columns]
+        df_analyze = schema_df[columns]
     else:
-        df_analyze = df
+        df_analyze = schema_df
 
     numeric_cols = df_analyze.select_dtypes(include=[np.number]).columns.tolist()
     categorical_cols = df_analyze.select_dtypes(include=["object", "category"]).columns.tolist()
 
+    date_cols = [c for c in all_cols if "date" in c.lower()]
+    target_cols = []
+    if group_by and group_by in all_cols:
+        target_cols = [c for c in numeric_cols if c != group_by][:3]
+
+    # Each section is an independent aggregate query, so run them concurrently
+    source = _sampled_source(db, table_name, sample_frac)
+    submit = _SECTION_POOL.submit
+    sections = {"profile": submit(_profile, db, source, all_cols, categorical_cols)}
+    if numeric_cols:
+        sections["numeric"] = submit(_numeric_summary, db, source, numeric_cols)
+        if len(numeric_cols) > 1:
+            sections["correlations"] = submit(_top_correlations, db, source, numeric_cols)
+    if categorical_cols:
+        sections["top_values"] = submit(_top_values, db, source, categorical_cols)
+    if target_cols:
+        sections["grouped"] = submit(_grouped_summary, db, source, group_by, target_cols)
+    if date_cols and numeric_cols:
+        sections["trend"] = submit(_trend, db, source, date_cols[0], numeric_cols[0])
+
+    try:
+        profile = sections["profile"].result()
+    except Exception as e:
+        return {"error": f"Failed to load table '{table_name}': {e}"}
+
+    total_rows = profile["total_rows"]
+    if total_rows == 0:
+        return {"error": f"Table '{table_name}' is empty"}
+
     result = {
         "table": table_name,
-        "total_rows": len(df),
-        "total_columns": len(df.columns),
+        "total_rows": total_rows,
+        "total_columns": len(all_cols),
         "columns_analyzed": numeric_cols + categorical_cols,
     }
+    if sample_frac is not None:
+        result["sample_frac"] = sample_frac
 
-    # Summary statistics for numeric columns
-    if numeric_cols:
-        stats = df[numeric_cols].describe().round(2).to_dict()
-        result["numeric_summary"] = stats
-
-        # Correlation matrix (top correlations)
-        if len(numeric_cols) > 1:
-            corr = df[numeric_cols].corr().round(3)
-            top_corr = []
-            for i in range(len(corr.columns)):
-                for j in range(i + 1, len(corr.columns)):
-                    val = corr.iloc[i, j]
-                    if abs(val) > 0.3:
-                        top_corr.append({
-                            "col_a": corr.columns[i],
-                            "col_b": corr.columns[j],
-                            "correlation": float(val),
-                        })
-            top_corr.sort(key=lambda x: abs(x["correlation"]), reverse=True)
-            result["top_correlations"] = top_corr[:10]
+    # Summary statistics and top correlations for numeric columns
+    if "numeric" in sections:
+        result["numeric_summary"] = sections["numeric"].result()
+    if "correlations" in sections:
+        result["top_correlations"] = sections["correlations"].result()
 
     # Categorical column summaries
-    if categorical_cols:
-        cat_summary = {}
-        for col in categorical_cols:
-            value_counts = df[col].value_counts().head(10).to_dict()
-            cat_summary[col] = {
-                "unique_values": int(df[col].nunique()),
-                "top_values": {str(k): int(v) for k, v in value_counts.items()},
-                "null_count": int(df[col].isnull().sum()),
+    if "top_values" in sections:
+        top_values = sections["top_values"].result()
+        result["categorical_summary"] = {
+            col: {
+                "unique_values": profile["unique_values"][col],
+                "top_values": top_values[col],
+                "null_count": profile["null_counts"][col],
             }
-        result["categorical_summary"] = cat_summary
+            for col in categorical_cols
+        }
 
     # Data quality metrics
+    null_counts = profile["null_counts"]
     result["data_quality"] = {
-        "null_counts": {col: int(df[col].isnull().sum()) for col in df.columns if df[col].isnull().sum() > 0},
-        "null_percentage": round(df.isnull().sum().sum() / (len(df) * len(df.columns)) * 100, 2),
-        "duplicate_rows": int(df.duplicated().sum()),
+        "null_counts": {col: n for col, n in null_counts.items() if n > 0},
+        "null_percentage": round(sum(null_counts.values()) / (total_rows * len(all_cols)) * 100, 2),
+        "duplicate_rows": profile["duplicate_rows"],
     }
 
     # Group-by analysis
-    if group_by and group_by in df.columns and numeric_cols:
-        target_cols = [c for c in numeric_cols if c != group_by][:3]
-        if target_cols:
-            grouped = df.groupby(group_by)[target_cols].agg(["mean", "sum", "count"]).round(2)
-            grouped.columns = ["_".join(col) for col in grouped.columns]
-            result["grouped_analysis"] = {
-                "group_by": group_by,
-                "groups": grouped.head(20).to_dict(orient="index"),
-            }
+    if "grouped" in sections:
+        result["grouped_analysis"] = {
+            "group_by": group_by,
+            "groups": sections["grouped"].result(),
+        }
 
     # Trend detection for date columns
-    date_cols = [c for c in df.columns if "date" in c.lower()]
-    if date_cols and numeric_cols:
-        date_col = date_cols[0]
-        metric_col = numeric_cols[0]
-        try:
-            df[date_col] = pd.to_datetime(df[date_col])
-            monthly = df.groupby(df[date_col].dt.to_period("M"))[metric_col].sum()
-            if len(monthly) > 1:
-                values = monthly.values.astype(float)
-                trend = "increasing" if values[-1] > values[0] else "decreasing"
-                pct_change = round(((values[-1] - values[0]) / values[0]) * 100, 1) if values[0] != 0 else 0
-                result["trend"] = {
-                    "date_column": date_col,
-                    "metric": metric_col,
-                    "direction": trend,
-                    "overall_change_pct": pct_change,
-                    "periods": len(monthly),
-                }
-        except Exception:
-            pass
-
-    logger.info(f"Analysis complete for '{table_name}': {len(df)} rows, {len(numeric_cols)} numeric cols")
+    if "trend" in sections:
+        trend = sections["trend"].result()
+        if trend:
+            result["trend"] = trend
+
+    logger.info(f"Analysis complete for '{table_name}': {total_rows} rows, {len(numeric_cols)} numeric cols")
+    if fingerprint:
+        _result_cache.set(cache_key, copy.deepcopy(result))
     return result
 
 
+def _quote(column: str) -> str:
+    """Quote a column name as a SQL identifier."""
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _sampled_source(db: DatabaseConnector, table_name: str, sample_frac: float | None) -> str:
+    """FROM-clause source for the table, with a Bernoulli sample when sample_frac is set.
+
+    Each section query samples independently, so statistics from different
+    sections describe different (equally sized) random subsets.
+    """
+    if sample_frac is None:
+        return table_name
+    percent = f"{sample_frac * 100:g}"
+    if db.get_backend_name() == "DuckDB":
+        return f"{table_name} TABLESAMPLE {percent}% (bernoulli)"
+    return f"{table_name} TABLESAMPLE BERNOULLI ({percent})"
+
+
+def _round(value, digits: int = 2) -> float | None:
+    """Round a scalar from a query result, mapping SQL NULL to None."""
+    return None if pd.isna(value) else round(float(value), digits)
+
+
+def _profile(db: DatabaseConnector, table_name: str, all_cols: list[str], categorical_cols: list[str]) -> dict:
+    """Row count, per-column null counts and distinct counts in one scan, plus duplicates.
+
+    duplicate_rows is None when the table exceeds _DUPLICATE_CHECK_MAX_CELLS.
+    """
+    exprs = ["COUNT(*)"]
+    exprs += [f"COUNT({_quote(c)})" for c in all_cols]
+    exprs += [f"COUNT(DISTINCT {_quote(c)})" for c in categorical_cols]
+    row = db.execute_query_df(f"SELECT {', '.join(exprs)} FROM {table_name}").iloc[0].tolist()
+
+    total_rows = int(row[0])
+    non_null = row[1:1 + len(all_cols)]
+    distinct = row[1 + len(all_cols):]
+
+    duplicate_rows = None
+    if total_rows * len(all_cols) <= _DUPLICATE_CHECK_MAX_CELLS:
+        distinct_rows = db.execute_query_df(
+            f"SELECT COUNT(*) FROM (SELECT DISTINCT * FROM {table_name})"
+        ).iloc[0, 0]
+        duplicate_rows = total_rows - int(distinct_rows)
+
+    return {
+        "total_rows": total_rows,
+        "duplicate_rows": duplicate_rows,
+        "null_counts": {c: total_rows - int(n) for c, n in zip(all_cols, non_null)},
+        "unique_values": {c: int(n) for c, n in zip(categorical_cols, distinct)},
+    }
+
+
+def _numeric_summary(db: DatabaseConnector, table_name: str, numeric_cols: list[str]) -> dict:
+    """describe()-style statistics for numeric columns, computed in one query."""
+    stats = {
+        "count": "COUNT({c})",
+        "mean": "AVG({c})",
+        "std": "STDDEV_SAMP({c})",
+        "min": "MIN({c})",
+        "25%": "PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY {c})",
+        "50%": "PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {c})",
+        "75%": "PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY {c})",
+        "max": "MAX({c})",
+    }
+    exprs = [expr.format(c=_quote(col)) for col in numeric_cols for expr in stats.values()]
+    row = db.execute_query_df(f"SELECT {', '.join(exprs)} FROM {table_name}").iloc[0].tolist()
+
+    summary = {}
+    for i, col in enumerate(numeric_cols):
+        values = row[i * len(stats):(i + 1) * len(stats)]
+        summary[col] = {name: _round(v) for name, v in zip(stats, values)}
+    return summary
+
+
+def _correlation_matrix(db: DatabaseConnector, table_name: str, numeric_cols: list[str]) -> pd.DataFrame:
+    """Pairwise Pearson correlations computed in the database."""
+    pairs = [(i, j) for i in range(len(numeric_cols)) for j in range(i + 1, len(numeric_cols))]
+    exprs = [f"CORR({_quote(numeric_cols[i])}, {_quote(numeric_cols[j])})" for i, j in pairs]
+    row = db.execute_query_df(f"SELECT {', '.join(exprs)} FROM {table_name}").iloc[0].tolist()
+
+    arr = np.eye(len(numeric_cols))
+    for (i, j), v in zip(pairs, row):
+        arr[i, j] = arr[j, i] = np.nan if pd.isna(v) else round(float(v), 3)
+    return pd.DataFrame(arr, index=numeric_cols, columns=numeric_cols)
+
+
+def _top_correlations(db: DatabaseConnector, table_name: str, numeric_cols: list[str]) -> list[dict]:
+    """Up to 10 column pairs with |r| > 0.3, strongest first."""
+    corr = _correlation_matrix(db, table_name, numeric_cols)
+    arr = corr.to_numpy()
+    rows, cols = np.triu_indices_from(arr, k=1)
+    vals = arr[rows, cols]
+    mask = np.abs(vals) > 0.3
+    rows, cols, vals = rows[mask], cols[mask], vals[mask]
+    names = corr.columns.to_numpy()
+    order = np.argsort(-np.abs(vals), kind="stable")[:10]
+    return [
+        {"col_a": names[rows[k]], "col_b": names[cols[k]], "correlation": float(vals[k])}
+        for k in order
+    ]
+
+
+def _top_values(db: DatabaseConnector, table_name: str, categorical_cols: list[str]) -> dict[str, dict]:
+    """Top 10 values per categorical column, fetched with a single UNION ALL."""
+    parts = [
+        f"(SELECT {i} AS col_idx, CAST({_quote(col)} AS VARCHAR) AS value, COUNT(*) AS n "
+        f"FROM {table_name} WHERE {_quote(col)} IS NOT NULL "
+        f"GROUP BY 2 ORDER BY 3 DESC LIMIT 10)"
+        for i, col in enumerate(categorical_cols)
+    ]
+    df = db.execute_query_df(" UNION ALL ".join(parts))
+
+    top = {col: {} for col in categorical_cols}
+    for idx, value, n in df.sort_values(["col_idx", "n"], ascending=[True, False]).itertuples(index=False):
+        top[categorical_cols[idx]][str(value)] = int(n)
+    return top
+
+
+def _grouped_summary(db: DatabaseConnector, table_name: str, group_by: str, target_cols: list[str]) -> dict:
+    """Mean/sum/count per group for up to 20 groups, aggregated in the database."""
+    exprs = []
+    for col in target_cols:
+        c = _quote(col)
+        exprs += [f"AVG({c})", f"COALESCE(SUM({c}), 0)", f"COUNT({c})"]
+    g = _quote(group_by)
+    df = db.execute_query_df(
+        f"SELECT {g}, {', '.join(exprs)} FROM {table_name} "
+        f"WHERE {g} IS NOT NULL GROUP BY {g} ORDER BY {g} LIMIT 20"
+    )
+
+    groups = {}
+    for row in df.itertuples(index=False):
+        key, values = row[0], row[1:]
+        entry = {}
+        for i, col in enumerate(target_cols):
+            mean, total, count = values[i * 3:(i + 1) * 3]
+            entry[f"{col}_mean"] = _round(mean)
+            entry[f"{col}_sum"] = int(total) if float(total).is_integer() else _round(total)
+            entry[f"{col}_count"] = int(count)
+        groups[key] = entry
+    return groups
+
+
+def _trend(db: DatabaseConnector, table_name: str, date_col: str, metric_col: str) -> dict | None:
+    """Overall direction of the monthly metric total, or None if it can't be computed."""
+    # Snowflake's TRY_CAST only takes string input, so it gets a plain CAST there
+    cast = "TRY_CAST" if db.get_backend_name() == "DuckDB" else "CAST"
+    try:
+        monthly = db.execute_query_df(f"""
+            SELECT month, COALESCE(SUM(metric), 0) AS total FROM (
+                SELECT DATE_TRUNC('month', {cast}({_quote(date_col)} AS DATE)) AS month,
+                       {_quote(metric_col)} AS metric
+                FROM {table_name}
+            ) WHERE month IS NOT NULL
+            GROUP BY month ORDER BY month
+        """)
+    except Exception:
+        return None
+    if len(monthly) <= 1:
+        return None
+
+    values = monthly["total"].to_numpy(dtype=float)
+    trend = "increasing" if values[-1] > values[0] else "decreasing"
+    pct_change = round(((values[-1] - values[0]) / values[0]) * 100, 1) if values[0] != 0 else 0
+    return {
+        "date_column": date_col,
+        "metric": metric_col,
+        "direction": trend,
+        "overall_change_pct": pct_change,
+        "periods": len(monthly),
+    }
+
+
 TOOL_DEFINITION = {
     "name": "analyze_data",
     "description": (
@@ -165,6 +371,10 @@ TOOL_DEFINITION = {
                 "type": "string",
                 "description": "Column to group the analysis by",
             },
+            "sample_frac": {
+                "type": "number",
+                "description": "Analyze a random sample of this fraction of rows, e.g. 0.1 (default: all rows)",
+            },
         },
         "required": ["table_name"],
     },
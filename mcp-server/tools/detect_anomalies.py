@@ -5,17 +5,32 @@ Anomaly detection using statistical methods (Z-score, IQR) on time-series
 and categorical data. Optionally uses Claude for contextual explanation.
 """
 
+import asyncio
+import copy
 import logging
+import re
 from typing import Any
 
 import numpy as np
 import pandas as pd
 
+from mcp_server.utils.cache import TTLCache, table_fingerprint
 from mcp_server.utils.db_connector import DatabaseConnector
 from mcp_server.utils.ai_client import AIClient
 
 logger = logging.getLogger(__name__)
 
+_result_cache = TTLCache(maxsize=64)
+
+# Identifying columns copied into each anomaly record when the table has them
+_ID_COLUMNS = ("transaction_id", "product_name", "category", "region", "customer_id")
+
+# DuckDB and Snowflake numeric column types
+_NUMERIC_TYPE_RE = re.compile(
+    r"(?:U?(?:TINY|SMALL|BIG|HUGE)?INT|INTEGER|DECIMAL|NUMERIC|NUMBER|FLOAT|DOUBLE|REAL)\b",
+    re.IGNORECASE,
+)
+
 
 async def detect_anomalies(
     table_name: str = "sales",
@@ -43,36 +58,95 @@ async def detect_anomalies(
     Returns:
         Dictionary with detected anomalies, severity levels, and optional AI explanations.
     """
+    return await asyncio.to_thread(
+        _detect_anomalies_sync, table_name, metric_column, date_column, method, threshold, explain, db, ai
+    )
+
+
+def _detect_anomalies_sync(
+    table_name: str,
+    metric_column: str,
+    date_column: str,
+    method: str,
+    threshold: float,
+    explain: bool,
+    db: DatabaseConnector,
+    ai: AIClient | None,
+) -> dict[str, Any]:
+    """Blocking body of detect_anomalies, run in a worker thread."""
     if db is None:
         return {"error": "Database connector not initialized"}
 
-    try:
-        df = db.execute_query_df(
-            f"SELECT * FROM {table_name} ORDER BY {date_column}"
-        )
-    except Exception as e:
-        return {"error": f"Failed to load data: {e}"}
+    fingerprint = table_fingerprint(db, table_name)
+    cache_key = (fingerprint, metric_column, date_column, method, threshold, explain and ai is not None)
+    cached = _result_cache.get(cache_key) if fingerprint else None
+    if cached is not None:
+        return copy.deepcopy(cached)
+
+    result = _detect(table_name, metric_column, date_column, method, threshold, explain, db, ai)
+    if fingerprint and "error" not in result:
+        _result_cache.set(cache_key, copy.deepcopy(result))
+    return result
+
 
-    if metric_column not in df.columns:
+def _detect(
+    table_name: str,
+    metric_column: str,
+    date_column: str,
+    method: str,
+    threshold: float,
+    explain: bool,
+    db: DatabaseConnector,
+    ai: AIClient | None,
+) -> dict[str, Any]:
+    """Run anomaly detection without consulting the result cache."""
+    column_types = {c["column"]: c["type"] for c in db.get_schema(table_name)}
+    if not column_types:
+        return {"error": f"Failed to load data: table '{table_name}' not found"}
+    if metric_column not in column_types:
         return {"error": f"Column '{metric_column}' not found in '{table_name}'"}
+    if not _NUMERIC_TYPE_RE.match(column_types[metric_column]):
+        return {"error": f"Column '{metric_column}' is not numeric"}
 
-    # Convert date column
+    # Baseline statistics and detection bounds are computed in the database, and
+    # only the flagged rows are fetched
+    m = metric_column
     try:
-        df[date_column] = pd.to_datetime(df[date_column])
-    except Exception:
-        pass
-
-    metric = df[metric_column].dropna()
+        result = db.execute_query(
+            f"SELECT COUNT(*), AVG({m}), STDDEV_SAMP({m}), MEDIAN({m}), "
+            f"PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY {m}), "
+            f"PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY {m}) "
+            f"FROM {table_name}"
+        )
+        if "error" in result:
+            raise RuntimeError(result["error"])
+    except Exception as e:
+        return {"error": f"Failed to load data: {e}"}
+    total_records = int(result["rows"][0][0])
+    mean, std, median, q1, q3 = (_float(v) for v in result["rows"][0][1:])
 
-    # Detect anomalies
     if method == "zscore":
-        anomaly_mask = _zscore_detect(metric, threshold)
+        # Missing values are never anomalies; neither is anything when std is 0
+        condition = f"ABS({m} - {mean!r}) / {std!r} > {float(threshold)!r}" if std > 0 else None
     elif method == "iqr":
-        anomaly_mask = _iqr_detect(metric, threshold)
+        iqr = q3 - q1
+        lower = q1 - threshold * iqr
+        upper = q3 + threshold * iqr
+        condition = f"({m} < {lower!r} OR {m} > {upper!r})" if not np.isnan(iqr) else None
     else:
         return {"error": f"Unknown method '{method}'. Use 'zscore' or 'iqr'."}
 
-    anomaly_df = df[anomaly_mask].copy()
+    # Only the columns the report uses, not the whole row
+    id_cols = [c for c in _ID_COLUMNS if c in column_types and c not in (date_column, metric_column)]
+    select_cols = ", ".join([date_column, metric_column, *id_cols])
+    anomaly_df = pd.DataFrame()
+    if condition is not None:
+        try:
+            anomaly_df = db.execute_query_df(
+                f"SELECT {select_cols} FROM {table_name} WHERE {condition} ORDER BY {date_column}"
+            )
+        except Exception as e:
+            return {"error": f"Failed to load data: {e}"}
 
     if anomaly_df.empty:
         return {
@@ -84,10 +158,14 @@ async def detect_anomalies(
             "message": "No anomalies detected with the current threshold.",
         }
 
+    # Convert date column
+    try:
+        anomaly_df[date_column] = pd.to_datetime(anomaly_df[date_column])
+    except Exception:
+        pass
+
     # Classify severity
-    anomaly_df["severity"] = anomaly_df[metric_column].apply(
-        lambda x: _classify_severity(x, metric.mean(), metric.std())
-    )
+    anomaly_df["severity"] = _classify_severity(anomaly_df[metric_column].to_numpy(dtype=np.float64), mean, std)
 
     # Build anomaly records
     anomalies = []
@@ -96,12 +174,10 @@ async def detect_anomalies(
             "date": str(row.get(date_column, "N/A")),
             "value": float(row[metric_column]),
             "severity": row["severity"],
-            "deviation": round(
-                abs(row[metric_column] - metric.mean()) / metric.std(), 2
-            ) if metric.std() > 0 else 0,
+            "deviation": round(abs(row[metric_column] - mean) / std, 2) if std > 0 else 0,
         }
         # Include identifying columns
-        for col in ["transaction_id", "product_name", "category", "region", "customer_id"]:
+        for col in _ID_COLUMNS:
             if col in row.index:
                 record[col] = str(row[col])
         anomalies.append(record)
@@ -111,13 +187,13 @@ async def detect_anomalies(
         "metric": metric_column,
         "method": method,
         "threshold": threshold,
-        "total_records": len(df),
+        "total_records": total_records,
         "anomalies_found": len(anomaly_df),
-        "anomaly_rate_pct": round(len(anomaly_df) / len(df) * 100, 2),
+        "anomaly_rate_pct": round(len(anomaly_df) / total_records * 100, 2),
         "baseline": {
-            "mean": round(float(metric.mean()), 2),
-            "std": round(float(metric.std()), 2),
-            "median": round(float(metric.median()), 2),
+            "mean": round(mean, 2),
+            "std": round(std, 2),
+            "median": round(median, 2),
         },
         "severity_breakdown": anomaly_df["severity"].value_counts().to_dict(),
         "anomalies": anomalies,
@@ -127,7 +203,7 @@ async def detect_anomalies(
     if explain and ai is not None and anomalies:
         anomaly_summary = (
             f"Detected {len(anomaly_df)} anomalies in {metric_column} "
-            f"(mean={metric.mean():.2f}, std={metric.std():.2f}).\n"
+            f"(mean={mean:.2f}, std={std:.2f}).\n"
             f"Severity breakdown: {result['severity_breakdown']}\n"
             f"Sample anomalies: {anomalies[:5]}"
         )
@@ -142,38 +218,21 @@ async def detect_anomalies(
     return result
 
 
-def _zscore_detect(series: pd.Series, threshold: float) -> pd.Series:
-    """Detect anomalies using Z-score method."""
-    mean = series.mean()
-    std = series.std()
-    if std == 0:
-        return pd.Series([False] * len(series), index=series.index)
-    z_scores = (series - mean).abs() / std
-    return z_scores > threshold
-
-
-def _iqr_detect(series: pd.Series, threshold: float) -> pd.Series:
-    """Detect anomalies using IQR (Interquartile Range) method."""
-    q1 = series.quantile(0.25)
-    q3 = series.quantile(0.75)
-    iqr = q3 - q1
-    lower = q1 - threshold * iqr
-    upper = q3 + threshold * iqr
-    return (series < lower) | (series > upper)
-
-
-def _classify_severity(value: float, mean: float, std: float) -> str:
-    """Classify anomaly severity based on deviation from mean."""
-    if std == 0:
-        return "low"
-    deviation = abs(value - mean) / std
-    if deviation > 5:
-        return "critical"
-    if deviation > 4:
-        return "high"
-    if deviation > 3:
-        return "medium"
-    return "low"
+def _float(value) -> float:
+    """Convert a scalar from a query result to float, mapping SQL NULL to NaN."""
+    return float("nan") if value is None else float(value)
+
+
+_SEVERITY_BINS = np.array([3.0, 4.0, 5.0])
+_SEVERITY_LABELS = np.array(["low", "medium", "high", "critical"])
+
+
+def _classify_severity(values: np.ndarray, mean: float, std: float) -> np.ndarray:
+    """Classify anomaly severity based on deviation from mean (>3 medium, >4 high, >5 critical)."""
+    if not std > 0:
+        return np.full(len(values), "low", dtype=_SEVERITY_LABELS.dtype)
+    deviation = np.abs(values - mean) / std
+    return _SEVERITY_LABELS[np.digitize(deviation, _SEVERITY_BINS, right=True)]
 
 
 TOOL_DEFINITION = {
@@ -5,17 +5,26 @@ AI-powered business insight generation. Queries data, sends it to Claude
 for analysis, and returns structured business insights with recommendations.
 """
 
-import json
+import asyncio
 import logging
+import warnings
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
+from mcp_server.utils.cache import TTLCache, table_fingerprint
 from mcp_server.utils.db_connector import DatabaseConnector
 from mcp_server.utils.ai_client import AIClient
 
 logger = logging.getLogger(__name__)
 
+_summary_cache = TTLCache(maxsize=64)
+
+# The summary only needs distributions, so large tables are row-sampled;
+# counts and revenue/profit totals come from a separate aggregate query.
+_SAMPLE_ROWS = 100_000
+
 
 async def generate_insights(
     question: str,
@@ -37,27 +46,49 @@ async def generate_insights(
     Returns:
         Dictionary with AI-generated insights, key findings, and recommendations.
     """
+    return await asyncio.to_thread(_generate_insights_sync, question, table_name, time_period, db, ai)
+
+
+def _generate_insights_sync(
+    question: str,
+    table_name: str,
+    time_period: str | None,
+    db: DatabaseConnector,
+    ai: AIClient | None,
+) -> dict[str, Any]:
+    """Blocking body of generate_insights, run in a worker thread."""
     if db is None:
         return {"error": "Database connector not initialized"}
     if ai is None:
         return {"error": "AI client not initialized. Set ANTHROPIC_API_KEY."}
 
-    # Build query with optional time filter
-    where_clause = _build_time_filter(time_period)
-    sql = f"SELECT * FROM {table_name}"
-    if where_clause:
-        sql += f" WHERE {where_clause}"
-
-    try:
-        df = db.execute_query_df(sql)
-    except Exception as e:
-        return {"error": f"Failed to query '{table_name}': {e}"}
+    # The data summary only depends on the table contents and the time filter
+    fingerprint = table_fingerprint(db, table_name)
+    cache_key = (fingerprint, time_period)
+    cached = _summary_cache.get(cache_key) if fingerprint else None
+    if cached is not None:
+        data_summary, rows_analyzed = cached
+    else:
+        # Build query with optional time filter
+        where_clause = _build_time_filter(time_period)
+        where = f" WHERE {where_clause}" if where_clause else ""
+        sql = f"SELECT * FROM {table_name}{where}"
+        if db.get_backend_name() == "DuckDB":
+            sql += f" USING SAMPLE {_SAMPLE_ROWS} ROWS"
 
-    if df.empty:
-        return {"error": "No data found for the specified criteria"}
-
-    # Build data summary for AI
-    data_summary = _build_data_summary(df, table_name)
+        try:
+            df = db.execute_query_df(sql, dtype_backend="pyarrow")
+            if df.empty:
+                return {"error": "No data found for the specified criteria"}
+            totals = _query_totals(db, table_name, where, df.columns)
+        except Exception as e:
+            return {"error": f"Failed to query '{table_name}': {e}"}
+
+        # Build data summary for AI
+        data_summary = _build_data_summary(df, table_name, totals)
+        rows_analyzed = totals["rows"]
+        if fingerprint:
+            _summary_cache.set(cache_key, (data_summary, rows_analyzed))
 
     # Get AI insights
     result = ai.generate_insights(data_summary, question)
@@ -69,7 +100,7 @@ async def generate_insights(
         "question": question,
         "table": table_name,
         "time_period": time_period or "all",
-        "rows_analyzed": len(df),
+        "rows_analyzed": rows_analyzed,
         "ai_response": result.get("response", ""),
         "insights": result.get("insights"),
         "tokens_used": {
@@ -80,45 +111,71 @@ async def generate_insights(
     }
 
 
+_TIME_FILTERS = {
+    "last_7_days": "transaction_date >= CURRENT_DATE - INTERVAL '7 days'",
+    "last_30_days": "transaction_date >= CURRENT_DATE - INTERVAL '30 days'",
+    "last_90_days": "transaction_date >= CURRENT_DATE - INTERVAL '90 days'",
+    "last_quarter": "transaction_date >= DATE_TRUNC('quarter', CURRENT_DATE) - INTERVAL '3 months'",
+    "this_year": "YEAR(CAST(transaction_date AS DATE)) = YEAR(CURRENT_DATE)",
+    "2023": "YEAR(CAST(transaction_date AS DATE)) = 2023",
+    "2024": "YEAR(CAST(transaction_date AS DATE)) = 2024",
+    "2025": "YEAR(CAST(transaction_date AS DATE)) = 2025",
+}
+
+
 def _build_time_filter(time_period: str | None) -> str:
     """Build a SQL WHERE clause for time filtering."""
-    if not time_period:
-        return ""
-
-    filters = {
-        "last_7_days": "transaction_date >= CURRENT_DATE - INTERVAL '7 days'",
-        "last_30_days": "transaction_date >= CURRENT_DATE - INTERVAL '30 days'",
-        "last_90_days": "transaction_date >= CURRENT_DATE - INTERVAL '90 days'",
-        "last_quarter": "transaction_date >= DATE_TRUNC('quarter', CURRENT_DATE) - INTERVAL '3 months'",
-        "this_year": "YEAR(CAST(transaction_date AS DATE)) = YEAR(CURRENT_DATE)",
-        "2023": "YEAR(CAST(transaction_date AS DATE)) = 2023",
-        "2024": "YEAR(CAST(transaction_date AS DATE)) = 2024",
-        "2025": "YEAR(CAST(transaction_date AS DATE)) = 2025",
-    }
-    return filters.get(time_period, "")
+    return _TIME_FILTERS.get(time_period, "") if time_period else ""
 
 
-def _build_data_summary(df: pd.DataFrame, table_name: str) -> str:
-    """Build a concise data summary for the AI prompt."""
+def _query_totals(
+    db: DatabaseConnector, table_name: str, where: str, columns: pd.Index
+) -> dict[str, Any]:
+    """Exact row count and revenue/profit sums, unaffected by sampling."""
+    sums = [c for c in ("revenue", "profit") if c in columns]
+    select = ", ".join(["COUNT(*)"] + [f"SUM({c})" for c in sums])
+    result = db.execute_query(f"SELECT {select} FROM {table_name}{where}")
+    if result.get("error"):
+        raise RuntimeError(result["error"])
+    row = result["rows"][0]
+    totals = {"rows": int(row[0])}
+    for col, value in zip(sums, row[1:]):
+        totals[col] = float(value or 0)
+    return totals
+
+
+def _build_data_summary(
+    df: pd.DataFrame, table_name: str, totals: dict[str, Any] | None = None
+) -> str:
+    """Build a concise data summary for the AI prompt.
+
+    df may be a sample of the table; pass totals from _query_totals to report
+    exact record counts and revenue/profit sums.
+    """
+    totals = totals or {}
     lines = [
         f"Dataset: {table_name}",
-        f"Total records: {len(df)}",
+        f"Total records: {totals.get('rows', len(df))}",
         f"Columns: {', '.join(df.columns.tolist())}",
         "",
     ]
 
-    # Numeric summaries
-    numeric_cols = df.select_dtypes(include=["number"]).columns
+    # Numeric summaries, computed column-wise over one float block
+    numeric_cols = df.select_dtypes(include=["number"]).columns[:8]
     if len(numeric_cols) > 0:
-        lines.append("Numeric Summary:")
-        for col in numeric_cols[:8]:
-            lines.append(
-                f"  {col}: min={df[col].min():.2f}, max={df[col].max():.2f}, "
-                f"mean={df[col].mean():.2f}, median={df[col].median():.2f}"
+        block = df[numeric_cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns
+            stats = zip(
+                np.nanmin(block, axis=0), np.nanmax(block, axis=0),
+                np.nanmean(block, axis=0), np.nanmedian(block, axis=0),
             )
+        lines.append("Numeric Summary:")
+        for col, (lo, hi, mean, median) in zip(numeric_cols, stats):
+            lines.append(f"  {col}: min={lo:.2f}, max={hi:.2f}, mean={mean:.2f}, median={median:.2f}")
 
     # Categorical breakdowns
-    cat_cols = df.select_dtypes(include=["object"]).columns
+    cat_cols = df.select_dtypes(include=["object", "string"]).columns
     for col in cat_cols[:5]:
         top = df[col].value_counts().head(5).to_dict()
         lines.append(f"\n{col} distribution: {top}")
@@ -126,19 +183,24 @@ def _build_data_summary(df: pd.DataFrame, table_name: str) -> str:
     # Date range
     date_cols = [c for c in df.columns if "date" in c.lower()]
     if date_cols:
-        col = date_cols[0]
+        dates = df[date_cols[0]]
         try:
-            dates = pd.to_datetime(df[col])
-            lines.append(f"\nDate range: {dates.min()} to {dates.max()}")
+            # Native date/timestamp columns need no parsing; reduce first, then convert
+            if not pd.api.types.is_datetime64_any_dtype(dates.dtype):
+                dates = pd.to_datetime(dates)
+            lines.append(f"\nDate range: {pd.Timestamp(dates.min())} to {pd.Timestamp(dates.max())}")
         except Exception:
             pass
 
     # Revenue/profit totals if available
+    revenue = None
     if "revenue" in df.columns:
-        lines.append(f"\nTotal Revenue: ${df['revenue'].sum():,.2f}")
+        revenue = totals.get("revenue", float(df["revenue"].sum()))
+        lines.append(f"\nTotal Revenue: ${revenue:,.2f}")
     if "profit" in df.columns:
-        lines.append(f"Total Profit: ${df['profit'].sum():,.2f}")
-        margin = (df["profit"].sum() / df["revenue"].sum() * 100) if df["revenue"].sum() > 0 else 0
+        profit = totals.get("profit", float(df["profit"].sum()))
+        lines.append(f"Total Profit: ${profit:,.2f}")
+        margin = (profit / revenue * 100) if revenue and revenue > 0 else 0
         lines.append(f"Profit Margin: {margin:.1f}%")
 
     return "\n".join(lines)
@@ -5,8 +5,10 @@ Executes SQL or natural language queries against the data warehouse.
 Supports both raw SQL and natural-language-to-SQL conversion via Claude.
 """
 
-import json
+import asyncio
 import logging
+import re
+from operator import itemgetter
 from typing import Any
 
 from mcp_server.utils.db_connector import DatabaseConnector
@@ -14,11 +16,24 @@ from mcp_server.utils.ai_client import AIClient
 
 logger = logging.getLogger(__name__)
 
+_SQL_KEYWORDS = frozenset(
+    {"SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER", "WITH", "SHOW", "DESCRIBE"}
+)
+
+# First word of the input; keywords are short, so at most 16 characters are read
+_FIRST_WORD_RE = re.compile(r"\s*(\S{1,16})")
+
+_COLUMN_AND_TYPE = itemgetter("column", "type")
+
+# A trailing top-level LIMIT clause, matched against the end of the statement only
+_LIMIT_RE = re.compile(r"\blimit\s+\d+(?:\s+offset\s+\d+)?$", re.IGNORECASE)
+
 
 async def query_database(
     query: str,
     query_type: str = "auto",
     limit: int = 100,
+    columnar: bool = False,
     db: DatabaseConnector = None,
     ai: AIClient = None,
 ) -> dict[str, Any]:
@@ -29,6 +44,7 @@ async def query_database(
         query: SQL query string or natural language question.
         query_type: "sql", "natural_language", or "auto" (detect automatically).
         limit: Maximum rows to return (default 100).
+        columnar: Return column-major "data" ({column: values}) instead of "rows".
         db: DatabaseConnector instance.
         ai: AIClient instance (required for natural language queries).
 
@@ -36,6 +52,18 @@ async def query_database(
         Dictionary with columns, rows, row_count, execution_time, and optionally
         the generated SQL if the input was natural language.
     """
+    return await asyncio.to_thread(_query_database_sync, query, query_type, limit, columnar, db, ai)
+
+
+def _query_database_sync(
+    query: str,
+    query_type: str,
+    limit: int,
+    columnar: bool,
+    db: DatabaseConnector,
+    ai: AIClient | None,
+) -> dict[str, Any]:
+    """Blocking body of query_database, run in a worker thread."""
     if db is None:
         return {"error": "Database connector not initialized"}
 
@@ -62,20 +90,18 @@ async def query_database(
         generated_sql = sql
         logger.info(f"Generated SQL: {sql}")
 
-    # Apply limit if not already present
-    sql_upper = sql.strip().upper()
-    if "LIMIT" not in sql_upper and sql_upper.startswith("SELECT"):
-        sql = f"{sql.rstrip(';')} LIMIT {limit}"
+    sql = apply_limit(sql, limit)
 
     # Execute
-    result = db.execute_query(sql)
+    result = db.execute_query(sql, columnar=columnar)
 
     if "error" in result:
         return result
 
+    payload_key = "data" if columnar else "rows"
     response = {
         "columns": result["columns"],
-        "rows": result["rows"],
+        payload_key: result[payload_key],
         "row_count": result["row_count"],
         "execution_time_ms": result["execution_time_ms"],
     }
@@ -89,32 +115,50 @@ async def query_database(
 
 def _detect_query_type(query: str) -> str:
     """Heuristic to detect if input is SQL or natural language."""
-    sql_keywords = {"SELECT", "INSERT", "UPDATE", "DELETE", "CREATE", "DROP", "ALTER", "WITH", "SHOW", "DESCRIBE"}
-    first_word = query.strip().split()[0].upper() if query.strip() else ""
-    if first_word in sql_keywords:
+    match = _FIRST_WORD_RE.match(query)
+    if match and match.group(1).upper() in _SQL_KEYWORDS:
         return "sql"
     return "natural_language"
 
 
+def apply_limit(sql: str, limit: int) -> str:
+    """Append LIMIT to a query that returns rows and does not already end in one."""
+    if _needs_limit(sql):
+        return f"{sql.rstrip().rstrip(';')} LIMIT {limit}"
+    return sql
+
+
+def _needs_limit(sql: str) -> bool:
+    """True for a SELECT (or WITH ... SELECT) that does not already end in a LIMIT clause."""
+    match = _FIRST_WORD_RE.match(sql)
+    if not match or match.group(1).upper() not in ("SELECT", "WITH"):
+        return False
+    tail = sql.rstrip(" ;\n\t")[-64:]
+    return _LIMIT_RE.search(tail) is None
+
+
 def _get_schema_info(db: DatabaseConnector) -> str:
     """Build a schema description string for the AI."""
     tables = db.get_tables()
     views = db.get_views()
+    schemas = db.get_all_schemas()
     lines = ["Available tables and views:\n"]
 
     for table in tables:
-        schema = db.get_schema(table["name"])
-        cols = ", ".join([f'{c["column"]} ({c["type"]})' for c in schema])
+        cols = _format_columns(schemas.get(table["name"], []))
         lines.append(f"TABLE {table['name']} ({table['row_count']} rows): {cols}")
 
     for view_name in views:
-        schema = db.get_schema(view_name)
-        cols = ", ".join([f'{c["column"]} ({c["type"]})' for c in schema])
-        lines.append(f"VIEW {view_name}: {cols}")
+        lines.append(f"VIEW {view_name}: {_format_columns(schemas.get(view_name, []))}")
 
     return "\n".join(lines)
 
 
+def _format_columns(schema: list[dict]) -> str:
+    """Render a table's columns as 'col (TYPE), ...'."""
+    return ", ".join(f"{col} ({typ})" for col, typ in map(_COLUMN_AND_TYPE, schema))
+
+
 # Tool metadata for MCP registration
 TOOL_DEFINITION = {
     "name": "query_database",
@@ -141,6 +185,11 @@ TOOL_DEFINITION = {
                 "description": "Maximum rows to return (default: 100)",
                 "default": 100,
             },
+            "columnar": {
+                "type": "boolean",
+                "description": "Return results column-major as {column: values} under 'data' instead of 'rows'",
+                "default": False,
+            },
         },
         "required": ["query"],
     },
@@ -5,33 +5,99 @@ Handles Anthropic API integration with prompt templates,
 response parsing, error handling, and token tracking.
 """
 
-import json
+import hashlib
 import logging
+import random
+import re
+import threading
 import time
+from collections import OrderedDict
+from collections.abc import Iterator
 from typing import Any
 
+import msgspec
 from anthropic import Anthropic, APIError, RateLimitError
 
 logger = logging.getLogger(__name__)
 
+MAX_RETRIES = 3
+
+# A response wrapped in a markdown code fence; the closing fence is optional
+_FENCE_RE = re.compile(r"^```[\w-]*[ \t]*\n(.*?)(?:\n?```)?\s*$", re.DOTALL)
+
+# Generated SQL kept per (model, system prompt, prompt); oldest entries are evicted
+SQL_CACHE_SIZE = 512
+
+# Backoff when the API does not send retry-after: 2s, 4s, 8s... capped, with jitter
+_BACKOFF_BASE_SECONDS = 2.0
+_BACKOFF_CAP_SECONDS = 60.0
+
+
+class RequestBucket:
+    """Thread-safe token bucket that spaces requests to a per-minute budget."""
+
+    def __init__(self, requests_per_minute: int):
+        self._rate = requests_per_minute / 60.0
+        self._capacity = float(requests_per_minute)
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+
 
 class AIClient:
-    """Client for Claude API interactions."""
+    """
+    Client for Claude API interactions.
 
-    def __init__(self, api_key: str, model: str = "claude-sonnet-4-5-20250929"):
+    One instance is shared by all tool calls; its underlying HTTP client keeps
+    connections alive across requests. Calls are blocking and may be made from
+    several worker threads at once, up to ``max_concurrent_requests`` in flight.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-sonnet-4-5-20250929",
+        requests_per_minute: int = 0,
+        max_concurrent_requests: int = 8,
+    ):
         self.client = Anthropic(api_key=api_key)
         self.model = model
+        # Optional client-side throttle shared by every call on this client
+        self._bucket = RequestBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._in_flight = threading.BoundedSemaphore(max_concurrent_requests)
+        self._sql_cache: OrderedDict[str, dict] = OrderedDict()
+        self._sql_cache_lock = threading.Lock()
         self.total_input_tokens = 0
+        self.total_cache_read_tokens = 0
         self.total_output_tokens = 0
         self.request_count = 0
         logger.info(f"AIClient initialized with model: {model}")
 
     def analyze(
-        self, prompt: str, system: str = "", max_tokens: int = 4096, _retries: int = 0
+        self, prompt: str | list[dict], system: str = "", max_tokens: int = 4096
     ) -> dict[str, Any]:
         """
         Send an analysis request to Claude and return structured results.
 
+        prompt is either plain text or a list of content blocks, e.g. to mark
+        a reusable prefix with cache_control.
+
+        Rate-limited requests are retried up to MAX_RETRIES times, waiting for
+        the API's retry-after hint when given and jittered backoff otherwise.
+
         Returns:
             {
                 "response": str,
@@ -40,84 +106,261 @@ class AIClient:
                 "latency_ms": float
             }
         """
-        MAX_RETRIES = 3
-        start = time.time()
-        try:
-            messages = [{"role": "user", "content": prompt}]
-            kwargs = {
-                "model": self.model,
-                "max_tokens": max_tokens,
-                "messages": messages,
-            }
-            if system:
-                kwargs["system"] = system
-
-            response = self.client.messages.create(**kwargs)
-
-            elapsed = round((time.time() - start) * 1000, 2)
-            input_tokens = response.usage.input_tokens
-            output_tokens = response.usage.output_tokens
-
-            self.total_input_tokens += input_tokens
-            self.total_output_tokens += output_tokens
-            self.request_count += 1
-
-            text = response.content[0].text
-            logger.info(
-                f"AI response received in {elapsed}ms "
-                f"(tokens: {input_tokens} in / {output_tokens} out)"
-            )
-
-            return {
-                "response": text,
-                "input_tokens": input_tokens,
-                "output_tokens": output_tokens,
-                "latency_ms": elapsed,
-            }
+        start = time.perf_counter_ns()
+        messages = [{"role": "user", "content": prompt}]
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "messages": messages,
+        }
+        if system:
+            # System prompts are fixed per method, so mark them for prompt caching
+            kwargs["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                if self._bucket is not None:
+                    self._bucket.acquire()
+                with self._in_flight:
+                    response = self.client.messages.create(**kwargs)
+                break
 
-        except RateLimitError as e:
-            elapsed = round((time.time() - start) * 1000, 2)
-            if _retries >= MAX_RETRIES:
-                logger.error(f"Rate limited {MAX_RETRIES} times, giving up.")
+            except RateLimitError as e:
+                if attempt == MAX_RETRIES:
+                    elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
+                    logger.error(f"Rate limited {MAX_RETRIES} times, giving up.")
+                    return {
+                        "error": f"Rate limited after {MAX_RETRIES} retries: {e}",
+                        "type": "RateLimitError",
+                        "latency_ms": elapsed,
+                    }
+                wait = _retry_delay(e, attempt)
+                logger.warning(f"Rate limited (attempt {attempt + 1}/{MAX_RETRIES}). Retrying in {wait:.1f}s...")
+                time.sleep(wait)
+
+            except APIError as e:
+                elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
+                logger.error(f"API error after {elapsed}ms: {e}")
                 return {
-                    "error": f"Rate limited after {MAX_RETRIES} retries: {e}",
-                    "type": "RateLimitError",
+                    "error": str(e),
+                    "type": "APIError",
                     "latency_ms": elapsed,
                 }
-            wait = 30 * (2 ** _retries)  # 30s, 60s, 120s backoff
-            logger.warning(f"Rate limited (attempt {_retries + 1}/{MAX_RETRIES}). Retrying in {wait}s...")
-            time.sleep(wait)
-            return self.analyze(prompt, system, max_tokens, _retries=_retries + 1)
-
-        except APIError as e:
-            elapsed = round((time.time() - start) * 1000, 2)
-            logger.error(f"API error after {elapsed}ms: {e}")
-            return {
-                "error": str(e),
-                "type": "APIError",
-                "latency_ms": elapsed,
-            }
+
+        elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
+        input_tokens = response.usage.input_tokens
+        output_tokens = response.usage.output_tokens
+        cache_read_tokens = getattr(response.usage, "cache_read_input_tokens", None) or 0
+
+        self.total_input_tokens += input_tokens
+        self.total_output_tokens += output_tokens
+        self.total_cache_read_tokens += cache_read_tokens
+        self.request_count += 1
+
+        text = response.content[0].text
+        logger.info(
+            f"AI response received in {elapsed}ms "
+            f"(tokens: {input_tokens} in / {cache_read_tokens} cached / {output_tokens} out)"
+        )
+
+        return {
+            "response": text,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_read_input_tokens": cache_read_tokens,
+            "latency_ms": elapsed,
+        }
 
     def generate_sql(self, natural_language: str, schema_info: str) -> dict[str, Any]:
         """Convert natural language to SQL using Claude."""
-        system = (
-            "You are a SQL expert. Convert the user's natural language question into a "
-            "DuckDB-compatible SQL query. Return ONLY the SQL query, no explanation. "
-            "Use the schema information provided to write accurate queries."
-        )
-        prompt = f"Schema:\n{schema_info}\n\nQuestion: {natural_language}"
-        result = self.analyze(prompt, system=system, max_tokens=1024)
+        key = self._sql_cache_key(natural_language, schema_info)
+        cached = self._cached_sql(key)
+        if cached is not None:
+            return cached
+
+        content = _sql_prompt(natural_language, schema_info)
+        result = self.analyze(content, system=_SQL_SYSTEM_PROMPT, max_tokens=1024)
 
         if "error" not in result:
-            sql = result["response"].strip()
-            # Strip markdown code fences if present
-            if sql.startswith("```"):
-                lines = sql.split("\n")
-                sql = "\n".join(lines[1:-1])
-            result["sql"] = sql
+            self._store_sql(key, result)
 
         return result
 
+    def generate_sql_stream(self, natural_language: str, schema_info: str) -> Iterator[str]:
+        """
+        Like generate_sql, but yield the response text as it is generated.
+
+        Lets a UI show the SQL while Claude is still writing it. The finished
+        translation is cached, so a following generate_sql call with the same
+        arguments returns it (with the extracted "sql") without another
+        request. API errors other than retried rate limits are raised.
+        """
+        key = self._sql_cache_key(natural_language, schema_info)
+        cached = self._cached_sql(key)
+        if cached is not None:
+            yield cached["response"]
+            return
+
+        start = time.perf_counter_ns()
+        kwargs = {
+            "model": self.model,
+            "max_tokens": 1024,
+            "system": [{"type": "text", "text": _SQL_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content": _sql_prompt(natural_language, schema_info)}],
+        }
+        parts: list[str] = []
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                if self._bucket is not None:
+                    self._bucket.acquire()
+                with self._in_flight, self.client.messages.stream(**kwargs) as stream:
+                    for text in stream.text_stream:
+                        parts.append(text)
+                        yield text
+                    message = stream.get_final_message()
+                break
+            except RateLimitError as e:
+                # Only retry before any text has been handed to the caller
+                if attempt == MAX_RETRIES or parts:
+                    raise
+                wait = _retry_delay(e, attempt)
+                logger.warning(f"Rate limited (attempt {attempt + 1}/{MAX_RETRIES}). Retrying in {wait:.1f}s...")
+                time.sleep(wait)
+
+        elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
+        usage = message.usage
+        cache_read_tokens = getattr(usage, "cache_read_input_tokens", None) or 0
+        self.total_input_tokens += usage.input_tokens
+        self.total_output_tokens += usage.output_tokens
+        self.total_cache_read_tokens += cache_read_tokens
+        self.request_count += 1
+        logger.info(
+            f"AI stream completed in {elapsed}ms "
+            f"(tokens: {usage.input_tokens} in / {cache_read_tokens} cached / {usage.output_tokens} out)"
+        )
+
+        self._store_sql(key, {
+            "response": "".join(parts),
+            "input_tokens": usage.input_tokens,
+            "output_tokens": usage.output_tokens,
+            "cache_read_input_tokens": cache_read_tokens,
+            "latency_ms": elapsed,
+        })
+
+    def generate_sql_batch(
+        self,
+        questions: list[str],
+        schema_info: str,
+        poll_interval: float = 5.0,
+        timeout: float = 3600.0,
+    ) -> list[dict[str, Any]]:
+        """
+        Convert many questions to SQL through the Message Batches API.
+
+        Batches are billed at a discount but finish in minutes rather than
+        seconds, so this is meant for offline work such as refreshing a set of
+        dashboard questions; interactive callers should use generate_sql.
+        Results come back in the order of ``questions`` and share
+        generate_sql's cache, so only uncached questions are submitted.
+        """
+        keys = [self._sql_cache_key(q, schema_info) for q in questions]
+        results: list[dict[str, Any] | None] = [self._cached_sql(key) for key in keys]
+        pending = [i for i, r in enumerate(results) if r is None]
+        if not pending:
+            return results
+
+        start = time.perf_counter_ns()
+        system = [{"type": "text", "text": _SQL_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}]
+        requests = [
+            {
+                "custom_id": str(i),
+                "params": {
+                    "model": self.model,
+                    "max_tokens": 1024,
+                    "system": system,
+                    "messages": [{"role": "user", "content": _sql_prompt(questions[i], schema_info)}],
+                },
+            }
+            for i in pending
+        ]
+        try:
+            batch = self.client.messages.batches.create(requests=requests)
+            logger.info(f"Submitted SQL batch {batch.id} with {len(requests)} questions")
+
+            deadline = time.monotonic() + timeout
+            wait = poll_interval
+            while batch.processing_status != "ended":
+                if time.monotonic() + wait > deadline:
+                    self.client.messages.batches.cancel(batch.id)
+                    raise TimeoutError(f"Batch {batch.id} did not finish within {timeout}s")
+                time.sleep(wait)
+                wait = min(wait * 2, _BACKOFF_CAP_SECONDS)
+                batch = self.client.messages.batches.retrieve(batch.id)
+
+            for entry in self.client.messages.batches.results(batch.id):
+                i = int(entry.custom_id)
+                if entry.result.type != "succeeded":
+                    results[i] = {"error": f"Batch request {entry.result.type}", "type": "BatchError"}
+                    continue
+                message = entry.result.message
+                self.total_input_tokens += message.usage.input_tokens
+                self.total_output_tokens += message.usage.output_tokens
+                self.request_count += 1
+                result = {
+                    "response": message.content[0].text,
+                    "input_tokens": message.usage.input_tokens,
+                    "output_tokens": message.usage.output_tokens,
+                    "latency_ms": (time.perf_counter_ns() - start) // 10_000 / 100,
+                }
+                self._store_sql(keys[i], result)
+                results[i] = result
+
+        except (APIError, TimeoutError) as e:
+            logger.error(f"SQL batch failed: {e}")
+            for i in pending:
+                if results[i] is None:
+                    results[i] = {"error": str(e), "type": type(e).__name__}
+
+        for i in pending:
+            if results[i] is None:
+                results[i] = {"error": "No result returned for this question", "type": "BatchError"}
+        return results
+
+    def _sql_cache_key(self, natural_language: str, schema_info: str) -> str:
+        # The schema is part of the key, so schema changes miss the cache naturally.
+        # Whitespace in the question is normalized; case is kept since it can
+        # matter inside string literals.
+        question = " ".join(natural_language.split())
+        text = f"{self.model}\0{_SQL_SYSTEM_PROMPT}\0{schema_info}\0{question}"
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def _cached_sql(self, key: str) -> dict[str, Any] | None:
+        """Return a copy of a cached translation marked as cached, or None."""
+        with self._sql_cache_lock:
+            cached = self._sql_cache.get(key)
+            if cached is None:
+                return None
+            self._sql_cache.move_to_end(key)
+        return {
+            **cached,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_input_tokens": 0,
+            "latency_ms": 0,
+            "cached": True,
+        }
+
+    def _store_sql(self, key: str, result: dict[str, Any]) -> None:
+        """Extract the SQL from a successful response and cache the result."""
+        sql = result["response"].strip()
+        # Strip markdown code fences if present
+        fenced = _FENCE_RE.match(sql)
+        result["sql"] = fenced.group(1) if fenced else sql
+        with self._sql_cache_lock:
+            self._sql_cache[key] = dict(result)
+            if len(self._sql_cache) > SQL_CACHE_SIZE:
+                self._sql_cache.popitem(last=False)
+
     def generate_insights(self, data_summary: str, question: str = "") -> dict[str, Any]:
         """Generate business insights from data."""
         system = (
@@ -155,29 +398,70 @@ class AIClient:
 
         return result
 
+    def invalidate_cache(self) -> None:
+        """Drop all cached natural-language-to-SQL translations."""
+        with self._sql_cache_lock:
+            self._sql_cache.clear()
+
     def get_usage_stats(self) -> dict:
         """Return cumulative API usage statistics."""
         return {
             "total_requests": self.request_count,
             "total_input_tokens": self.total_input_tokens,
+            "total_cache_read_tokens": self.total_cache_read_tokens,
             "total_output_tokens": self.total_output_tokens,
             "total_tokens": self.total_input_tokens + self.total_output_tokens,
         }
 
 
+_SQL_SYSTEM_PROMPT = (
+    "You are a SQL expert. Convert the user's natural language question into a "
+    "DuckDB-compatible SQL query. Return ONLY the SQL query, no explanation. "
+    "Use the schema information provided to write accurate queries."
+)
+
+
+def _sql_prompt(natural_language: str, schema_info: str) -> list[dict]:
+    """User content for a SQL request.
+
+    System prompt + schema form a stable prefix that the API can cache across
+    questions; only the question block changes per request.
+    """
+    return [
+        {"type": "text", "text": f"Schema:\n{schema_info}", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": f"Question: {natural_language}"},
+    ]
+
+
+def _retry_delay(error: RateLimitError, attempt: int) -> float:
+    """Seconds to wait before retrying: the API's retry-after if present, else jittered backoff."""
+    response = getattr(error, "response", None)
+    header = response.headers.get("retry-after") if response is not None else None
+    if header is not None:
+        try:
+            return max(float(header), 0.0)
+        except ValueError:
+            pass
+    backoff = min(_BACKOFF_CAP_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt)
+    return backoff / 2 + random.uniform(0, backoff / 2)
+
+
 def _parse_json_response(text: str) -> dict | None:
     """Extract JSON from a Claude response that may contain markdown."""
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        # Try to extract JSON from markdown code blocks
-        if "```" in text:
-            start = text.find("{")
-            end = text.rfind("}") + 1
-            if start != -1 and end > start:
-                try:
-                    return json.loads(text[start:end])
-                except json.JSONDecodeError:
-                    pass
-        logger.warning("Could not parse JSON from AI response")
-        return None
+    # Fenced responses can't be bare JSON, so skip the first parse for them
+    if not text.lstrip().startswith("```"):
+        try:
+            return msgspec.json.decode(text)
+        except msgspec.DecodeError:
+            pass
+    # Try to extract JSON from markdown code blocks
+    if "```" in text:
+        start = text.find("{")
+        end = text.rfind("}") + 1
+        if start != -1 and end > start:
+            try:
+                return msgspec.json.decode(text[start:end])
+            except msgspec.DecodeError:
+                pass
+    logger.warning("Could not parse JSON from AI response")
+    return None
@@ -0,0 +1,83 @@
+"""
+Result Cache
+=============
+Small in-process TTL cache shared by the tools and resources.
+
+Entries expire after ``cache_ttl_seconds`` and the cache is bypassed entirely
+when ``enable_query_cache`` is off. Keys built with ``table_fingerprint``
+include the table's row count, so appends invalidate cached results without
+waiting for the TTL. Tools share it from worker threads, so reads and writes
+are serialized by a lock.
+"""
+
+import threading
+import time
+from typing import Any, Hashable
+
+from mcp_server.config import get_settings
+from mcp_server.utils.db_connector import BaseDatabaseConnector
+
+
+class TTLCache:
+    """Dict-backed cache whose entries expire after a fixed number of seconds."""
+
+    def __init__(self, maxsize: int = 128, ttl_seconds: float | None = None):
+        self._maxsize = maxsize
+        self._ttl_seconds = ttl_seconds
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ttl_seconds(self) -> float:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return get_settings().cache_ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        if not get_settings().enable_query_cache:
+            return default
+        ttl_seconds = self.ttl_seconds
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            stored_at, value = entry
+            if time.monotonic() - stored_at >= ttl_seconds:
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the oldest entry when the cache is full."""
+        if not get_settings().enable_query_cache:
+            return
+        with self._lock:
+            if key not in self._data and len(self._data) >= self._maxsize:
+                del self._data[next(iter(self._data))]
+            self._data[key] = (time.monotonic(), value)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def connector_key(db: BaseDatabaseConnector, *parts: Hashable) -> tuple:
+    """Build a cache key scoped to a specific database connection target."""
+    return (db.get_backend_name(), getattr(db, "db_path", None), *parts)
+
+
+def table_fingerprint(db: BaseDatabaseConnector, table_name: str) -> tuple | None:
+    """Return a cache key component that changes when the table's row count does.
+
+    Returns None when the table cannot be counted, so callers skip caching and
+    fall through to their normal error handling.
+    """
+    result = db.execute_query(f"SELECT COUNT(*) FROM {table_name}")
+    if not result.get("rows"):
+        return None
+    return connector_key(db, table_name, result["rows"][0][0])
@@ -15,15 +15,24 @@ Usage:
     db = create_connector(db_type="snowflake", snowflake_config={...})
 """
 
+import asyncio
+import atexit
+import functools
 import logging
+import re
+import threading
 import time
 from abc import ABC, abstractmethod
-from contextlib import contextmanager
+from collections.abc import Callable
+from contextlib import asynccontextmanager, contextmanager
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import pandas as pd
 
+if TYPE_CHECKING:
+    import pyarrow as pa
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,33 +41,107 @@ logger = logging.getLogger(__name__)
 # =============================================================================
 
 class BaseDatabaseConnector(ABC):
-    """Abstract base class that defines the interface all connectors must implement."""
+    """Abstract base class that defines the interface all connectors must implement.
+
+    Table lists, row counts and column schemas are cached on the connector for
+    ``schema_cache_ttl_seconds``; backends implement the uncached ``_fetch_*``
+    methods. Writes issued through ``execute_query`` drop the cache.
+    """
+
+    schema_cache_ttl_seconds: float = 60.0
+
+    def __init__(self):
+        self._schema_cache: dict[tuple, tuple[float, Any]] = {}
 
     @abstractmethod
-    def execute_query(self, sql: str, params: list | None = None) -> dict[str, Any]:
-        """Execute SQL and return {columns, rows, row_count, execution_time_ms}."""
+    def execute_query(
+        self, sql: str, params: list | None = None, columnar: bool = False, arrow: bool = False
+    ) -> dict[str, Any]:
+        """Execute SQL and return {columns, rows, row_count, execution_time_ms}.
+
+        With columnar=True the rows are returned column-major instead, as
+        {"data": {column: [values...]}} in place of "rows". With arrow=True
+        they are returned as a pyarrow Table under "arrow" (None for
+        statements without a result set).
+        """
         ...
 
     @abstractmethod
-    def execute_query_df(self, sql: str) -> pd.DataFrame:
-        """Execute SQL and return a pandas DataFrame."""
+    def execute_query_df(self, sql: str, dtype_backend: str | None = None) -> pd.DataFrame:
+        """Execute SQL and return a pandas DataFrame.
+
+        Pass dtype_backend="pyarrow" to get Arrow-backed columns instead of
+        NumPy/object ones.
+        """
         ...
 
     @abstractmethod
+    def execute_query_arrow(self, sql: str) -> "pa.Table":
+        """Execute SQL and return the result as a pyarrow Table."""
+        ...
+
+    def export_csv(self, sql: str, path: str) -> None:
+        """Write the result of sql to a CSV file with a header row."""
+        from pyarrow import csv  # lazy import
+
+        csv.write_csv(self.execute_query_arrow(sql), path)
+
     def get_tables(self) -> list[dict]:
         """Return [{name, row_count}, ...]."""
-        ...
+        return self._schema_cached(("tables",), self._fetch_tables)
 
-    @abstractmethod
     def get_schema(self, table_name: str) -> list[dict]:
         """Return [{column, type, nullable}, ...]."""
-        ...
+        return self._schema_cached(("schema", table_name), lambda: self._fetch_schema(table_name))
 
-    @abstractmethod
     def get_views(self) -> list[str]:
         """Return list of view names."""
+        return self._schema_cached(("views",), self._fetch_views)
+
+    def get_all_schemas(self) -> dict[str, list[dict]]:
+        """Return {name: [{column, type, nullable}, ...]} for every table and view."""
+        def load():
+            schemas = self._fetch_all_schemas()
+            # Seed the per-table entries so get_schema() hits the cache too
+            now = time.monotonic()
+            for name, columns in schemas.items():
+                if columns:
+                    self._schema_cache[("schema", name)] = (now, columns)
+            return schemas
+
+        return self._schema_cached(("all_schemas",), load)
+
+    def invalidate_schema_cache(self) -> None:
+        """Forget cached tables, views and schemas so the next lookup hits the catalog."""
+        self._schema_cache.clear()
+
+    def _schema_cached(self, key: tuple, loader: Callable[[], Any]) -> Any:
+        entry = self._schema_cache.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < self.schema_cache_ttl_seconds:
+            return entry[1]
+        value = loader()
+        if value:  # don't pin lookups that failed or found nothing
+            self._schema_cache[key] = (now, value)
+        return value
+
+    @abstractmethod
+    def _fetch_tables(self) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def _fetch_schema(self, table_name: str) -> list[dict]:
+        ...
+
+    @abstractmethod
+    def _fetch_views(self) -> list[str]:
         ...
 
+    def _fetch_all_schemas(self) -> dict[str, list[dict]]:
+        # One lookup per table and view; backends with a column catalog override this
+        names = [t["name"] for t in self.get_tables()] + self.get_views()
+        return {name: self.get_schema(name) for name in names}
+
     def get_sample(self, table_name: str, limit: int = 5) -> dict:
         """Get sample rows from a table."""
         return self.execute_query(f"SELECT * FROM {table_name} LIMIT {limit}")
@@ -73,14 +156,27 @@ class BaseDatabaseConnector(ABC):
 # =============================================================================
 
 class DuckDBConnector(BaseDatabaseConnector):
-    """DuckDB connection manager for local development."""
+    """
+    DuckDB connection manager for local development.
 
-    def __init__(self, db_path: str):
+    The database is opened once, on first use, and kept open; each query runs
+    on its own cursor so worker threads can query concurrently. Note that an
+    open read-write DuckDB file cannot be opened by another process; with
+    ``read_only=True`` any number of processes can share the file, and DuckDB
+    itself rejects statements that would modify it.
+    """
+
+    def __init__(self, db_path: str, read_only: bool = False):
+        super().__init__()
         import duckdb  # lazy import
         self._duckdb = duckdb
         self.db_path = db_path
+        self.read_only = read_only
+        self._conn = None
+        self._conn_lock = threading.Lock()
         self._ensure_db_exists()
-        logger.info(f"DuckDBConnector initialized: {db_path}")
+        atexit.register(self.close)
+        logger.info(f"DuckDBConnector initialized: {db_path} (read_only={read_only})")
 
     def _ensure_db_exists(self) -> None:
         path = Path(self.db_path)
@@ -89,29 +185,49 @@ class DuckDBConnector(BaseDatabaseConnector):
 
     @contextmanager
     def connection(self):
-        con = self._duckdb.connect(self.db_path, read_only=False)
+        """Yield a cursor on the shared connection, opening it if needed."""
+        with self._conn_lock:
+            if self._conn is None:
+                self._conn = self._duckdb.connect(self.db_path, read_only=self.read_only)
+            cursor = self._conn.cursor()
         try:
-            yield con
+            yield cursor
         finally:
-            con.close()
+            cursor.close()
 
-    def execute_query(self, sql: str, params: list | None = None) -> dict[str, Any]:
-        start = time.time()
+    def execute_query(
+        self, sql: str, params: list | None = None, columnar: bool = False, arrow: bool = False
+    ) -> dict[str, Any]:
+        start = time.perf_counter_ns()
         try:
             with self.connection() as con:
                 result = con.execute(sql, params) if params else con.execute(sql)
                 columns = [desc[0] for desc in result.description] if result.description else []
-                rows = result.fetchall()
-                elapsed = round((time.time() - start) * 1000, 2)
-                logger.info(f"Query executed in {elapsed}ms, returned {len(rows)} rows")
+                if arrow:
+                    table = _read_arrow(result) if columns else None
+                    payload = {"arrow": table}
+                    row_count = table.num_rows if table is not None else 0
+                elif columnar:
+                    # NumPy arrays per column skip boxing every cell into a row tuple
+                    arrays = result.fetchnumpy() if columns else {}
+                    payload = {"data": {col: arr.tolist() for col, arr in arrays.items()}}
+                    row_count = len(next(iter(arrays.values()), ()))
+                else:
+                    rows = result.fetchall()
+                    payload = {"rows": [list(row) for row in rows]}
+                    row_count = len(rows)
+                if _is_write(sql):
+                    self.invalidate_schema_cache()
+                elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
+                logger.info(f"Query executed in {elapsed}ms, returned {row_count} rows")
                 return {
                     "columns": columns,
-                    "rows": [list(row) for row in rows],
-                    "row_count": len(rows),
+                    **payload,
+                    "row_count": row_count,
                     "execution_time_ms": elapsed,
                 }
         except Exception as e:
-            elapsed = round((time.time() - start) * 1000, 2)
+            elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
             logger.error(f"Query failed after {elapsed}ms: {e}")
             return {
                 "error": str(e),
@@ -120,23 +236,33 @@ class DuckDBConnector(BaseDatabaseConnector):
                 "suggestion": _get_error_suggestion(str(e)),
             }
 
-    def execute_query_df(self, sql: str) -> pd.DataFrame:
+    def execute_query_df(self, sql: str, dtype_backend: str | None = None) -> pd.DataFrame:
+        if dtype_backend == "pyarrow":
+            return self.execute_query_arrow(sql).to_pandas(types_mapper=pd.ArrowDtype)
         with self.connection() as con:
             return con.execute(sql).fetchdf()
 
-    def get_tables(self) -> list[dict]:
-        result = self.execute_query("SHOW TABLES")
-        tables = []
-        for row in result.get("rows", []):
-            table_name = row[0]
-            count = self.execute_query(f"SELECT COUNT(*) FROM {table_name}")
-            tables.append({
-                "name": table_name,
-                "row_count": count["rows"][0][0] if count.get("rows") else 0,
-            })
-        return tables
+    def execute_query_arrow(self, sql: str) -> "pa.Table":
+        with self.connection() as con:
+            return _read_arrow(con.execute(sql))
 
-    def get_schema(self, table_name: str) -> list[dict]:
+    def export_csv(self, sql: str, path: str) -> None:
+        # DuckDB's own writer streams the result to disk without materializing it
+        quoted_path = path.replace("'", "''")
+        with self.connection() as con:
+            con.execute(f"COPY ({sql}) TO '{quoted_path}' (HEADER, DELIMITER ',')")
+
+    def _fetch_tables(self) -> list[dict]:
+        # Row counts come from table metadata, not a COUNT(*) scan per table
+        result = self.execute_query("""
+            SELECT table_name, estimated_size FROM duckdb_tables()
+            WHERE NOT internal
+              AND database_name = current_database() AND schema_name = current_schema()
+            ORDER BY table_name
+        """)
+        return [{"name": name, "row_count": count} for name, count in result.get("rows", [])]
+
+    def _fetch_schema(self, table_name: str) -> list[dict]:
         result = self.execute_query(f"DESCRIBE {table_name}")
         if result.get("error"):
             return []
@@ -145,15 +271,36 @@ class DuckDBConnector(BaseDatabaseConnector):
             for row in result.get("rows", [])
         ]
 
-    def get_views(self) -> list[str]:
+    def _fetch_views(self) -> list[str]:
         result = self.execute_query(
             "SELECT view_name FROM duckdb_views() WHERE NOT internal"
         )
         return [row[0] for row in result.get("rows", [])]
 
+    def _fetch_all_schemas(self) -> dict[str, list[dict]]:
+        # Columns of every table and view in one catalog query instead of a DESCRIBE each
+        result = self.execute_query("""
+            SELECT table_name, column_name, data_type, is_nullable FROM duckdb_columns()
+            WHERE NOT internal
+              AND database_name = current_database() AND schema_name = current_schema()
+            ORDER BY table_name, column_index
+        """)
+        schemas: dict[str, list[dict]] = {}
+        for table, column, dtype, nullable in result.get("rows", []):
+            schemas.setdefault(table, []).append({"column": column, "type": dtype, "nullable": nullable})
+        return schemas
+
     def get_backend_name(self) -> str:
         return "DuckDB"
 
+    def close(self) -> None:
+        """Close the shared DuckDB connection."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+                logger.info("DuckDB connection closed")
+
 
 # =============================================================================
 # Snowflake Connector
@@ -180,6 +327,7 @@ class SnowflakeConnector(BaseDatabaseConnector):
                 - schema: Schema name (default: "PUBLIC")
                 - role: Role (optional)
         """
+        super().__init__()
         try:
             import snowflake.connector
             self._sf = snowflake.connector
@@ -212,43 +360,67 @@ class SnowflakeConnector(BaseDatabaseConnector):
         self._conn = self._sf.connect(**connect_params)
         logger.info("Snowflake connection established")
 
-    def _ensure_connected(self) -> None:
-        """Reconnect if the connection was lost."""
-        try:
-            self._conn.cursor().execute("SELECT 1")
-        except Exception:
-            logger.warning("Snowflake connection lost, reconnecting...")
-            self._connect()
+    def _execute(self, sql: str, params: list | None = None):
+        """
+        Run a statement on a fresh cursor and return the cursor.
+
+        A dropped session is detected by the query itself failing rather than by
+        a ping before every call; read-only statements are then retried once on
+        a new connection. Writes are not retried, as they may already have run.
+        """
+        errors = self._sf.errors
+        for attempt in range(2):
+            try:
+                cursor = self._conn.cursor()
+                if params:
+                    cursor.execute(sql, params)
+                else:
+                    cursor.execute(sql)
+                return cursor
+            except (errors.OperationalError, errors.InterfaceError):
+                if attempt or _is_write(sql):
+                    raise
+                logger.warning("Snowflake connection lost, reconnecting...")
+                self._connect()
 
     @contextmanager
     def connection(self):
         """Context manager that returns the persistent connection."""
-        self._ensure_connected()
         yield self._conn
 
-    def execute_query(self, sql: str, params: list | None = None) -> dict[str, Any]:
-        start = time.time()
+    def execute_query(
+        self, sql: str, params: list | None = None, columnar: bool = False, arrow: bool = False
+    ) -> dict[str, Any]:
+        start = time.perf_counter_ns()
         try:
-            self._ensure_connected()
-            cursor = self._conn.cursor()
-            if params:
-                cursor.execute(sql, params)
-            else:
-                cursor.execute(sql)
+            cursor = self._execute(sql, params)
 
             columns = [desc[0].lower() for desc in cursor.description] if cursor.description else []
-            rows = cursor.fetchall()
-            elapsed = round((time.time() - start) * 1000, 2)
-
-            logger.info(f"Snowflake query executed in {elapsed}ms, returned {len(rows)} rows")
+            if arrow:
+                table = self._arrow_result(cursor) if columns else None
+                payload = {"arrow": table}
+                row_count = table.num_rows if table is not None else 0
+            else:
+                rows = cursor.fetchall()
+                if columnar:
+                    values = zip(*rows) if rows else ([] for _ in columns)
+                    payload = {"data": {col: list(v) for col, v in zip(columns, values)}}
+                else:
+                    payload = {"rows": [list(row) for row in rows]}
+                row_count = len(rows)
+            if _is_write(sql):
+                self.invalidate_schema_cache()
+            elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
+
+            logger.info(f"Snowflake query executed in {elapsed}ms, returned {row_count} rows")
             return {
                 "columns": columns,
-                "rows": [list(row) for row in rows],
-                "row_count": len(rows),
+                **payload,
+                "row_count": row_count,
                 "execution_time_ms": elapsed,
             }
         except Exception as e:
-            elapsed = round((time.time() - start) * 1000, 2)
+            elapsed = (time.perf_counter_ns() - start) // 10_000 / 100
             logger.error(f"Snowflake query failed after {elapsed}ms: {e}")
             return {
                 "error": str(e),
@@ -257,28 +429,36 @@ class SnowflakeConnector(BaseDatabaseConnector):
                 "suggestion": _get_error_suggestion(str(e)),
             }
 
-    def execute_query_df(self, sql: str) -> pd.DataFrame:
-        self._ensure_connected()
-        cursor = self._conn.cursor()
-        cursor.execute(sql)
+    def execute_query_df(self, sql: str, dtype_backend: str | None = None) -> pd.DataFrame:
+        cursor = self._execute(sql)
         columns = [desc[0].lower() for desc in cursor.description]
         rows = cursor.fetchall()
-        return pd.DataFrame(rows, columns=columns)
-
-    def get_tables(self) -> list[dict]:
-        result = self.execute_query("SHOW TABLES")
-        tables = []
-        for row in result.get("rows", []):
-            # SHOW TABLES in Snowflake: columns vary, name is typically at index 1
-            table_name = row[1] if len(row) > 1 else row[0]
-            count = self.execute_query(f"SELECT COUNT(*) FROM {table_name}")
-            tables.append({
-                "name": table_name,
-                "row_count": count["rows"][0][0] if count.get("rows") else 0,
-            })
-        return tables
-
-    def get_schema(self, table_name: str) -> list[dict]:
+        df = pd.DataFrame(rows, columns=columns)
+        if dtype_backend:
+            df = df.convert_dtypes(dtype_backend=dtype_backend)
+        return df
+
+    def execute_query_arrow(self, sql: str) -> "pa.Table":
+        return self._arrow_result(self._execute(sql))
+
+    @staticmethod
+    def _arrow_result(cursor) -> "pa.Table":
+        """Fetch a cursor's result as Arrow, with lowercase column names."""
+        table = cursor.fetch_arrow_all()
+        if table is None:  # empty result
+            import pyarrow as pa
+            return pa.table({desc[0].lower(): [] for desc in cursor.description})
+        return table.rename_columns([name.lower() for name in table.column_names])
+
+    def _fetch_tables(self) -> list[dict]:
+        result = self.execute_query("""
+            SELECT TABLE_NAME, ROW_COUNT FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_TYPE = 'BASE TABLE'
+            ORDER BY TABLE_NAME
+        """)
+        return [{"name": name, "row_count": count or 0} for name, count in result.get("rows", [])]
+
+    def _fetch_schema(self, table_name: str) -> list[dict]:
         result = self.execute_query(f"DESCRIBE TABLE {table_name}")
         if result.get("error"):
             return []
@@ -291,7 +471,7 @@ class SnowflakeConnector(BaseDatabaseConnector):
             for row in result.get("rows", [])
         ]
 
-    def get_views(self) -> list[str]:
+    def _fetch_views(self) -> list[str]:
         result = self.execute_query("SHOW VIEWS")
         if result.get("error"):
             return []
@@ -315,6 +495,7 @@ def create_connector(
     db_type: str | None = None,
     db_path: str | None = None,
     snowflake_config: dict | None = None,
+    read_only: bool | None = None,
 ) -> BaseDatabaseConnector:
     """
     Factory function to create the appropriate database connector.
@@ -325,19 +506,21 @@ def create_connector(
         db_type: "duckdb" or "snowflake". Defaults to DATABASE_TYPE env var.
         db_path: Path to DuckDB file. Defaults to DATABASE_PATH env var.
         snowflake_config: Dict with Snowflake connection params.
+        read_only: Open the DuckDB file read-only. Defaults to DATABASE_READ_ONLY env var.
 
     Returns:
         A BaseDatabaseConnector instance (DuckDBConnector or SnowflakeConnector).
     """
     if db_type is None:
-        from mcp_server.config import settings
-        db_type = settings.database_type
+        from mcp_server.config import get_settings
+        db_type = get_settings().database_type
 
     db_type = db_type.lower()
 
     if db_type == "snowflake":
         if snowflake_config is None:
-            from mcp_server.config import settings
+            from mcp_server.config import get_settings
+            settings = get_settings()
             snowflake_config = {
                 "account": settings.snowflake_account,
                 "user": settings.snowflake_user,
@@ -360,11 +543,83 @@ def create_connector(
 
     else:
         if db_path is None:
-            from mcp_server.config import settings
-            db_path = settings.resolve_database_path()
+            from mcp_server.config import get_settings
+            db_path = get_settings().resolve_database_path()
+        if read_only is None:
+            from mcp_server.config import get_settings
+            read_only = get_settings().database_read_only
 
         logger.info("Creating DuckDB connector...")
-        return DuckDBConnector(db_path)
+        return DuckDBConnector(db_path, read_only=read_only)
+
+
+@functools.lru_cache(maxsize=1)
+def shared_connector() -> BaseDatabaseConnector:
+    """
+    Process-wide connector built from Settings.
+
+    The Streamlit pages share this one instance, so they reuse a single
+    database connection and schema cache instead of opening one per page.
+    """
+    return create_connector()
+
+
+# =============================================================================
+# Connector Pool — one session per concurrent tool call for remote backends
+# =============================================================================
+
+class ConnectorPool:
+    """
+    LIFO pool of connectors for backends that hold one session per connector.
+
+    Connectors are created on demand up to ``max_size``; callers beyond that
+    wait for one to be released. Recently used connectors are handed out first
+    so idle sessions at the bottom of the stack can time out server-side.
+    """
+
+    def __init__(self, factory: Callable[[], BaseDatabaseConnector], max_size: int = 16):
+        self._factory = factory
+        self._max_size = max_size
+        self._idle: asyncio.LifoQueue[BaseDatabaseConnector] = asyncio.LifoQueue()
+        self._created = 0
+
+    async def _add(self) -> None:
+        self._created += 1
+        try:
+            self._idle.put_nowait(await asyncio.to_thread(self._factory))
+        except Exception:
+            self._created -= 1
+            raise
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Borrow a connector for the duration of the ``async with`` block."""
+        if self._idle.empty() and self._created < self._max_size:
+            await self._add()
+        db = await self._idle.get()
+        try:
+            yield db
+        finally:
+            self._idle.put_nowait(db)
+
+    async def close(self) -> None:
+        """Close every idle connector that supports it."""
+        while not self._idle.empty():
+            db = self._idle.get_nowait()
+            self._created -= 1
+            if hasattr(db, "close"):
+                await asyncio.to_thread(db.close)
+
+
+async def create_pool(
+    factory: Callable[[], BaseDatabaseConnector],
+    min_size: int = 4,
+    max_size: int = 16,
+) -> ConnectorPool:
+    """Create a ConnectorPool and open ``min_size`` connectors up front."""
+    pool = ConnectorPool(factory, max_size=max_size)
+    await asyncio.gather(*(pool._add() for _ in range(min(min_size, max_size))))
+    return pool
 
 
 # Keep backward compatibility — old code uses DatabaseConnector directly
@@ -375,19 +630,59 @@ DatabaseConnector = DuckDBConnector
 # Helpers
 # =============================================================================
 
+_READ_ONLY_STATEMENTS = {"SELECT", "WITH", "SHOW", "DESCRIBE", "DESC", "EXPLAIN", "PRAGMA", "SUMMARIZE", "FROM"}
+
+
+def _read_arrow(result) -> "pa.Table":
+    """Fetch a DuckDB result as a pyarrow Table."""
+    table = result.arrow()
+    if hasattr(table, "read_all"):  # newer DuckDB returns a RecordBatchReader
+        table = table.read_all()
+    return table
+
+
+def _is_write(sql: str) -> bool:
+    """True if the statement may change tables, views or row counts."""
+    words = sql.lstrip(" \t\n(").split(None, 1)
+    return bool(words) and words[0].upper() not in _READ_ONLY_STATEMENTS
+
+
+# Common error patterns, in priority order, and the suggestion shown for each
+_ERROR_SUGGESTIONS = {
+    "table": (
+        r"no such table|does not exist",
+        "Table not found. Run 'python data/sample_data_generator.py' to create tables.",
+    ),
+    "read_only": (
+        r"read-only mode",
+        "The database is open read-only. Only SELECT-style queries are allowed; "
+        "set DATABASE_READ_ONLY=false to permit writes.",
+    ),
+    "syntax": (r"syntax error", "SQL syntax error. Check your query for typos or missing keywords."),
+    "permission": (r"permission", "Permission denied. Check file permissions or Snowflake role."),
+    "connect": (
+        r"could not connect|connection refused",
+        "Connection failed. Check your Snowflake account/credentials in .env.",
+    ),
+    "warehouse": (
+        r"warehouse",
+        "Snowflake warehouse issue. Check that your warehouse is running and accessible.",
+    ),
+    "auth": (
+        r"authentication|incorrect",
+        "Authentication failed. Check SNOWFLAKE_USER and SNOWFLAKE_PASSWORD in .env.",
+    ),
+}
+_ERROR_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, (pattern, _) in _ERROR_SUGGESTIONS.items()),
+    re.IGNORECASE,
+)
+_ERROR_PRIORITY = {name: i for i, name in enumerate(_ERROR_SUGGESTIONS)}
+
+
 def _get_error_suggestion(error_msg: str) -> str:
     """Return a user-friendly suggestion based on common errors."""
-    msg = error_msg.lower()
-    if "no such table" in msg or "does not exist" in msg:
-        return "Table not found. Run 'python data/sample_data_generator.py' to create tables."
-    if "syntax error" in msg:
-        return "SQL syntax error. Check your query for typos or missing keywords."
-    if "permission" in msg:
-        return "Permission denied. Check file permissions or Snowflake role."
-    if "could not connect" in msg or "connection refused" in msg:
-        return "Connection failed. Check your Snowflake account/credentials in .env."
-    if "warehouse" in msg:
-        return "Snowflake warehouse issue. Check that your warehouse is running and accessible."
-    if "authentication" in msg or "incorrect" in msg:
-        return "Authentication failed. Check SNOWFLAKE_USER and SNOWFLAKE_PASSWORD in .env."
-    return "An unexpected error occurred. Check the logs for details."
+    matched = {m.lastgroup for m in _ERROR_RE.finditer(error_msg)}
+    if not matched:
+        return "An unexpected error occurred. Check the logs for details."
+    return _ERROR_SUGGESTIONS[min(matched, key=_ERROR_PRIORITY.get)][1]
@@ -28,6 +28,9 @@ from mcp_server.tools.detect_anomalies import detect_anomalies
 
 console = Console()
 
+SEVERITY_COLORS = {"critical": "red", "high": "yellow", "medium": "cyan"}
+TREND_COLORS = {"increasing": "green", "decreasing": "red"}
+
 
 def pause(msg: str = "Press Enter to continue..."):
     console.print(f"\n[dim]{msg}[/dim]")
@@ -55,7 +58,7 @@ async def main():
     for col in result["columns"]:
         table.add_column(col)
     for row in result["rows"]:
-        table.add_row(*[str(v) for v in row])
+        table.add_row(*map(str, row))
     console.print(table)
     console.print(f"[dim]Executed in {result['execution_time_ms']}ms[/dim]")
 
@@ -68,7 +71,7 @@ async def main():
 
     if "trend" in result:
         t = result["trend"]
-        console.print(f"\n[bold]Trend Detected:[/bold] Revenue is [{'green' if t['direction'] == 'increasing' else 'red'}]{t['direction']}[/] ({t['overall_change_pct']:+.1f}% over {t['periods']} periods)")
+        console.print(f"\n[bold]Trend Detected:[/bold] Revenue is [{TREND_COLORS.get(t['direction'], 'white')}]{t['direction']}[/] ({t['overall_change_pct']:+.1f}% over {t['periods']} periods)")
 
     if "data_quality" in result:
         dq = result["data_quality"]
@@ -91,7 +94,7 @@ async def main():
         table.add_column("Severity")
         table.add_column("Deviation (σ)")
         for a in result["anomalies"][:5]:
-            color = {"critical": "red", "high": "yellow", "medium": "cyan"}.get(a["severity"], "white")
+            color = SEVERITY_COLORS.get(a["severity"], "white")
             table.add_row(a["date"], f"${a['value']:,.2f}", f"[{color}]{a['severity']}[/{color}]", str(a["deviation"]))
         console.print(table)
 
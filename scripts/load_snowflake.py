@@ -1,7 +1,7 @@
 """
 Snowflake Data Loader
 ========================
-Loads sample data from CSV into Snowflake tables and creates analytics views.
+Loads sample data into Snowflake tables, staged as Parquet, and creates analytics views.
 
 Prerequisites:
     pip install snowflake-connector-python
@@ -19,6 +19,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from mcp_server.config import settings
 
+# Rows per staged Parquet file. COPY INTO loads separate files in parallel, so
+# large tables are split rather than staged as one file.
+UPLOAD_CHUNK_ROWS = 100_000
+
 
 def main():
     try:
@@ -43,7 +47,7 @@ def main():
     print(f"Warehouse: {settings.snowflake_warehouse}")
 
     # Connect
-    print("\n[1/5] Connecting to Snowflake...")
+    print("\n[1/4] Connecting to Snowflake...")
     conn = snowflake.connector.connect(
         account=settings.snowflake_account,
         user=settings.snowflake_user,
@@ -53,21 +57,17 @@ def main():
     cursor = conn.cursor()
     print("  Connected!")
 
-    # Create database and schema
-    print("\n[2/5] Creating database and schema...")
-    cursor.execute(f"CREATE DATABASE IF NOT EXISTS {settings.snowflake_database}")
-    cursor.execute(f"USE DATABASE {settings.snowflake_database}")
-    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {settings.snowflake_schema}")
-    cursor.execute(f"USE SCHEMA {settings.snowflake_schema}")
-    print(f"  Using {settings.snowflake_database}.{settings.snowflake_schema}")
-
-    # Create tables
-    print("\n[3/5] Creating tables...")
-
-    cursor.execute("""
+    # Create database, schema and tables. execute_string sends the whole
+    # script in one call instead of one round-trip per statement.
+    print("\n[2/4] Creating database, schema and tables...")
+    conn.execute_string(f"""
+        CREATE DATABASE IF NOT EXISTS {settings.snowflake_database};
+        USE DATABASE {settings.snowflake_database};
+        CREATE SCHEMA IF NOT EXISTS {settings.snowflake_schema};
+        USE SCHEMA {settings.snowflake_schema};
         CREATE OR REPLACE TABLE sales (
             transaction_id VARCHAR,
-            transaction_date VARCHAR,
+            transaction_date DATE,
             customer_id VARCHAR,
             product_id VARCHAR,
             product_name VARCHAR,
@@ -83,24 +83,16 @@ def main():
             sales_channel VARCHAR,
             payment_method VARCHAR,
             customer_segment VARCHAR
-        )
-    """)
-    print("  Created: sales")
-
-    cursor.execute("""
+        );
         CREATE OR REPLACE TABLE customers (
             customer_id VARCHAR,
             company_name VARCHAR,
             segment VARCHAR,
             region VARCHAR,
             country VARCHAR,
-            created_date VARCHAR,
+            created_date DATE,
             is_active BOOLEAN
-        )
-    """)
-    print("  Created: customers")
-
-    cursor.execute("""
+        );
         CREATE OR REPLACE TABLE products (
             product_id VARCHAR,
             product_name VARCHAR,
@@ -109,12 +101,13 @@ def main():
             base_price FLOAT,
             cost FLOAT,
             is_active BOOLEAN
-        )
+        );
     """)
-    print("  Created: products")
+    print(f"  Using {settings.snowflake_database}.{settings.snowflake_schema}")
+    print("  Created: sales, customers, products")
 
     # Load data — regenerate from Python to get all 3 tables
-    print("\n[4/5] Loading data...")
+    print("\n[3/4] Loading data...")
     data_dir = Path(__file__).parent.parent / "data"
 
     # Generate fresh data using the sample data generator
@@ -132,27 +125,36 @@ def main():
     cursor.execute("CREATE OR REPLACE STAGE bi_copilot_stage")
 
     for table_name, df in [("sales", sales_df), ("customers", customers_df), ("products", products_df)]:
-        csv_path = data_dir / f"{table_name}_upload.csv"
-        df.to_csv(str(csv_path), index=False)
+        # Parquet keeps the column types and is already compressed, so
+        # Snowflake decodes typed columns instead of parsing CSV text
+        upload_paths = []
+        for i, start in enumerate(range(0, max(len(df), 1), UPLOAD_CHUNK_ROWS)):
+            upload_path = data_dir / f"{table_name}_upload_{i:03d}.parquet"
+            df.iloc[start:start + UPLOAD_CHUNK_ROWS].to_parquet(str(upload_path), compression="zstd", index=False)
+            upload_paths.append(upload_path)
         cursor.execute(f"TRUNCATE TABLE IF EXISTS {table_name}")
-        cursor.execute(f"PUT file://{csv_path.absolute()} @bi_copilot_stage AUTO_COMPRESS=TRUE OVERWRITE=TRUE")
+        # The wildcard PUT uploads every chunk concurrently
+        upload_glob = (data_dir / f"{table_name}_upload_*.parquet").absolute()
+        cursor.execute(f"PUT file://{upload_glob} @bi_copilot_stage AUTO_COMPRESS=FALSE OVERWRITE=TRUE PARALLEL=8")
         cursor.execute(f"""
             COPY INTO {table_name}
-            FROM @bi_copilot_stage/{table_name}_upload.csv.gz
-            FILE_FORMAT = (TYPE = 'CSV' SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY = '"')
+            FROM @bi_copilot_stage
+            PATTERN = '.*{table_name}_upload_[0-9]+[.]parquet'
+            FILE_FORMAT = (TYPE = 'PARQUET')
+            MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE
             ON_ERROR = 'ABORT_STATEMENT'
         """)
         result = cursor.fetchone()
         cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
         count = cursor.fetchone()[0]
-        print(f"  {table_name}: {count:,} rows loaded")
-        # Clean up temp CSV
-        csv_path.unlink(missing_ok=True)
+        print(f"  {table_name}: {count:,} rows loaded from {len(upload_paths)} file(s)")
+        # Clean up temp files
+        for upload_path in upload_paths:
+            upload_path.unlink(missing_ok=True)
 
     # Create views
-    print("\n[5/5] Creating analytics views...")
-
-    cursor.execute("""
+    print("\n[4/4] Creating analytics views...")
+    conn.execute_string("""
         CREATE OR REPLACE VIEW monthly_revenue AS
         SELECT
             DATE_TRUNC('month', TO_DATE(transaction_date)) AS month,
@@ -165,11 +167,8 @@ def main():
             AVG(discount_pct) AS avg_discount
         FROM sales
         GROUP BY 1, 2, 3
-        ORDER BY 1
-    """)
-    print("  Created: monthly_revenue")
+        ORDER BY 1;
 
-    cursor.execute("""
         CREATE OR REPLACE VIEW top_products AS
         SELECT
             product_name,
@@ -182,11 +181,8 @@ def main():
             ROUND(AVG(unit_price), 2) AS avg_unit_price
         FROM sales
         GROUP BY 1, 2, 3
-        ORDER BY total_revenue DESC
-    """)
-    print("  Created: top_products")
+        ORDER BY total_revenue DESC;
 
-    cursor.execute("""
         CREATE OR REPLACE VIEW daily_kpis AS
         SELECT
             TO_DATE(transaction_date) AS date,
@@ -197,11 +193,8 @@ def main():
             COUNT(DISTINCT customer_id) AS unique_customers
         FROM sales
         GROUP BY 1
-        ORDER BY 1
-    """)
-    print("  Created: daily_kpis")
+        ORDER BY 1;
 
-    cursor.execute("""
         CREATE OR REPLACE VIEW customer_summary AS
         SELECT
             s.customer_id,
@@ -214,9 +207,9 @@ def main():
             MAX(s.transaction_date) AS last_order
         FROM sales s
         GROUP BY 1
-        ORDER BY lifetime_revenue DESC
+        ORDER BY lifetime_revenue DESC;
     """)
-    print("  Created: customer_summary")
+    print("  Created: monthly_revenue, top_products, daily_kpis, customer_summary")
 
     # Done
     cursor.close()
@@ -55,27 +55,18 @@ async def main():
         print("\n⚠️  Run 'python data/sample_data_generator.py' first.")
         return
 
-    # Test 2: query_database tool
+    # Tests 2-4: tools. Each runs in a worker thread, so check them concurrently.
     print("\n--- Tools ---")
-    result = await query_database(query="SELECT COUNT(*) as total FROM sales", query_type="sql", db=db)
-    ok = "error" not in result
-    print_result("query_database (SQL)", result, ok)
-    passed += 1 if ok else 0
-    failed += 0 if ok else 1
-
-    # Test 3: analyze_data tool
-    result = await analyze_data(table_name="sales", db=db)
-    ok = "error" not in result
-    print_result("analyze_data", result, ok)
-    passed += 1 if ok else 0
-    failed += 0 if ok else 1
-
-    # Test 4: detect_anomalies tool
-    result = await detect_anomalies(table_name="sales", metric_column="revenue", db=db)
-    ok = "error" not in result
-    print_result("detect_anomalies", result, ok)
-    passed += 1 if ok else 0
-    failed += 0 if ok else 1
+    results = await asyncio.gather(
+        query_database(query="SELECT COUNT(*) as total FROM sales", query_type="sql", db=db),
+        analyze_data(table_name="sales", db=db),
+        detect_anomalies(table_name="sales", metric_column="revenue", db=db),
+    )
+    for name, result in zip(["query_database (SQL)", "analyze_data", "detect_anomalies"], results):
+        ok = "error" not in result
+        print_result(name, result, ok)
+        passed += 1 if ok else 0
+        failed += 0 if ok else 1
 
     # Test 5: Resources
     print("\n--- Resources ---")
@@ -87,11 +87,20 @@ VS Code / Claude Desktop
 # Quick status check
 col1, col2, col3 = st.columns(3)
 
-try:
-    from mcp_server.utils.db_connector import create_connector
 
-    db = create_connector()
-    tables = db.get_tables()
+@st.cache_resource
+def get_db():
+    from mcp_server.utils.db_connector import shared_connector
+    return shared_connector()
+
+
+@st.cache_data(ttl=60)
+def load_tables(_db):
+    return _db.get_tables()
+
+
+try:
+    tables = load_tables(get_db())
 
     with col1:
         st.metric("Database", "Connected", delta="Online")
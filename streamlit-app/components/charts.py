@@ -2,13 +2,19 @@
 Reusable Chart Components
 ===========================
 Plotly chart builders for the Streamlit dashboard.
+
+Builders are memoized with st.cache_data, keyed on the DataFrame contents and
+arguments, so a rerun with unchanged data reuses the figure instead of
+rebuilding it.
 """
 
 import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import streamlit as st
 
 
+@st.cache_data(max_entries=32)
 def revenue_trend_chart(df: pd.DataFrame, date_col: str = "month", value_col: str = "total_revenue") -> go.Figure:
     """Line chart showing revenue over time."""
     fig = px.line(
@@ -21,6 +27,7 @@ def revenue_trend_chart(df: pd.DataFrame, date_col: str = "month", value_col: st
     return fig
 
 
+@st.cache_data(max_entries=32)
 def category_breakdown_chart(df: pd.DataFrame, names_col: str = "category", values_col: str = "total_revenue") -> go.Figure:
     """Donut chart for category breakdown."""
     fig = px.pie(
@@ -33,6 +40,7 @@ def category_breakdown_chart(df: pd.DataFrame, names_col: str = "category", valu
     return fig
 
 
+@st.cache_data(max_entries=32)
 def bar_chart(df: pd.DataFrame, x: str, y: str, title: str = "", color: str | None = None) -> go.Figure:
     """Horizontal bar chart."""
     fig = px.bar(
@@ -44,6 +52,7 @@ def bar_chart(df: pd.DataFrame, x: str, y: str, title: str = "", color: str | No
     return fig
 
 
+@st.cache_data(max_entries=32)
 def scatter_chart(df: pd.DataFrame, x: str, y: str, color: str | None = None, title: str = "") -> go.Figure:
     """Scatter plot for correlation analysis."""
     fig = px.scatter(
@@ -55,6 +64,7 @@ def scatter_chart(df: pd.DataFrame, x: str, y: str, color: str | None = None, ti
     return fig
 
 
+@st.cache_data(max_entries=32)
 def time_series_with_anomalies(
     df: pd.DataFrame,
     date_col: str,
@@ -83,6 +93,7 @@ def time_series_with_anomalies(
     return fig
 
 
+@st.cache_data(max_entries=32)
 def kpi_gauge(value: float, title: str, max_val: float | None = None, suffix: str = "") -> go.Figure:
     """Gauge chart for KPI display."""
     fig = go.Figure(go.Indicator(
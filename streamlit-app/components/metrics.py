@@ -27,18 +27,20 @@ def display_kpi_row(metrics: list[dict]) -> None:
 
 def format_currency(value: float) -> str:
     """Format a number as currency."""
-    if abs(value) >= 1_000_000:
+    magnitude = abs(value)
+    if magnitude >= 1_000_000:
         return f"${value / 1_000_000:,.1f}M"
-    if abs(value) >= 1_000:
+    if magnitude >= 1_000:
         return f"${value / 1_000:,.1f}K"
     return f"${value:,.2f}"
 
 
 def format_number(value: float) -> str:
     """Format a large number with abbreviations."""
-    if abs(value) >= 1_000_000:
+    magnitude = abs(value)
+    if magnitude >= 1_000_000:
         return f"{value / 1_000_000:,.1f}M"
-    if abs(value) >= 1_000:
+    if magnitude >= 1_000:
         return f"{value / 1_000:,.1f}K"
     return f"{value:,.0f}"
 
@@ -5,6 +5,7 @@ Browse tables, view schemas, preview data, and examine column statistics.
 """
 
 import sys
+import tempfile
 from pathlib import Path
 
 import streamlit as st
@@ -14,7 +15,7 @@ project_root = str(Path(__file__).parent.parent.parent)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from mcp_server.utils.db_connector import create_connector
+from mcp_server.utils.db_connector import shared_connector
 
 st.set_page_config(page_title="Data Explorer | BI Copilot", page_icon="🔍", layout="wide")
 st.title("🔍 Data Explorer")
@@ -22,7 +23,7 @@ st.title("🔍 Data Explorer")
 # --- Initialize DB ---
 @st.cache_resource
 def get_db():
-    return create_connector()
+    return shared_connector()
 
 try:
     db = get_db()
@@ -30,10 +31,77 @@ except Exception as e:
     st.error(f"Database connection failed: {e}")
     st.stop()
 
+# Streamlit reruns the whole script on every widget change; these keep the
+# metadata and table loads from being re-queried each time.
+@st.cache_data(ttl=60, max_entries=64)
+def load_tables(_db):               return _db.get_tables()
+@st.cache_data(ttl=60, max_entries=64)
+def load_views(_db):                return _db.get_views()
+@st.cache_data(ttl=60, max_entries=64)
+def load_schema(_db, name):         return _db.get_schema(name)
+@st.cache_data(ttl=60, max_entries=64)
+def load_count(_db, name):          return _db.execute_query(f"SELECT COUNT(*) FROM {name}")
+@st.cache_data(ttl=60, max_entries=64)
+def load_preview(_db, name, limit): return _db.execute_query_df(f"SELECT * FROM {name} LIMIT {limit}")
+@st.cache_data(ttl=60, max_entries=64)
+def load_dtypes(_db, name):         return _db.execute_query_df(f"SELECT * FROM {name} LIMIT 0").dtypes
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+# Column statistics are aggregated in the database rather than by loading the
+# whole table into pandas.
+@st.cache_data(ttl=60, max_entries=64)
+def load_numeric_stats(_db, name, columns):
+    """describe()-style table for the numeric columns, from one query."""
+    stats = {
+        "count": "COUNT({c})",
+        "mean": "AVG({c})",
+        "std": "STDDEV_SAMP({c})",
+        "min": "MIN({c})",
+        "25%": "PERCENTILE_CONT(0.25) WITHIN GROUP (ORDER BY {c})",
+        "50%": "PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {c})",
+        "75%": "PERCENTILE_CONT(0.75) WITHIN GROUP (ORDER BY {c})",
+        "max": "MAX({c})",
+    }
+    exprs = [expr.format(c=_quote(col)) for col in columns for expr in stats.values()]
+    row = _db.execute_query_df(f"SELECT {', '.join(exprs)} FROM {name}").iloc[0].to_numpy(dtype=float)
+    return pd.DataFrame(row.reshape(len(columns), len(stats)).T, index=list(stats), columns=list(columns)).round(2)
+
+
+@st.cache_data(ttl=60, max_entries=64)
+def load_value_counts(_db, name, column):
+    """Top 20 values of one column, ordered by frequency."""
+    c = _quote(column)
+    df = _db.execute_query_df(
+        f"SELECT {c} AS value, COUNT(*) AS n FROM {name} WHERE {c} IS NOT NULL "
+        f"GROUP BY 1 ORDER BY 2 DESC LIMIT 20"
+    )
+    return df.set_index("value")["n"]
+
+
+@st.cache_data(ttl=60, max_entries=64)
+def load_null_counts(_db, name, columns):
+    """Row count and per-column null counts, from one query."""
+    exprs = ["COUNT(*)"] + [f"COUNT(*) - COUNT({_quote(c)})" for c in columns]
+    row = _db.execute_query_df(f"SELECT {', '.join(exprs)} FROM {name}").iloc[0].tolist()
+    return int(row[0]), pd.Series([int(n) for n in row[1:]], index=list(columns))
+
+
+@st.cache_data(ttl=60, max_entries=4)
+def load_csv(_db, name):
+    """The whole table as CSV bytes, written by the database rather than pandas."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / f"{name}.csv")
+        _db.export_csv(f"SELECT * FROM {name}", path)
+        return Path(path).read_bytes()
+
 # --- Table Selector ---
 try:
-    tables = db.get_tables()
-    views = db.get_views()
+    tables = load_tables(db)
+    views = load_views(db)
 except Exception as e:
     st.error(f"Failed to list tables: {e}")
     st.stop()
@@ -52,7 +120,7 @@ col1, col2 = st.columns([1, 2])
 with col1:
     st.subheader("Schema")
     try:
-        schema = db.get_schema(selected)
+        schema = load_schema(db, selected)
         schema_df = pd.DataFrame(schema)
         st.dataframe(schema_df, use_container_width=True, hide_index=True)
     except Exception as e:
@@ -60,7 +128,7 @@ with col1:
 
     # Row count
     try:
-        count_result = db.execute_query(f"SELECT COUNT(*) FROM {selected}")
+        count_result = load_count(db, selected)
         if count_result.get("rows"):
             st.metric("Row Count", f"{count_result['rows'][0][0]:,}")
     except Exception as e:
@@ -71,7 +139,7 @@ with col2:
     limit = st.slider("Preview rows", 5, 100, 10)
 
     try:
-        preview_df = db.execute_query_df(f"SELECT * FROM {selected} LIMIT {limit}")
+        preview_df = load_preview(db, selected, limit)
         st.dataframe(preview_df, use_container_width=True, hide_index=True)
     except Exception as e:
         st.error(f"Preview error: {e}")
@@ -81,38 +149,51 @@ st.divider()
 st.subheader("Column Statistics")
 
 try:
-    df = db.execute_query_df(f"SELECT * FROM {selected}")
+    dtypes = load_dtypes(db, selected)
 except Exception as e:
     st.error(f"Failed to load data for statistics: {e}")
     st.stop()
 
-numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-categorical_cols = df.select_dtypes(include=["object"]).columns.tolist()
+# Booleans count as numeric to pandas but AVG/PERCENTILE_CONT reject them, and describe() skipped them
+numeric_cols = [
+    c for c, t in dtypes.items()
+    if pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t)
+]
+categorical_cols = [c for c, t in dtypes.items() if t == object or pd.api.types.is_string_dtype(t)]
 
 tab1, tab2, tab3 = st.tabs(["Numeric Stats", "Categorical Stats", "Null Analysis"])
 
 with tab1:
     if numeric_cols:
-        st.dataframe(df[numeric_cols].describe().round(2), use_container_width=True)
+        try:
+            st.dataframe(load_numeric_stats(db, selected, tuple(numeric_cols)), use_container_width=True)
+        except Exception as e:
+            st.error(f"Statistics error: {e}")
     else:
         st.info("No numeric columns in this table.")
 
 with tab2:
     if categorical_cols:
         col_select = st.selectbox("Select column", categorical_cols)
-        value_counts = df[col_select].value_counts().head(20)
-        st.bar_chart(value_counts)
+        try:
+            st.bar_chart(load_value_counts(db, selected, col_select))
+        except Exception as e:
+            st.error(f"Statistics error: {e}")
     else:
         st.info("No categorical columns in this table.")
 
 with tab3:
-    null_counts = df.isnull().sum()
+    try:
+        total, null_counts = load_null_counts(db, selected, tuple(dtypes.index))
+    except Exception as e:
+        st.error(f"Statistics error: {e}")
+        st.stop()
     null_counts = null_counts[null_counts > 0]
     if len(null_counts) > 0:
         null_df = pd.DataFrame({
             "Column": null_counts.index,
             "Null Count": null_counts.values,
-            "Null %": (null_counts.values / len(df) * 100).round(2),
+            "Null %": (null_counts.values / total * 100).round(2),
         })
         st.dataframe(null_df, use_container_width=True, hide_index=True)
     else:
@@ -120,5 +201,7 @@ with tab3:
 
 # --- Export ---
 st.divider()
-csv = df.to_csv(index=False)
-st.download_button("Download as CSV", csv, f"{selected}.csv", "text/csv")
+try:
+    st.download_button("Download as CSV", load_csv(db, selected), f"{selected}.csv", "text/csv")
+except Exception as e:
+    st.error(f"Export error: {e}")
@@ -5,29 +5,36 @@ Natural language and SQL query interface with results display,
 visualization suggestions, and query history.
 """
 
+import io
 import sys
 import json
 from pathlib import Path
 
 import streamlit as st
-import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 
 project_root = str(Path(__file__).parent.parent.parent)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from mcp_server.utils.db_connector import create_connector
+from mcp_server.utils.db_connector import shared_connector
 from mcp_server.utils.ai_client import AIClient
+from mcp_server.tools.query_database import apply_limit, _get_schema_info
 from mcp_server.config import settings
 from mcp_server.resources.query_history import query_history
 
+MAX_CHART_POINTS = 1000
+PREVIEW_ROWS = 500
+
 st.set_page_config(page_title="Query Interface | BI Copilot", page_icon="💬", layout="wide")
 st.title("💬 Query Interface")
 
 # --- Initialize ---
 @st.cache_resource
 def get_db():
-    return create_connector()
+    return shared_connector()
 
 @st.cache_resource
 def get_ai():
@@ -38,9 +45,30 @@ def get_ai():
 db = get_db()
 ai = get_ai()
 
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _build_schema_info(_db) -> str:
+    """Schema prompt for AI, shared with the MCP tool. Cached; cleared by the Refresh schema button."""
+    return _get_schema_info(_db)
+
+
+def _to_csv(table: pa.Table) -> bytes:
+    buf = io.BytesIO()
+    pa_csv.write_csv(table, buf)
+    return buf.getvalue()
+
+
+def _to_parquet(table: pa.Table) -> bytes:
+    buf = io.BytesIO()
+    pq.write_table(table, buf, compression="zstd")
+    return buf.getvalue()
+
+
 # --- Query History State ---
 if "query_results" not in st.session_state:
     st.session_state.query_results = []
+if "last_result" not in st.session_state:
+    st.session_state.last_result = None
 
 # --- Input Mode ---
 mode = st.radio("Query Mode", ["Natural Language", "SQL"], horizontal=True)
@@ -48,6 +76,9 @@ mode = st.radio("Query Mode", ["Natural Language", "SQL"], horizontal=True)
 if mode == "Natural Language":
     st.info("Ask a question in plain English. AI will convert it to SQL." if ai else
             "Set ANTHROPIC_API_KEY in .env to enable natural language queries.")
+    if st.button("Refresh schema", help="Re-read tables and columns after the database changes"):
+        db.invalidate_schema_cache()
+        _build_schema_info.clear()
     query = st.text_area(
         "Ask a question",
         placeholder="e.g., What are the top 5 products by revenue in 2024?",
@@ -68,26 +99,39 @@ with col2:
 
 # --- Execute Query ---
 if run and query.strip():
+    if mode == "Natural Language" and ai:
+        schema_info = _build_schema_info(db)
+        sql_placeholder = st.empty()
+        try:
+            # Render the SQL as it streams in; the spinner only covers the wait for the first token
+            with st.spinner("Generating SQL..."):
+                chunks = ai.generate_sql_stream(query, schema_info)
+                streamed = next(chunks, "")
+            sql_placeholder.code(streamed, language="sql")
+            for chunk in chunks:
+                streamed += chunk
+                sql_placeholder.code(streamed, language="sql")
+        except Exception as e:
+            st.error(f"SQL generation failed: {e}")
+            st.stop()
+        # The finished translation is cached, so this returns the extracted SQL without a request
+        ai_result = ai.generate_sql(query, schema_info)
+        if "error" in ai_result:
+            st.error(f"SQL generation failed: {ai_result['error']}")
+            st.stop()
+        sql = ai_result["sql"]
+        sql_placeholder.code(sql, language="sql")
+    else:
+        sql = query
+
     with st.spinner("Executing query..."):
-        if mode == "Natural Language" and ai:
-            schema_info = _build_schema_info(db)
-            ai_result = ai.generate_sql(query, schema_info)
-            if "error" in ai_result:
-                st.error(f"SQL generation failed: {ai_result['error']}")
-                st.stop()
-            sql = ai_result["sql"]
-            st.code(sql, language="sql")
-        else:
-            sql = query
-
-        # Apply limit
-        sql_upper = sql.strip().upper()
-        if "LIMIT" not in sql_upper and sql_upper.startswith("SELECT"):
-            sql = f"{sql.rstrip(';')} LIMIT {limit}"
-
-        result = db.execute_query(sql)
+        sql = apply_limit(sql, limit)
+
+        # Arrow result, so the DataFrame is built from columns rather than boxed rows
+        result = db.execute_query(sql, arrow=True)
 
     if "error" in result:
+        st.session_state.last_result = None
         st.error(f"Query Error: {result['error']}")
         if "suggestion" in result:
             st.info(result["suggestion"])
@@ -101,57 +145,81 @@ if run and query.strip():
             generated_sql=sql if mode == "Natural Language" else None,
         )
 
-        # Display results
-        st.success(f"Returned {result['row_count']} rows in {result['execution_time_ms']}ms")
-
-        df = pd.DataFrame(result["rows"], columns=result["columns"])
-        st.dataframe(df, use_container_width=True, hide_index=True)
-
-        # Quick visualization
-        numeric_cols = df.select_dtypes(include=["number"]).columns.tolist()
-        if numeric_cols and len(df) > 1:
-            st.subheader("Quick Visualization")
-            chart_type = st.selectbox("Chart type", ["Bar", "Line", "Scatter"])
-            x_col = st.selectbox("X axis", df.columns.tolist())
-            y_col = st.selectbox("Y axis", numeric_cols)
-
-            if chart_type == "Bar":
-                st.bar_chart(df.set_index(x_col)[y_col])
-            elif chart_type == "Line":
-                st.line_chart(df.set_index(x_col)[y_col])
-            elif chart_type == "Scatter":
-                import plotly.express as px
-                fig = px.scatter(df, x=x_col, y=y_col, template="plotly_dark")
-                st.plotly_chart(fig, use_container_width=True)
-
-        # Download
-        csv = df.to_csv(index=False)
-        st.download_button("Download Results", csv, "query_results.csv", "text/csv")
+        table = result["arrow"] if result["arrow"] is not None else pa.table({})
+        # Thin long results to an even stride; more points than this aren't distinguishable
+        step = -(-table.num_rows // MAX_CHART_POINTS)
+        chart_table = table.take(pa.array(range(0, table.num_rows, step))) if step > 1 else table
+        # DECIMAL results (SUM over integers, explicit casts) would reach pandas as Decimal objects
+        chart_table = chart_table.cast(pa.schema([
+            pa.field(f.name, pa.float64()) if pa.types.is_decimal(f.type) else f for f in chart_table.schema
+        ]))
+        chart_df = chart_table.to_pandas()
+
+        # Everything derived from the result is kept here, so the chart controls can
+        # rerun the page without re-running the query. Only the preview and the chart
+        # points are converted to pandas; the full result stays in Arrow for the downloads.
+        st.session_state.last_result = {
+            "preview_df": table.slice(0, PREVIEW_ROWS).to_pandas(),
+            "row_count": result["row_count"],
+            "execution_time_ms": result["execution_time_ms"],
+            "numeric_cols": chart_df.select_dtypes(include="number").columns.tolist(),
+            "all_cols": table.column_names,
+            "chart_df": chart_df,
+            "chart_step": step,
+            # Download, written from the Arrow result by pyarrow's C++ writers
+            "csv": _to_csv(table),
+            "parquet": _to_parquet(table),
+        }
+
+# --- Results ---
+last = st.session_state.last_result
+if last is not None:
+    row_count = last["row_count"]
+    st.success(f"Returned {row_count} rows in {last['execution_time_ms']}ms")
+    st.dataframe(last["preview_df"], use_container_width=True, hide_index=True)
+    if row_count > PREVIEW_ROWS:
+        st.caption(f"Showing the first {PREVIEW_ROWS:,} of {row_count:,} rows. Downloads include every row.")
+
+    # Quick visualization
+    numeric_cols = last["numeric_cols"]
+    if numeric_cols and row_count > 1:
+        st.subheader("Quick Visualization")
+        chart_type = st.selectbox("Chart type", ["Bar", "Line", "Scatter"])
+        x_col = st.selectbox("X axis", last["all_cols"])
+        y_col = st.selectbox("Y axis", numeric_cols)
+
+        chart_df = last["chart_df"]
+        step = last["chart_step"]
+        if step > 1:
+            st.caption(f"Charting 1 in {step} rows ({len(chart_df):,} of {row_count:,} points).")
+
+        if chart_type == "Bar":
+            st.bar_chart(chart_df.set_index(x_col)[y_col])
+        elif chart_type == "Line":
+            st.line_chart(chart_df.set_index(x_col)[y_col])
+        elif chart_type == "Scatter":
+            import plotly.express as px
+            fig = px.scatter(chart_df, x=x_col, y=y_col, template="plotly_dark", render_mode="webgl")
+            st.plotly_chart(fig, use_container_width=True)
+
+    dl1, dl2 = st.columns(2)
+    with dl1:
+        st.download_button("Download Results", last["csv"], "query_results.csv", "text/csv")
+    with dl2:
+        st.download_button(
+            "Download as Parquet", last["parquet"], "query_results.parquet", "application/octet-stream"
+        )
 
 # --- Query History ---
 st.divider()
 st.subheader("Query History")
 history = query_history.get_history(limit=10)
 if history:
+    # Only opened entries render a body, as plain highlighted text rather than a JSON tree widget
     for entry in history:
         status = "✅" if entry["success"] else "❌"
-        with st.expander(f"{status} {entry['timestamp']} — {entry['query'][:80]}..."):
-            st.json(entry)
+        label = f"{status} {entry['timestamp']} — {entry['query'][:80]}..."
+        if st.toggle(label, key=f"history_{entry['timestamp_ms']}_{entry['id']}"):
+            st.code(json.dumps(entry, indent=2), language="json")
 else:
     st.caption("No queries executed yet.")
-
-
-def _build_schema_info(db) -> str:
-    """Build schema info string for AI."""
-    tables = db.get_tables()
-    views = db.get_views()
-    lines = []
-    for table in tables:
-        schema = db.get_schema(table["name"])
-        cols = ", ".join([f'{c["column"]} ({c["type"]})' for c in schema])
-        lines.append(f"TABLE {table['name']} ({table['row_count']} rows): {cols}")
-    for view_name in views:
-        schema = db.get_schema(view_name)
-        cols = ", ".join([f'{c["column"]} ({c["type"]})' for c in schema])
-        lines.append(f"VIEW {view_name}: {cols}")
-    return "\n".join(lines)
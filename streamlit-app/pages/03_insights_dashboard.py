@@ -4,6 +4,7 @@ Electric indigo/cyan neon theme · Bullet charts · Violin plots ·
 Stacked area · Scatter matrix · Completely different from Supply Chain
 """
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -11,14 +12,13 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import numpy as np
 
 project_root = str(Path(__file__).parent.parent.parent)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from mcp_server.utils.db_connector import create_connector
+from mcp_server.utils.db_connector import shared_connector
 from streamlit_app.components.metrics import format_currency, format_number
 
 st.set_page_config(
@@ -167,7 +167,7 @@ st.markdown("""
 # ─────────────────────────────────────────
 @st.cache_resource
 def get_db():
-    return create_connector()
+    return shared_connector()
 
 try:
     db = get_db()
@@ -175,30 +175,106 @@ except Exception as e:
     st.error(f"Database not available: {e}")
     st.stop()
 
+@st.cache_data(ttl=600)
+def load_sales_violin(_db):
+    # Up to 600 rows per category, so small categories keep a full violin. Ordering by
+    # a hash of the id draws the same sample on every refresh, on DuckDB and Snowflake alike.
+    return _db.execute_query_df("""
+        SELECT category, revenue FROM (
+            SELECT category, revenue,
+                   ROW_NUMBER() OVER (PARTITION BY category ORDER BY HASH(transaction_id)) AS rn
+            FROM sales WHERE category IS NOT NULL
+        ) WHERE rn <= 600
+    """)
+
+FRAME_QUERIES = {
+    # Typed as TIMESTAMP in SQL so both backends hand pandas datetime columns, not strings to parse
+    # monthly_revenue is split by region too, so both monthly frames roll it up in SQL
+    "monthly":   "SELECT CAST(month AS TIMESTAMP) AS month, category, SUM(total_revenue) AS total_revenue "
+                 "FROM monthly_revenue GROUP BY 1, 2 ORDER BY 1",
+    "monthly_totals": "SELECT CAST(month AS TIMESTAMP) AS month, SUM(total_revenue) AS revenue, "
+                      "SUM(total_profit) AS profit FROM monthly_revenue GROUP BY 1 ORDER BY 1",
+    "daily":     "SELECT CAST(date AS TIMESTAMP) AS date, revenue FROM daily_kpis ORDER BY date",
+    # Explicit ORDER BY ... LIMIT is a top-K in the database; an ORDER BY inside the view
+    # or a table's insertion order is not guaranteed to survive the outer query
+    "top_prods": "SELECT * FROM top_products ORDER BY total_revenue DESC LIMIT 20",
+    "customers": "SELECT * FROM customer_summary LIMIT 500",
+}
 @st.cache_data(ttl=60)
-def load_sales(_db):      return _db.execute_query_df("SELECT * FROM sales")
+def load_frames(_db):
+    # On a cold cache the queries run concurrently; the connector gives each worker its own cursor
+    with ThreadPoolExecutor(max_workers=len(FRAME_QUERIES)) as pool:
+        return dict(zip(FRAME_QUERIES, pool.map(_db.execute_query_df, FRAME_QUERIES.values())))
+
+# Aggregates are computed by the database, so only the grouped rows come back
+def fetch_row(_db, sql):
+    """First row of a single-row aggregate as a dict, without building a DataFrame."""
+    result = _db.execute_query(sql)
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return dict(zip(result["columns"], result["rows"][0]))
 @st.cache_data(ttl=60)
-def load_monthly(_db):    return _db.execute_query_df("SELECT * FROM monthly_revenue ORDER BY month")
+def load_kpis(_db):
+    return fetch_row(_db, """
+        SELECT SUM(revenue) AS total_rev, SUM(profit) AS total_profit, COUNT(*) AS total_txns,
+               AVG(revenue) AS avg_order, COUNT(DISTINCT customer_id) AS unique_cust
+        FROM sales
+    """)
 @st.cache_data(ttl=60)
-def load_daily(_db):      return _db.execute_query_df("SELECT * FROM daily_kpis ORDER BY date")
+def load_cat_agg(_db):
+    return _db.execute_query_df("""
+        SELECT category, SUM(revenue) AS revenue, SUM(cost) AS cost, SUM(profit) AS profit
+        FROM sales WHERE category IS NOT NULL GROUP BY category
+    """)
 @st.cache_data(ttl=60)
-def load_top_prod(_db):   return _db.execute_query_df("SELECT * FROM top_products LIMIT 20")
+def load_segment_mix(_db):
+    # Segment x channel and segment x region revenue from one scan, split on GROUPING()
+    mix = _db.execute_query_df("""
+        SELECT customer_segment, sales_channel, region, SUM(revenue) AS revenue,
+               GROUPING(sales_channel) = 0 AS by_channel
+        FROM sales WHERE customer_segment IS NOT NULL
+        GROUP BY GROUPING SETS ((customer_segment, sales_channel), (customer_segment, region))
+    """)
+    by_channel = mix["by_channel"].astype(bool)
+    seg_chan = mix.loc[by_channel, ["customer_segment","sales_channel","revenue"]].dropna().reset_index(drop=True)
+    seg_region = mix.loc[~by_channel, ["customer_segment","region","revenue"]].dropna().reset_index(drop=True)
+    return seg_chan, seg_region
 @st.cache_data(ttl=60)
-def load_customers(_db):  return _db.execute_query_df("SELECT * FROM customer_summary LIMIT 500")
-
-sales     = load_sales(db)
-monthly   = load_monthly(db)
-daily     = load_daily(db)
-top_prods = load_top_prod(db)
-customers = load_customers(db)
+def load_dow_avg(_db):
+    # DAYOFWEEK counts from Sunday = 0 on both DuckDB and Snowflake
+    return _db.execute_query_df(
+        "SELECT DAYOFWEEK(date) AS dow, AVG(revenue) AS avg_revenue FROM daily_kpis GROUP BY 1"
+    )
+@st.cache_data(ttl=60)
+def load_insights(_db):
+    # Every auto-insight scalar in one round-trip: the top value of each dimension
+    # plus the weekend/weekday order averages
+    top = "(SELECT {0} FROM sales WHERE {0} IS NOT NULL GROUP BY 1 ORDER BY SUM(revenue) DESC LIMIT 1)"
+    return fetch_row(_db, f"""
+        SELECT {top.format('category')} AS top_cat,
+               {top.format('sales_channel')} AS top_chan,
+               {top.format('region')} AS top_region,
+               {top.format('customer_segment')} AS top_seg,
+               AVG(CASE WHEN DAYOFWEEK(transaction_date) IN (0, 6) THEN revenue END) AS weekend_rev,
+               AVG(CASE WHEN DAYOFWEEK(transaction_date) NOT IN (0, 6) THEN revenue END) AS weekday_rev
+        FROM sales
+    """)
+
+frames    = load_frames(db)
+monthly   = frames["monthly"]
+monthly_totals = frames["monthly_totals"]
+daily     = frames["daily"]
+top_prods = frames["top_prods"]
+customers = frames["customers"]
 
 # Base KPIs
-total_rev    = sales["revenue"].sum()
-total_profit = sales["profit"].sum()
-total_txns   = len(sales)
-avg_order    = sales["revenue"].mean()
+kpis         = load_kpis(db)
+total_rev    = kpis["total_rev"] if pd.notna(kpis["total_rev"]) else 0
+total_profit = kpis["total_profit"] if pd.notna(kpis["total_profit"]) else 0
+total_txns   = int(kpis["total_txns"])
+avg_order    = kpis["avg_order"]
 margin       = (total_profit / total_rev * 100) if total_rev > 0 else 0
-unique_cust  = sales["customer_id"].nunique()
+unique_cust  = int(kpis["unique_cust"])
 
 # Chart theme
 BG   = "rgba(0,0,0,0)"
@@ -213,11 +289,382 @@ CT   = dict(
     legend=dict(bgcolor=BG, font=dict(color="#6b7280"), orientation="h", y=-0.18),
     hoverlabel=dict(bgcolor="#12102a", font_color="#e2e8f0", bordercolor="#312e81"),
 )
+# Category palette, with the translucent variants the area and violin traces use
+PALETTE        = ["#7c3aed","#00d4ff","#a3e635","#fb923c","#f43f5e"]
+PALETTE_RGB    = [tuple(int(c[j:j+2], 16) for j in (1, 3, 5)) for c in PALETTE]
+PALETTE_FILL   = [f"rgba({r},{g},{b},0.65)" for r, g, b in PALETTE_RGB]
+PALETTE_LINE   = [f"rgba({r},{g},{b},0.9)" for r, g, b in PALETTE_RGB]
+PALETTE_VIOLIN = [f"rgba({r},{g},{b},0.2)" for r, g, b in PALETTE_RGB]
+
 def th(fig, h=None):
     fig.update_layout(**CT)
     if h: fig.update_layout(height=h)
     return fig
 
+MAX_TREND_POINTS = 1500
+
+def lttb(x, y, n_out=MAX_TREND_POINTS):
+    """Indices of a Largest-Triangle-Three-Buckets downsample of (x, y) to n_out points.
+
+    Keeps the first and last points and, from each bucket in between, the point
+    forming the largest triangle with the previous pick and the next bucket's mean,
+    so peaks and troughs survive the reduction.
+    """
+    size = len(x)
+    if n_out >= size or n_out < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, size - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, size - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (size - 1, size)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        idx[i + 1] = a
+    return idx
+
+# ─────────────────────────────────────────
+# CHART BUILDERS — cached on their (small, aggregated) inputs, so a rerun
+# with unchanged data reuses the finished figure. Resource caching shares
+# one figure object across sessions; callers only render it, never mutate it.
+# ─────────────────────────────────────────
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_bullet_fig(total_rev, total_profit, margin, avg_order):
+    targets = {
+        "Revenue":    (total_rev,    total_rev * 1.15, "M", 1e6),
+        "Profit":     (total_profit, total_profit * 1.2, "M", 1e6),
+        "Margin %":   (margin,       45,              "%", 1),
+        "Avg Order":  (avg_order,    avg_order * 1.1, "",  1),
+    }
+
+    # Traces are collected and handed to the figure once, rather than added one at a time
+    traces = []
+    for i, (label, (actual, target, suffix, div)) in enumerate(targets.items()):
+        traces.append(go.Indicator(
+            mode="number+gauge+delta",
+            value=actual / div,
+            delta=dict(reference=target / div, relative=True,
+                       increasing=dict(color="#a3e635"),
+                       decreasing=dict(color="#f43f5e"),
+                       font=dict(size=12)),
+            number=dict(suffix=suffix, font=dict(size=18, color="#e2e8f0"),
+                        valueformat=",.1f"),
+            title=dict(text=label, font=dict(size=12, color="#6366f1")),
+            gauge=dict(
+                shape="bullet",
+                axis=dict(range=[0, target / div * 1.2],
+                          tickfont=dict(size=9, color="#4b5563")),
+                bar=dict(color="#7c3aed", thickness=0.45),
+                bgcolor="#12102a",
+                borderwidth=0,
+                steps=[dict(range=[0, target / div * 0.7], color="#0d0d1a"),
+                       dict(range=[target / div * 0.7, target / div], color="#1e1b4b")],
+                threshold=dict(line=dict(color="#00d4ff", width=2),
+                               thickness=0.9, value=target / div),
+            ),
+            domain=dict(x=[0, 1], y=[i / len(targets), (i + 0.8) / len(targets)]),
+        ))
+
+    fig_b = go.Figure(data=traces, layout={**CT, "height": 220, "margin": dict(l=120, r=40, t=10, b=10)})
+    return fig_b
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_stacked_area(monthly):
+    pivot = monthly.pivot(
+        index="month", columns="category", values="total_revenue"
+    ).fillna(0).reset_index()
+
+    cats   = [c for c in pivot.columns if c != "month"]
+    traces = []
+    for i, cat in enumerate(cats):
+        traces.append(go.Scatter(
+            x=pivot["month"], y=pivot[cat],
+            name=cat, stackgroup="one",
+            fillcolor=PALETTE_FILL[i % len(PALETTE)],
+            line=dict(width=0, color=PALETTE_LINE[i % len(PALETTE)]),
+            hovertemplate=f"<b>{cat}</b><br>%{{x|%b %Y}}<br>${{y:,.0f}}<extra></extra>",
+        ))
+    fig_sa = th(go.Figure(data=traces), 320)
+    fig_sa.update_layout(
+        yaxis=dict(tickprefix="$"),
+        hovermode="x unified",
+    )
+    return fig_sa
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_violin(sample, cats_list):
+    traces = []
+    for i, cat in enumerate(cats_list):
+        sub = sample[sample["category"] == cat]["revenue"]
+        traces.append(go.Violin(
+            y=sub, name=cat, box_visible=True,
+            meanline_visible=True,
+            fillcolor=PALETTE_VIOLIN[i % len(PALETTE)],
+            line_color=PALETTE[i % len(PALETTE)],
+            points=False,
+        ))
+    fig_v = th(go.Figure(data=traces), 320)
+    fig_v.update_layout(
+        yaxis=dict(tickprefix="$", type="log", title="Revenue (log scale)"),
+        violingap=0.2, violinmode="overlay",
+    )
+    return fig_v
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_top_products(top_prods):
+    tp = top_prods.head(15).sort_values("total_revenue")
+    alphas = 0.15 + 0.65 * (tp["total_revenue"] / tp["total_revenue"].max())
+    fig = go.Figure()
+    # Revenue bars (outline style)
+    fig.add_trace(go.Bar(
+        y=tp["product_name"], x=tp["total_revenue"],
+        orientation="h", name="Revenue",
+        marker=dict(
+            color=[f"rgba(124,58,237,{a})" for a in alphas],
+            line=dict(color="#7c3aed", width=1.5),
+        ),
+        hovertemplate="%{y}<br>Revenue: $%{x:,.0f}<extra></extra>",
+    ))
+    # Profit overlay
+    fig.add_trace(go.Bar(
+        y=tp["product_name"], x=tp["total_profit"],
+        orientation="h", name="Profit",
+        marker=dict(color="#00d4ff", opacity=0.85),
+        hovertemplate="%{y}<br>Profit: $%{x:,.0f}<extra></extra>",
+    ))
+    th(fig, 460)
+    fig.update_layout(
+        barmode="overlay",
+        yaxis=dict(gridcolor="rgba(0,0,0,0)"),
+        xaxis=dict(tickprefix="$"),
+    )
+    return fig
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_product_scatter(top_prods):
+    fig2 = px.scatter(
+        top_prods, x="total_revenue", y="total_profit",
+        size="times_sold", color="category",
+        hover_name="product_name",
+        size_max=40,
+        render_mode="webgl",
+        color_discrete_sequence=PALETTE,
+    )
+    # 45° reference line
+    max_v = max(top_prods["total_revenue"].max(), top_prods["total_profit"].max())
+    fig2.add_shape(type="line", x0=0, y0=0, x1=max_v, y1=max_v,
+                    line=dict(color=GRID, dash="dot", width=1))
+    fig2.update_traces(marker=dict(line=dict(width=1.5, color="#07070f")))
+    th(fig2, 460)
+    fig2.update_layout(
+        xaxis=dict(tickprefix="$"),
+        yaxis=dict(tickprefix="$"),
+    )
+    return fig2
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_category_margin(cat_agg):
+    cat_agg = cat_agg.assign(margin_pct=(cat_agg["profit"] / cat_agg["revenue"] * 100).round(1))
+    cat_agg = cat_agg.sort_values("revenue", ascending=True)
+
+    # Plain figure with an overlaid second y axis; make_subplots' grid is not needed for one panel
+    fig3 = go.Figure()
+    fig3.add_trace(go.Bar(
+        y=cat_agg["category"], x=cat_agg["revenue"],
+        orientation="h", name="Revenue",
+        marker=dict(color="rgba(124,58,237,0.25)", line=dict(color="#7c3aed", width=1.5)),
+    ))
+    fig3.add_trace(go.Bar(
+        y=cat_agg["category"], x=cat_agg["cost"],
+        orientation="h", name="Cost",
+        marker=dict(color="rgba(244,63,94,0.3)", line=dict(color="#f43f5e", width=1)),
+    ))
+    fig3.add_trace(go.Scatter(
+        y=cat_agg["category"], x=cat_agg["margin_pct"],
+        mode="markers+text", name="Margin %",
+        marker=dict(symbol="diamond", size=14, color="#a3e635",
+                    line=dict(width=2, color="#07070f")),
+        text=[f"{v}%" for v in cat_agg["margin_pct"]],
+        textposition="middle right",
+        textfont=dict(size=11, color="#a3e635"),
+        yaxis="y2",
+    ))
+    th(fig3, 300)
+    fig3.update_layout(
+        barmode="overlay",
+        yaxis=dict(gridcolor="rgba(0,0,0,0)"),
+        xaxis=dict(tickprefix="$"),
+        yaxis2=dict(gridcolor="rgba(0,0,0,0)", overlaying="y", side="right",
+                    ticksuffix="%", range=[0, 100]),
+    )
+    return fig3
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_heatmap(seg_chan):
+    pivot_sc = seg_chan.pivot(index="customer_segment", columns="sales_channel", values="revenue").fillna(0)
+
+    fig = go.Figure(go.Heatmap(
+        z=pivot_sc.values,
+        x=pivot_sc.columns.tolist(),
+        y=pivot_sc.index.tolist(),
+        colorscale=[[0,"#07070f"],[0.3,"#1e1b4b"],[0.7,"#4f46e5"],[1,"#7c3aed"]],
+        text=[[f"${v/1000:.0f}K" for v in row] for row in pivot_sc.values],
+        texttemplate="%{text}",
+        textfont=dict(size=12, color="white"),
+        hovertemplate="Segment: %{y}<br>Channel: %{x}<br>Revenue: $%{z:,.0f}<extra></extra>",
+        showscale=True,
+        colorbar=dict(tickfont=dict(color="#4b5563"), bgcolor=BG,
+                      outlinecolor=GRID, tickprefix="$"),
+        xgap=4, ygap=4,
+    ))
+    th(fig, 300)
+    fig.update_layout(
+        xaxis=dict(side="top", showgrid=False, linecolor="rgba(0,0,0,0)"),
+        yaxis=dict(showgrid=False, linecolor="rgba(0,0,0,0)"),
+    )
+    return fig
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_sunburst(seg_region):
+    fig2 = px.sunburst(
+        seg_region, path=["customer_segment","region"], values="revenue",
+        color="revenue",
+        color_continuous_scale=[[0,"#1e1b4b"],[0.5,"#4f46e5"],[1,"#7c3aed"]],
+    )
+    fig2.update_traces(
+        textfont=dict(size=11, color="#e2e8f0"),
+        insidetextorientation="radial",
+        marker=dict(line=dict(width=2, color="#07070f")),
+    )
+    th(fig2, 300)
+    fig2.update_layout(coloraxis_showscale=False)
+    return fig2
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_top_customers(customers):
+    top_cust = customers.head(15)[
+        ["company_name","segment","region","total_orders","lifetime_revenue","avg_order_value"]
+    ].copy().dropna(subset=["company_name"])
+    top_cust["lifetime_revenue"] = top_cust["lifetime_revenue"].round(0)
+    top_cust["avg_order_value"]  = top_cust["avg_order_value"].round(0)
+
+    fig3 = go.Figure(go.Bar(
+        y=top_cust["company_name"].str[:22],
+        x=top_cust["lifetime_revenue"],
+        orientation="h",
+        marker=dict(
+            color=top_cust["lifetime_revenue"],
+            colorscale=[[0,"#1e1b4b"],[1,"#7c3aed"]],
+            showscale=False,
+            line=dict(width=0),
+        ),
+        text=[f"${v/1000:.0f}K" for v in top_cust["lifetime_revenue"]],
+        textposition="outside",
+        textfont=dict(size=10, color="#6366f1"),
+        hovertemplate="%{y}<br>Revenue: $%{x:,.0f}<extra></extra>",
+    ))
+    th(fig3, 380)
+    fig3.update_layout(
+        yaxis=dict(autorange="reversed", gridcolor="rgba(0,0,0,0)"),
+        xaxis=dict(tickprefix="$"),
+    )
+    return fig3
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_daily_fig(daily):
+    daily_s = daily.copy()
+    daily_s["rolling_30"] = daily_s["revenue"].rolling(30, min_periods=1).mean()
+    daily_s["rolling_7"]  = daily_s["revenue"].rolling(7,  min_periods=1).mean()
+
+    # Long histories are reduced per series with LTTB; the cached frame keeps full resolution
+    x_ns = daily_s["date"].to_numpy().astype("datetime64[ns]").view("int64")
+    def reduced(col):
+        idx = lttb(x_ns, daily_s[col].to_numpy())
+        return daily_s["date"].iloc[idx], daily_s[col].iloc[idx]
+
+    fig = go.Figure()
+    rx, ry = reduced("revenue")
+    fig.add_trace(go.Bar(
+        x=rx, y=ry,
+        name="Daily Revenue",
+        marker=dict(color="rgba(124,58,237,0.25)", line=dict(width=0)),
+        hovertemplate="%{x|%b %d, %Y}<br>$%{y:,.0f}<extra></extra>",
+    ))
+    rx, ry = reduced("rolling_7")
+    fig.add_trace(go.Scattergl(
+        x=rx, y=ry,
+        name="7-Day Avg", line=dict(color="#00d4ff", width=1.5, dash="dot"),
+    ))
+    rx, ry = reduced("rolling_30")
+    fig.add_trace(go.Scattergl(
+        x=rx, y=ry,
+        name="30-Day Avg", line=dict(color="#7c3aed", width=2.5),
+        fill="tonexty", fillcolor="rgba(124,58,237,0.06)",
+    ))
+    th(fig, 300)
+    fig.update_layout(yaxis=dict(tickprefix="$"), hovermode="x unified")
+    return fig
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_dow_fig(dow_avg):
+    dow_names = ["Sunday","Monday","Tuesday","Wednesday","Thursday","Friday","Saturday"]
+    dow = dow_avg.set_index("dow")["avg_revenue"].reindex([1, 2, 3, 4, 5, 6, 0]).reset_index()
+    dow.columns = ["day","avg_revenue"]
+    dow["day"] = [dow_names[d] for d in dow["day"]]
+
+    fig2 = go.Figure(go.Bar(
+        x=dow["day"], y=dow["avg_revenue"],
+        marker=dict(
+            color=dow["avg_revenue"],
+            colorscale=[[0,"#1e1b4b"],[1,"#7c3aed"]],
+            showscale=False,
+            line=dict(width=0),
+        ),
+        text=[f"${v/1000:.0f}K" for v in dow["avg_revenue"]],
+        textposition="outside",
+        textfont=dict(size=10, color="#6366f1"),
+    ))
+    th(fig2, 300)
+    fig2.update_layout(yaxis=dict(tickprefix="$"))
+    return fig2
+
+@st.cache_resource(ttl=60, max_entries=8, show_spinner=False)
+def build_monthly_scatter(monthly_totals):
+    monthly_agg = monthly_totals.assign(
+        margin=(monthly_totals["profit"] / monthly_totals["revenue"] * 100).round(1),
+        month_label=monthly_totals["month"].dt.strftime("%b %Y"),
+    )
+
+    fig3 = px.scatter(
+        monthly_agg, x="revenue", y="profit",
+        size="margin", color="margin",
+        hover_name="month_label",
+        text="month_label",
+        color_continuous_scale=[[0,"#f43f5e"],[0.5,"#fb923c"],[1,"#a3e635"]],
+        size_max=30,
+    )
+    fig3.update_traces(
+        textposition="top center",
+        textfont=dict(size=9, color="#4b5563"),
+        marker=dict(line=dict(width=1.5, color="#07070f")),
+    )
+    th(fig3, 300)
+    fig3.update_layout(
+        xaxis=dict(tickprefix="$"),
+        yaxis=dict(tickprefix="$"),
+        coloraxis_colorbar=dict(
+            title="Margin %",
+            tickfont=dict(color="#4b5563"),
+            bgcolor=BG, outlinecolor=GRID,
+        ),
+    )
+    return fig3
+
 # ─────────────────────────────────────────
 # BANNER
 # ─────────────────────────────────────────
@@ -287,103 +734,20 @@ with t1:
     # ── Bullet charts: KPI vs target ──
     st.markdown('<div class="sl">KPI vs Target — Bullet Charts</div>', unsafe_allow_html=True)
 
-    targets = {
-        "Revenue":    (total_rev,    total_rev * 1.15, "M", 1e6),
-        "Profit":     (total_profit, total_profit * 1.2, "M", 1e6),
-        "Margin %":   (margin,       45,              "%", 1),
-        "Avg Order":  (avg_order,    avg_order * 1.1, "",  1),
-    }
-
-    fig_b = go.Figure()
-    for i, (label, (actual, target, suffix, div)) in enumerate(targets.items()):
-        fig_b.add_trace(go.Indicator(
-            mode="number+gauge+delta",
-            value=actual / div,
-            delta=dict(reference=target / div, relative=True,
-                       increasing=dict(color="#a3e635"),
-                       decreasing=dict(color="#f43f5e"),
-                       font=dict(size=12)),
-            number=dict(suffix=suffix, font=dict(size=18, color="#e2e8f0"),
-                        valueformat=",.1f"),
-            title=dict(text=label, font=dict(size=12, color="#6366f1")),
-            gauge=dict(
-                shape="bullet",
-                axis=dict(range=[0, target / div * 1.2],
-                          tickfont=dict(size=9, color="#4b5563")),
-                bar=dict(color="#7c3aed", thickness=0.45),
-                bgcolor="#12102a",
-                borderwidth=0,
-                steps=[dict(range=[0, target / div * 0.7], color="#0d0d1a"),
-                       dict(range=[target / div * 0.7, target / div], color="#1e1b4b")],
-                threshold=dict(line=dict(color="#00d4ff", width=2),
-                               thickness=0.9, value=target / div),
-            ),
-            domain=dict(x=[0, 1], y=[i / len(targets), (i + 0.8) / len(targets)]),
-        ))
-
-    fig_b.update_layout(**CT, height=220,
-        margin=dict(l=120, r=40, t=10, b=10))
-    st.plotly_chart(fig_b, use_container_width=True)
+    st.plotly_chart(build_bullet_fig(total_rev, total_profit, margin, avg_order), use_container_width=True)
 
     # ── Revenue by category — stacked area ──
     st.markdown('<div class="sl" style="margin-top:8px">Monthly Revenue by Category — Stacked Area</div>', unsafe_allow_html=True)
 
     if not monthly.empty:
-        monthly["month"] = pd.to_datetime(monthly["month"].astype(str))
-        pivot = monthly.pivot_table(
-            index="month", columns="category", values="total_revenue", aggfunc="sum"
-        ).fillna(0).reset_index()
-
-        fig_sa = go.Figure()
-        colors = ["#7c3aed","#00d4ff","#a3e635","#fb923c","#f43f5e"]
-        cats   = [c for c in pivot.columns if c != "month"]
-        for i, cat in enumerate(cats):
-            fig_sa.add_trace(go.Scatter(
-                x=pivot["month"], y=pivot[cat],
-                name=cat, stackgroup="one",
-                fillcolor=colors[i % len(colors)].replace(")", ",0.7)").replace("#", "rgba(").replace("rgba(", "rgba(") if False else colors[i % len(colors)],
-                line=dict(width=0),
-                hovertemplate=f"<b>{cat}</b><br>%{{x|%b %Y}}<br>${{y:,.0f}}<extra></extra>",
-            ))
-        th(fig_sa, 320)
-        fig_sa.update_layout(
-            yaxis=dict(tickprefix="$"),
-            hovermode="x unified",
-        )
-        # Fix fill colors to have transparency
-        for i, trace in enumerate(fig_sa.data):
-            c = colors[i % len(colors)]
-            r = int(c[1:3], 16)
-            g = int(c[3:5], 16)
-            b = int(c[5:7], 16)
-            trace.fillcolor = f"rgba({r},{g},{b},0.65)"
-            trace.line.color = f"rgba({r},{g},{b},0.9)"
-
-        st.plotly_chart(fig_sa, use_container_width=True)
+        st.plotly_chart(build_stacked_area(monthly), use_container_width=True)
 
     # ── Profit distribution — violin ──
     st.markdown('<div class="sl">Revenue Distribution by Category — Violin</div>', unsafe_allow_html=True)
 
-    sample = sales.sample(min(3000, len(sales)), random_state=42)
-    fig_v = go.Figure()
-    cats_list = sorted(sales["category"].dropna().unique())
-    colors_v  = ["#7c3aed","#00d4ff","#a3e635","#fb923c","#f43f5e"]
-    for i, cat in enumerate(cats_list):
-        sub = sample[sample["category"] == cat]["revenue"]
-        r,g,b = (int(colors_v[i%len(colors_v)][j:j+2],16) for j in (1,3,5))
-        fig_v.add_trace(go.Violin(
-            y=sub, name=cat, box_visible=True,
-            meanline_visible=True,
-            fillcolor=f"rgba({r},{g},{b},0.2)",
-            line_color=colors_v[i % len(colors_v)],
-            points=False,
-        ))
-    th(fig_v, 320)
-    fig_v.update_layout(
-        yaxis=dict(tickprefix="$", type="log", title="Revenue (log scale)"),
-        violingap=0.2, violinmode="overlay",
-    )
-    st.plotly_chart(fig_v, use_container_width=True)
+    sample = load_sales_violin(db)
+    cats_list = sorted(load_cat_agg(db)["category"])
+    st.plotly_chart(build_violin(sample, cats_list), use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -398,94 +762,16 @@ with t2:
 
     with col1:
         st.markdown('<div class="sl">Top Products — Revenue with Profit Delta</div>', unsafe_allow_html=True)
-        tp = top_prods.head(15).sort_values("total_revenue")
-        fig = go.Figure()
-        # Revenue bars (outline style)
-        fig.add_trace(go.Bar(
-            y=tp["product_name"], x=tp["total_revenue"],
-            orientation="h", name="Revenue",
-            marker=dict(
-                color=[f"rgba(124,58,237,{0.15 + 0.65*(v/tp['total_revenue'].max())})"
-                       for v in tp["total_revenue"]],
-                line=dict(color="#7c3aed", width=1.5),
-            ),
-            hovertemplate="%{y}<br>Revenue: $%{x:,.0f}<extra></extra>",
-        ))
-        # Profit overlay
-        fig.add_trace(go.Bar(
-            y=tp["product_name"], x=tp["total_profit"],
-            orientation="h", name="Profit",
-            marker=dict(color="#00d4ff", opacity=0.85),
-            hovertemplate="%{y}<br>Profit: $%{x:,.0f}<extra></extra>",
-        ))
-        th(fig, 460)
-        fig.update_layout(
-            barmode="overlay",
-            yaxis=dict(gridcolor="rgba(0,0,0,0)"),
-            xaxis=dict(tickprefix="$"),
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_top_products(top_prods), use_container_width=True)
 
     with col2:
         st.markdown('<div class="sl">Revenue vs Profit Scatter</div>', unsafe_allow_html=True)
-        fig2 = px.scatter(
-            top_prods, x="total_revenue", y="total_profit",
-            size="times_sold", color="category",
-            hover_name="product_name",
-            size_max=40,
-            color_discrete_sequence=["#7c3aed","#00d4ff","#a3e635","#fb923c","#f43f5e"],
-        )
-        # 45° reference line
-        max_v = max(top_prods["total_revenue"].max(), top_prods["total_profit"].max())
-        fig2.add_shape(type="line", x0=0, y0=0, x1=max_v, y1=max_v,
-                        line=dict(color=GRID, dash="dot", width=1))
-        fig2.update_traces(marker=dict(line=dict(width=1.5, color="#07070f")))
-        th(fig2, 460)
-        fig2.update_layout(
-            xaxis=dict(tickprefix="$"),
-            yaxis=dict(tickprefix="$"),
-        )
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(build_product_scatter(top_prods), use_container_width=True)
 
     # Category margin comparison — horizontal bullet-like grouped bars
     st.markdown('<div class="sl">Category — Revenue, Cost & Margin</div>', unsafe_allow_html=True)
-    cat_agg = sales.groupby("category").agg(
-        revenue=("revenue","sum"),
-        cost=("cost","sum"),
-        profit=("profit","sum"),
-    ).reset_index()
-    cat_agg["margin_pct"] = (cat_agg["profit"] / cat_agg["revenue"] * 100).round(1)
-    cat_agg = cat_agg.sort_values("revenue", ascending=True)
-
-    fig3 = make_subplots(specs=[[{"secondary_y": True}]])
-    fig3.add_trace(go.Bar(
-        y=cat_agg["category"], x=cat_agg["revenue"],
-        orientation="h", name="Revenue",
-        marker=dict(color="rgba(124,58,237,0.25)", line=dict(color="#7c3aed", width=1.5)),
-    ), secondary_y=False)
-    fig3.add_trace(go.Bar(
-        y=cat_agg["category"], x=cat_agg["cost"],
-        orientation="h", name="Cost",
-        marker=dict(color="rgba(244,63,94,0.3)", line=dict(color="#f43f5e", width=1)),
-    ), secondary_y=False)
-    fig3.add_trace(go.Scatter(
-        y=cat_agg["category"], x=cat_agg["margin_pct"],
-        mode="markers+text", name="Margin %",
-        marker=dict(symbol="diamond", size=14, color="#a3e635",
-                    line=dict(width=2, color="#07070f")),
-        text=[f"{v}%" for v in cat_agg["margin_pct"]],
-        textposition="middle right",
-        textfont=dict(size=11, color="#a3e635"),
-    ), secondary_y=True)
-    th(fig3, 300)
-    fig3.update_layout(
-        barmode="overlay",
-        yaxis=dict(gridcolor="rgba(0,0,0,0)"),
-        xaxis=dict(tickprefix="$"),
-        yaxis2=dict(gridcolor="rgba(0,0,0,0)", overlaying="y", side="right",
-                    ticksuffix="%", range=[0, 100]),
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    cat_agg = load_cat_agg(db)
+    st.plotly_chart(build_category_margin(cat_agg), use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -495,82 +781,21 @@ with t2:
 # ══════════════════════════════════════════
 with t3:
     st.markdown('<div class="panel">', unsafe_allow_html=True)
+    seg_chan, seg_region = load_segment_mix(db)
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('<div class="sl">Revenue by Segment × Channel — Heatmap</div>', unsafe_allow_html=True)
-        seg_chan = sales.groupby(["customer_segment","sales_channel"])["revenue"].sum().reset_index()
-        seg_chan = seg_chan.dropna()
-        pivot_sc = seg_chan.pivot(index="customer_segment", columns="sales_channel", values="revenue").fillna(0)
-
-        fig = go.Figure(go.Heatmap(
-            z=pivot_sc.values,
-            x=pivot_sc.columns.tolist(),
-            y=pivot_sc.index.tolist(),
-            colorscale=[[0,"#07070f"],[0.3,"#1e1b4b"],[0.7,"#4f46e5"],[1,"#7c3aed"]],
-            text=[[f"${v/1000:.0f}K" for v in row] for row in pivot_sc.values],
-            texttemplate="%{text}",
-            textfont=dict(size=12, color="white"),
-            hovertemplate="Segment: %{y}<br>Channel: %{x}<br>Revenue: $%{z:,.0f}<extra></extra>",
-            showscale=True,
-            colorbar=dict(tickfont=dict(color="#4b5563"), bgcolor=BG,
-                          outlinecolor=GRID, tickprefix="$"),
-            xgap=4, ygap=4,
-        ))
-        th(fig, 300)
-        fig.update_layout(
-            xaxis=dict(side="top", showgrid=False, linecolor="rgba(0,0,0,0)"),
-            yaxis=dict(showgrid=False, linecolor="rgba(0,0,0,0)"),
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_heatmap(seg_chan), use_container_width=True)
 
     with col2:
         st.markdown('<div class="sl">Segment Mix — Sunburst</div>', unsafe_allow_html=True)
-        seg_region = sales.groupby(["customer_segment","region"])["revenue"].sum().reset_index().dropna()
-        fig2 = px.sunburst(
-            seg_region, path=["customer_segment","region"], values="revenue",
-            color="revenue",
-            color_continuous_scale=[[0,"#1e1b4b"],[0.5,"#4f46e5"],[1,"#7c3aed"]],
-        )
-        fig2.update_traces(
-            textfont=dict(size=11, color="#e2e8f0"),
-            insidetextorientation="radial",
-            marker=dict(line=dict(width=2, color="#07070f")),
-        )
-        th(fig2, 300)
-        fig2.update_layout(coloraxis_showscale=False)
-        st.plotly_chart(fig2, use_container_width=True)
+        st.plotly_chart(build_sunburst(seg_region), use_container_width=True)
 
     # Top customers table with sparkline indicator
     st.markdown('<div class="sl">Top 15 Customers by Lifetime Revenue</div>', unsafe_allow_html=True)
-    top_cust = customers.head(15)[
-        ["company_name","segment","region","total_orders","lifetime_revenue","avg_order_value"]
-    ].copy().dropna(subset=["company_name"])
-    top_cust["lifetime_revenue"] = top_cust["lifetime_revenue"].round(0)
-    top_cust["avg_order_value"]  = top_cust["avg_order_value"].round(0)
-
-    fig3 = go.Figure(go.Bar(
-        y=top_cust["company_name"].str[:22],
-        x=top_cust["lifetime_revenue"],
-        orientation="h",
-        marker=dict(
-            color=top_cust["lifetime_revenue"],
-            colorscale=[[0,"#1e1b4b"],[1,"#7c3aed"]],
-            showscale=False,
-            line=dict(width=0),
-        ),
-        text=[f"${v/1000:.0f}K" for v in top_cust["lifetime_revenue"]],
-        textposition="outside",
-        textfont=dict(size=10, color="#6366f1"),
-        hovertemplate="%{y}<br>Revenue: $%{x:,.0f}<extra></extra>",
-    ))
-    th(fig3, 380)
-    fig3.update_layout(
-        yaxis=dict(autorange="reversed", gridcolor="rgba(0,0,0,0)"),
-        xaxis=dict(tickprefix="$"),
-    )
-    st.plotly_chart(fig3, use_container_width=True)
+    st.plotly_chart(build_top_customers(customers), use_container_width=True)
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -584,103 +809,31 @@ with t4:
     # Daily revenue with rolling average
     st.markdown('<div class="sl">Daily Revenue — With 30-Day Rolling Average</div>', unsafe_allow_html=True)
     if not daily.empty:
-        daily["date"] = pd.to_datetime(daily["date"])
-        daily_s = daily.sort_values("date").copy()
-        daily_s["rolling_30"] = daily_s["revenue"].rolling(30, min_periods=1).mean()
-        daily_s["rolling_7"]  = daily_s["revenue"].rolling(7,  min_periods=1).mean()
-
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=daily_s["date"], y=daily_s["revenue"],
-            name="Daily Revenue",
-            marker=dict(color="rgba(124,58,237,0.25)", line=dict(width=0)),
-            hovertemplate="%{x|%b %d, %Y}<br>$%{y:,.0f}<extra></extra>",
-        ))
-        fig.add_trace(go.Scatter(
-            x=daily_s["date"], y=daily_s["rolling_7"],
-            name="7-Day Avg", line=dict(color="#00d4ff", width=1.5, dash="dot"),
-        ))
-        fig.add_trace(go.Scatter(
-            x=daily_s["date"], y=daily_s["rolling_30"],
-            name="30-Day Avg", line=dict(color="#7c3aed", width=2.5),
-            fill="tonexty", fillcolor="rgba(124,58,237,0.06)",
-        ))
-        th(fig, 300)
-        fig.update_layout(yaxis=dict(tickprefix="$"), hovermode="x unified")
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(build_daily_fig(daily), use_container_width=True)
 
     col1, col2 = st.columns(2)
 
     with col1:
         st.markdown('<div class="sl">Revenue by Day of Week</div>', unsafe_allow_html=True)
         if not daily.empty:
-            daily_s["dow"] = daily_s["date"].dt.day_name()
-            dow_order = ["Monday","Tuesday","Wednesday","Thursday","Friday","Saturday","Sunday"]
-            dow = daily_s.groupby("dow")["revenue"].mean().reindex(dow_order).reset_index()
-            dow.columns = ["day","avg_revenue"]
-
-            fig2 = go.Figure(go.Bar(
-                x=dow["day"], y=dow["avg_revenue"],
-                marker=dict(
-                    color=dow["avg_revenue"],
-                    colorscale=[[0,"#1e1b4b"],[1,"#7c3aed"]],
-                    showscale=False,
-                    line=dict(width=0),
-                ),
-                text=[f"${v/1000:.0f}K" for v in dow["avg_revenue"]],
-                textposition="outside",
-                textfont=dict(size=10, color="#6366f1"),
-            ))
-            th(fig2, 300)
-            fig2.update_layout(yaxis=dict(tickprefix="$"))
-            st.plotly_chart(fig2, use_container_width=True)
+            st.plotly_chart(build_dow_fig(load_dow_avg(db)), use_container_width=True)
 
     with col2:
         st.markdown('<div class="sl">Revenue vs Profit — Monthly Scatter</div>', unsafe_allow_html=True)
-        if not monthly.empty:
-            monthly_agg = monthly.groupby("month").agg(
-                revenue=("total_revenue","sum"),
-                profit=("total_profit","sum"),
-            ).reset_index()
-            monthly_agg["month"] = pd.to_datetime(monthly_agg["month"].astype(str))
-            monthly_agg["margin"] = (monthly_agg["profit"] / monthly_agg["revenue"] * 100).round(1)
-            monthly_agg["month_label"] = monthly_agg["month"].dt.strftime("%b %Y")
-
-            fig3 = px.scatter(
-                monthly_agg, x="revenue", y="profit",
-                size="margin", color="margin",
-                hover_name="month_label",
-                text="month_label",
-                color_continuous_scale=[[0,"#f43f5e"],[0.5,"#fb923c"],[1,"#a3e635"]],
-                size_max=30,
-            )
-            fig3.update_traces(
-                textposition="top center",
-                textfont=dict(size=9, color="#4b5563"),
-                marker=dict(line=dict(width=1.5, color="#07070f")),
-            )
-            th(fig3, 300)
-            fig3.update_layout(
-                xaxis=dict(tickprefix="$"),
-                yaxis=dict(tickprefix="$"),
-                coloraxis_colorbar=dict(
-                    title="Margin %",
-                    tickfont=dict(color="#4b5563"),
-                    bgcolor=BG, outlinecolor=GRID,
-                ),
-            )
-            st.plotly_chart(fig3, use_container_width=True)
+        if not monthly_totals.empty:
+            st.plotly_chart(build_monthly_scatter(monthly_totals), use_container_width=True)
 
     # AI-style auto-generated insights
     st.markdown('<div class="sl" style="margin-top:8px">Auto Insights</div>', unsafe_allow_html=True)
 
     # Calculate real insights from data
-    top_cat    = sales.groupby("category")["revenue"].sum().idxmax()
-    top_chan   = sales.groupby("sales_channel")["revenue"].sum().idxmax()
-    top_region = sales.groupby("region")["revenue"].sum().idxmax()
-    top_seg    = sales.groupby("customer_segment")["revenue"].sum().idxmax() if "customer_segment" in sales.columns else "Enterprise"
-    weekend_rev = sales[pd.to_datetime(sales["transaction_date"]).dt.dayofweek >= 5]["revenue"].mean() if not sales.empty else 0
-    weekday_rev = sales[pd.to_datetime(sales["transaction_date"]).dt.dayofweek < 5]["revenue"].mean() if not sales.empty else 1
+    insights   = load_insights(db)
+    top_cat    = insights["top_cat"]
+    top_chan   = insights["top_chan"]
+    top_region = insights["top_region"]
+    top_seg    = insights["top_seg"]
+    weekend_rev = insights["weekend_rev"] if pd.notna(insights["weekend_rev"]) else 0
+    weekday_rev = insights["weekday_rev"] if pd.notna(insights["weekday_rev"]) else 0
     weekend_drop = ((weekday_rev - weekend_rev) / weekday_rev * 100) if weekday_rev > 0 else 0
 
     ic1, ic2 = st.columns(2)
@@ -14,21 +14,35 @@ project_root = str(Path(__file__).parent.parent.parent)
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from mcp_server.utils.db_connector import create_connector
+from mcp_server.utils.db_connector import shared_connector
 from mcp_server.config import settings
 from mcp_server.resources.query_history import query_history
 
 st.set_page_config(page_title="System Health | BI Copilot", page_icon="🩺", layout="wide")
 st.title("🩺 System Health")
 
+
+@st.cache_resource
+def get_db():
+    return shared_connector()
+
+@st.cache_data(ttl=30)
+def load_metadata(_db):
+    return _db.get_tables(), _db.get_views()
+
+@st.cache_data(ttl=60)
+def load_all_schemas(_db):
+    # One catalog query for every table's columns, instead of a lookup per table
+    return _db.get_all_schemas()
+
+
 # --- Database Status ---
 st.subheader("Database")
 col1, col2, col3 = st.columns(3)
 
 try:
-    db = create_connector()
-    tables = db.get_tables()
-    views = db.get_views()
+    db = get_db()
+    tables, views = load_metadata(db)
     total_rows = sum(t["row_count"] for t in tables)
     backend = db.get_backend_name()
 
@@ -48,8 +62,9 @@ try:
 
     # Table details
     with st.expander("Table Details"):
+        schemas = load_all_schemas(db)
         for t in tables:
-            schema = db.get_schema(t["name"])
+            schema = schemas.get(t["name"], [])
             cols = ", ".join([f'{c["column"]}({c["type"]})' for c in schema])
             st.text(f"📋 {t['name']}: {t['row_count']:,} rows — [{cols}]")
 
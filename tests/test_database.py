@@ -9,6 +9,8 @@ from pathlib import Path
 
 import pytest
 import duckdb
+import pandas as pd
+import pyarrow as pa
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -32,7 +34,7 @@ class TestDatabaseConnector:
         result = test_db.execute_query("SELECT * FROM test_table")
         assert result["row_count"] == 3
         assert len(result["columns"]) == 3
-        assert result["execution_time_ms"] > 0
+        assert result["execution_time_ms"] >= 0
 
     def test_execute_query_with_error(self, test_db):
         result = test_db.execute_query("SELECT * FROM nonexistent")
@@ -67,6 +69,60 @@ class TestDatabaseConnector:
         assert len(df) == 3
         assert list(df.columns) == ["id", "name", "value"]
 
+    def test_numeric_stats_skip_boolean_columns(self, test_db):
+        """Data Explorer's numeric column pick leaves BOOLEAN out of its stats query."""
+        test_db.execute_query("CREATE TABLE flags AS SELECT id, value, id > 1 AS is_active FROM test_table")
+        dtypes = test_db.execute_query_df("SELECT * FROM flags LIMIT 0").dtypes
+        numeric_cols = [
+            c for c, t in dtypes.items()
+            if pd.api.types.is_numeric_dtype(t) and not pd.api.types.is_bool_dtype(t)
+        ]
+        assert numeric_cols == ["id", "value"]
+        exprs = [f"AVG({c}), PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY {c})" for c in numeric_cols]
+        result = test_db.execute_query(f"SELECT {', '.join(exprs)} FROM flags")
+        assert "error" not in result
+        assert "error" in test_db.execute_query("SELECT AVG(is_active) FROM flags")
+
     def test_schema_nonexistent_table(self, test_db):
         schema = test_db.get_schema("nonexistent")
         assert schema == []
+
+    def test_schema_cache_invalidated_by_write(self, test_db):
+        assert "other_table" not in [t["name"] for t in test_db.get_tables()]
+        test_db.execute_query("CREATE TABLE other_table (id INTEGER)")
+        names = [t["name"] for t in test_db.get_tables()]
+        assert "other_table" in names
+
+    def test_execute_query_arrow(self, test_db):
+        table = test_db.execute_query_arrow("SELECT * FROM test_table")
+        assert table.num_rows == 3
+        assert table.column_names == ["id", "name", "value"]
+
+    def test_execute_query_arrow_mode(self, test_db):
+        result = test_db.execute_query("SELECT * FROM test_table ORDER BY id", arrow=True)
+        assert result["row_count"] == 3
+        assert result["columns"] == ["id", "name", "value"]
+        assert result["arrow"].column("id").to_pylist() == [1, 2, 3]
+
+    def test_execute_query_arrow_sum_is_chartable(self, test_db):
+        """Query Interface keeps SUM() results, which DuckDB returns as DECIMAL, as numeric chart columns."""
+        table = test_db.execute_query_arrow("SELECT name, SUM(id) AS total FROM test_table GROUP BY name")
+        assert pa.types.is_decimal(table.schema.field("total").type)
+        chart_df = table.cast(pa.schema([
+            pa.field(f.name, pa.float64()) if pa.types.is_decimal(f.type) else f for f in table.schema
+        ])).to_pandas()
+        assert chart_df.select_dtypes(include="number").columns.tolist() == ["total"]
+
+    def test_read_only_rejects_writes(self, test_db):
+        db = DatabaseConnector(test_db.db_path, read_only=True)
+        assert db.execute_query("SELECT COUNT(*) FROM test_table")["rows"] == [[3]]
+        result = db.execute_query("DELETE FROM test_table")
+        assert "error" in result
+        assert "read-only" in result["suggestion"]
+
+    def test_export_csv(self, test_db, tmp_path):
+        path = tmp_path / "export.csv"
+        test_db.export_csv("SELECT id, name FROM test_table ORDER BY id", str(path))
+        lines = path.read_text().splitlines()
+        assert lines[0] == "id,name"
+        assert len(lines) == 4
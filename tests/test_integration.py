@@ -5,17 +5,21 @@ Tests complete workflows: data generation → database → tool execution.
 """
 
 import asyncio
+import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
 import duckdb
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from mcp_server.utils.db_connector import DatabaseConnector
+from mcp_server.utils.cache import TTLCache
 from mcp_server.tools.query_database import query_database
 from mcp_server.tools.analyze_data import analyze_data
 from mcp_server.tools.detect_anomalies import detect_anomalies
@@ -24,10 +28,10 @@ from mcp_server.resources.query_history import QueryHistory
 from mcp_server.prompts.analytics_workflows import list_prompts, get_prompt
 
 
-@pytest.fixture
-def full_db(tmp_path):
-    """Create a database mimicking the real data generator output."""
-    db_path = str(tmp_path / "integration.duckdb")
+@pytest.fixture(scope="module")
+def full_db_path(tmp_path_factory):
+    """Create a database mimicking the real data generator output, once per module."""
+    db_path = str(tmp_path_factory.mktemp("db") / "integration.duckdb")
     con = duckdb.connect(db_path)
 
     np.random.seed(42)
@@ -35,27 +39,29 @@ def full_db(tmp_path):
     dates = pd.date_range("2024-01-01", periods=365, freq="D")
 
     sales_data = {
-        "transaction_id": [f"TXN-{i:06d}" for i in range(n)],
-        "transaction_date": np.random.choice(dates, n).astype(str).tolist(),
-        "customer_id": [f"CUST-{np.random.randint(1, 100):05d}" for _ in range(n)],
-        "product_id": [f"PROD-{np.random.randint(1, 50):04d}" for _ in range(n)],
-        "product_name": np.random.choice(["Laptop Pro", "Cloud Suite", "Server Rack", "API Service"], n).tolist(),
-        "category": np.random.choice(["Electronics", "Software", "Hardware", "Services"], n).tolist(),
-        "subcategory": np.random.choice(["Premium", "Standard", "Basic"], n).tolist(),
-        "region": np.random.choice(["North America", "Europe", "Asia Pacific"], n).tolist(),
-        "quantity": np.random.randint(1, 10, n).tolist(),
-        "unit_price": np.random.uniform(100, 5000, n).round(2).tolist(),
-        "discount_pct": np.random.choice([0, 5, 10, 15, 20], n).tolist(),
-        "revenue": np.random.uniform(100, 50000, n).round(2).tolist(),
-        "cost": np.random.uniform(50, 25000, n).round(2).tolist(),
-        "profit": np.random.uniform(-5000, 25000, n).round(2).tolist(),
-        "sales_channel": np.random.choice(["Direct", "Partner", "Online"], n).tolist(),
-        "payment_method": np.random.choice(["Credit Card", "Wire", "PO"], n).tolist(),
-        "customer_segment": np.random.choice(["Enterprise", "SMB", "Startup"], n).tolist(),
+        "transaction_id": np.char.add("TXN-", np.char.zfill(np.arange(n).astype(str), 6)),
+        "transaction_date": np.random.choice(dates, n).astype(str),
+        "customer_id": np.char.add("CUST-", np.char.zfill(np.random.randint(1, 100, n).astype(str), 5)),
+        "product_id": np.char.add("PROD-", np.char.zfill(np.random.randint(1, 50, n).astype(str), 4)),
+        "product_name": np.random.choice(["Laptop Pro", "Cloud Suite", "Server Rack", "API Service"], n),
+        "category": np.random.choice(["Electronics", "Software", "Hardware", "Services"], n),
+        "subcategory": np.random.choice(["Premium", "Standard", "Basic"], n),
+        "region": np.random.choice(["North America", "Europe", "Asia Pacific"], n),
+        "quantity": np.random.randint(1, 10, n),
+        "unit_price": np.random.uniform(100, 5000, n).round(2),
+        "discount_pct": np.random.choice([0, 5, 10, 15, 20], n),
+        "revenue": np.random.uniform(100, 50000, n).round(2),
+        "cost": np.random.uniform(50, 25000, n).round(2),
+        "profit": np.random.uniform(-5000, 25000, n).round(2),
+        "sales_channel": np.random.choice(["Direct", "Partner", "Online"], n),
+        "payment_method": np.random.choice(["Credit Card", "Wire", "PO"], n),
+        "customer_segment": np.random.choice(["Enterprise", "SMB", "Startup"], n),
     }
 
-    df = pd.DataFrame(sales_data)
-    con.execute("CREATE TABLE sales AS SELECT * FROM df")
+    # Scanned by DuckDB as Arrow, so the string columns never become Python objects
+    con.register("sales_in", pa.table(sales_data))
+    con.execute("CREATE TABLE sales AS SELECT * FROM sales_in")
+    con.unregister("sales_in")
 
     con.execute("""
         CREATE VIEW daily_kpis AS
@@ -65,43 +71,55 @@ def full_db(tmp_path):
     """)
 
     con.close()
+    return db_path
+
+
+@pytest.fixture
+def full_db(full_db_path, tmp_path):
+    """Per-test copy of the integration database."""
+    db_path = str(tmp_path / "integration.duckdb")
+    shutil.copyfile(full_db_path, db_path)
     return DatabaseConnector(db_path)
 
 
 class TestEndToEndWorkflow:
     @pytest.mark.asyncio
     async def test_query_then_analyze(self, full_db):
-        """Test querying data then analyzing it."""
-        query_result = await query_database(
-            query="SELECT category, SUM(revenue) as rev FROM sales GROUP BY 1",
-            query_type="sql", db=full_db
+        """Test querying data and analyzing it concurrently."""
+        query_result, analysis = await asyncio.gather(
+            query_database(
+                query="SELECT category, SUM(revenue) as rev FROM sales GROUP BY 1",
+                query_type="sql", db=full_db
+            ),
+            analyze_data(table_name="sales", db=full_db),
         )
         assert "error" not in query_result
         assert query_result["row_count"] > 0
 
-        analysis = await analyze_data(table_name="sales", db=full_db)
         assert "error" not in analysis
         assert analysis["total_rows"] == 500
 
     @pytest.mark.asyncio
     async def test_analyze_then_detect_anomalies(self, full_db):
-        """Test analysis followed by anomaly detection."""
-        analysis = await analyze_data(table_name="sales", db=full_db)
+        """Test analysis and anomaly detection run concurrently."""
+        analysis, anomalies = await asyncio.gather(
+            analyze_data(table_name="sales", db=full_db),
+            detect_anomalies(table_name="sales", metric_column="revenue", db=full_db),
+        )
         assert "error" not in analysis
 
-        anomalies = await detect_anomalies(
-            table_name="sales", metric_column="revenue", db=full_db
-        )
         assert "error" not in anomalies
         assert "anomalies_found" in anomalies or "baseline" in anomalies
 
     @pytest.mark.asyncio
     async def test_resources_list_and_get(self, full_db):
-        """Test listing datasets then getting details."""
-        datasets = await list_datasets(full_db)
+        """Test listing datasets and getting details concurrently."""
+        datasets, sales_ds = await asyncio.gather(
+            list_datasets(full_db),
+            get_dataset("sales", full_db),
+        )
         assert len(datasets) > 0
 
-        sales_ds = await get_dataset("sales", full_db)
         assert "error" not in sales_ds
         assert sales_ds["row_count"] == 500
         assert len(sales_ds["columns"]) > 0
@@ -129,6 +147,24 @@ class TestQueryHistory:
         assert stats["successful"] == 2
         assert stats["failed"] == 1
 
+    def test_stats_after_eviction(self):
+        qh = QueryHistory(max_entries=2)
+        qh.record("q1", "sql", 10, 500.0)
+        qh.record("q2", "sql", 0, 5.0, success=False, error="err")
+        qh.record("q3", "sql", 20, 20.0)
+
+        stats = qh.get_stats()
+        assert stats["total_queries"] == 2
+        assert stats["successful"] == 1
+        assert stats["max_execution_ms"] == 20.0
+        assert stats["avg_execution_ms"] == 20.0
+
+    def test_zero_max_entries_keeps_nothing(self):
+        qh = QueryHistory(max_entries=0)
+        qh.record("q1", "sql", 1, 1.0)
+        assert qh.get_history() == []
+        assert qh.get_stats() == {"total_queries": 0}
+
     def test_clear(self):
         qh = QueryHistory()
         qh.record("q1", "sql", 1, 1.0)
@@ -136,6 +172,27 @@ class TestQueryHistory:
         assert len(qh.get_history()) == 0
 
 
+class TestTTLCache:
+    def test_concurrent_get_and_set(self):
+        """Expiry and eviction from several worker threads at once must not raise."""
+        cache = TTLCache(maxsize=4, ttl_seconds=0)
+
+        def churn(worker):
+            for i in range(20000):
+                cache.set(i % 8, worker)
+                cache.get((i + 1) % 8)
+
+        # Switch threads as often as possible so the check-then-delete paths interleave
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                list(pool.map(churn, range(8)))
+        finally:
+            sys.setswitchinterval(interval)
+        assert len(cache) <= 4
+
+
 class TestPrompts:
     def test_list_prompts(self):
         prompts = list_prompts()
@@ -6,6 +6,7 @@ Tests each MCP tool independently with a test database.
 
 import asyncio
 import os
+import shutil
 import sys
 import tempfile
 from pathlib import Path
@@ -23,10 +24,10 @@ from mcp_server.tools.analyze_data import analyze_data
 from mcp_server.tools.detect_anomalies import detect_anomalies
 
 
-@pytest.fixture
-def test_db(tmp_path):
-    """Create a temporary test database with sample data."""
-    db_path = str(tmp_path / "test.duckdb")
+@pytest.fixture(scope="module")
+def seed_db_path(tmp_path_factory):
+    """Create the sample database once per module."""
+    db_path = str(tmp_path_factory.mktemp("db") / "seed.duckdb")
     con = duckdb.connect(db_path)
 
     # Create test sales table
@@ -51,7 +52,14 @@ def test_db(tmp_path):
     df = pd.DataFrame(data)
     con.execute("CREATE TABLE sales AS SELECT * FROM df")
     con.close()
+    return db_path
+
 
+@pytest.fixture
+def test_db(seed_db_path, tmp_path):
+    """Per-test copy of the sample database, so tests that write stay isolated."""
+    db_path = str(tmp_path / "test.duckdb")
+    shutil.copyfile(seed_db_path, db_path)
     return DatabaseConnector(db_path)
 
 
@@ -69,6 +77,32 @@ class TestQueryDatabase:
         assert "error" not in result
         assert result["row_count"] == 5
 
+    @pytest.mark.asyncio
+    async def test_limit_applied_when_identifier_contains_limit(self, test_db):
+        result = await query_database(
+            query="SELECT revenue AS credit_limit FROM sales", query_type="sql", limit=5, db=test_db
+        )
+        assert "error" not in result
+        assert result["row_count"] == 5
+
+    @pytest.mark.asyncio
+    async def test_limit_applied_to_cte(self, test_db):
+        result = await query_database(
+            query="WITH s AS (SELECT * FROM sales) SELECT * FROM s;", query_type="sql", limit=5, db=test_db
+        )
+        assert "error" not in result
+        assert result["row_count"] == 5
+
+    @pytest.mark.asyncio
+    async def test_columnar_result(self, test_db):
+        result = await query_database(
+            query="SELECT region, revenue FROM sales", query_type="sql", limit=5, columnar=True, db=test_db
+        )
+        assert "error" not in result
+        assert result["row_count"] == 5
+        assert list(result["data"]) == ["region", "revenue"]
+        assert len(result["data"]["revenue"]) == 5
+
     @pytest.mark.asyncio
     async def test_invalid_sql(self, test_db):
         result = await query_database(query="SELECT * FROM nonexistent_table", query_type="sql", db=test_db)
@@ -111,6 +145,22 @@ class TestAnalyzeData:
         result = await analyze_data(table_name="sales", columns=["nonexistent"], db=test_db)
         assert "error" in result
 
+    @pytest.mark.asyncio
+    async def test_cache_invalidated_by_new_rows(self, test_db):
+        first = await analyze_data(table_name="sales", db=test_db)
+        assert await analyze_data(table_name="sales", db=test_db) == first
+
+        test_db.execute_query("INSERT INTO sales SELECT * FROM sales LIMIT 10")
+        result = await analyze_data(table_name="sales", db=test_db)
+        assert result["total_rows"] == 210
+
+    @pytest.mark.asyncio
+    async def test_sampled_analysis(self, test_db):
+        result = await analyze_data(table_name="sales", sample_frac=0.5, db=test_db)
+        assert "error" not in result
+        assert 0 < result["total_rows"] < 200
+        assert result["sample_frac"] == 0.5
+
 
 class TestDetectAnomalies:
     @pytest.mark.asyncio
@@ -136,6 +186,15 @@ class TestDetectAnomalies:
         )
         assert result["anomalies_found"] > 0
 
+    @pytest.mark.asyncio
+    async def test_null_metric_values(self, test_db):
+        test_db.execute_query("UPDATE sales SET revenue = NULL WHERE transaction_id IN ('TXN-0001', 'TXN-0002')")
+        result = await detect_anomalies(
+            table_name="sales", metric_column="revenue", method="zscore", threshold=2.5, db=test_db
+        )
+        assert "error" not in result
+        assert result["anomalies_found"] > 0
+
     @pytest.mark.asyncio
     async def test_invalid_column(self, test_db):
         result = await detect_anomalies(